@@ -11,11 +11,18 @@ def check_point_linear(x, y, x1, y1, x2, y2):
     y_pred = a*x+b
     return(math.isclose(y_pred, y, abs_tol = 3))
 
+# rows of [xmin, ymin, xmax, ymax, confidence, class, name] from a detector result
+# (YOLOv5 AutoShape Detections or any result exposing tolist(), e.g. the lean path)
+def detection_rows(results):
+    if hasattr(results, 'pandas'):
+        return results.pandas().xyxy[0].values.tolist()
+    return results.tolist()
+
 # detect character and number in license plate
-def read_plate(yolo_license_plate, im):
+def read_plate(yolo_license_plate, im, size=None):
     LP_type = "1"
-    results = yolo_license_plate(im)
-    bb_list = results.pandas().xyxy[0].values.tolist()
+    results = yolo_license_plate(im) if size is None else yolo_license_plate(im, size=size)
+    bb_list = detection_rows(results)
     if len(bb_list) == 0 or len(bb_list) < 7 or len(bb_list) > 10:
         return "unknown"
     center_list = []
@@ -41,7 +48,6 @@ def read_plate(yolo_license_plate, im):
                 LP_type = "2"
 
     y_mean = int(int(y_sum) / len(bb_list))
-    size = results.pandas().s
 
     # 1 line plates and 2 line plates
     line_1 = []
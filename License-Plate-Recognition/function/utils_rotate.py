@@ -1,14 +1,26 @@
 import numpy as np
 import math
 import cv2
+import threading
+
+# CLAHE objects are expensive to create and not safe to share between threads,
+# so each thread keeps its own
+_clahe_local = threading.local()
+
+def _get_clahe():
+    clahe = getattr(_clahe_local, 'clahe', None)
+    if clahe is None:
+        clahe = cv2.createCLAHE(clipLimit=3.0, tileGridSize=(8,8))
+        _clahe_local.clahe = clahe
+    return clahe
 
 def changeContrast(img):
     lab= cv2.cvtColor(img, cv2.COLOR_BGR2LAB)
-    l_channel, a, b = cv2.split(lab)
-    clahe = cv2.createCLAHE(clipLimit=3.0, tileGridSize=(8,8))
-    cl = clahe.apply(l_channel)
-    limg = cv2.merge((cl,a,b))
-    enhanced_img = cv2.cvtColor(limg, cv2.COLOR_LAB2BGR)
+    # equalize only the L channel in place, a/b are left untouched
+    l_channel = cv2.extractChannel(lab, 0)
+    cl = _get_clahe().apply(l_channel)
+    cv2.insertChannel(cl, lab, 0)
+    enhanced_img = cv2.cvtColor(lab, cv2.COLOR_LAB2BGR)
     return enhanced_img
 
 def rotate_image(image, angle):
@@ -17,46 +29,200 @@ def rotate_image(image, angle):
     result = cv2.warpAffine(image, rot_mat, image.shape[1::-1], flags=cv2.INTER_LINEAR)
     return result
 
-def compute_skew(src_img, center_thres):
-    if len(src_img.shape) == 3:
-        h, w, _ = src_img.shape
-    elif len(src_img.shape) == 2:
-        h, w = src_img.shape
-    else:
+def _downscale(img, max_width):
+    # shrink wide crops before edge detection, angles are scale invariant
+    h, w = img.shape[:2]
+    if not max_width or w <= max_width:
+        return img, 1.0
+    scale = max_width / w
+    small = cv2.resize(img, (max_width, max(1, int(round(h * scale)))), interpolation=cv2.INTER_AREA)
+    return small, scale
+
+def compute_skew(src_img, center_thres, max_width=None, method='hough'):
+    # method: 'hough' (topmost Hough line) or 'min_area_rect' (cheaper, plate mask)
+    # max_width: optional downscale width before edge detection
+    if method == 'min_area_rect':
+        return compute_skew_min_area_rect(src_img, max_width)
+    if len(src_img.shape) not in (2, 3):
         print('upsupported image type')
-    img = cv2.medianBlur(src_img, 3)
+    img, scale = _downscale(src_img, max_width)
+    h, w = img.shape[:2]
+    img = cv2.medianBlur(img, 3)
     edges = cv2.Canny(img,  threshold1 = 30,  threshold2 = 100, apertureSize = 3, L2gradient = True)
-    lines = cv2.HoughLinesP(edges, 1, math.pi/180, 30, minLineLength=w / 1.5, maxLineGap=h/3.0)
+    threshold = 30 if scale == 1.0 else max(10, int(round(30 * scale)))
+    lines = cv2.HoughLinesP(edges, 1, math.pi/180, threshold, minLineLength=w / 1.5, maxLineGap=h/3.0)
     if lines is None:
         return 1
 
-    min_line = 100
-    min_line_pos = 0
-    for i in range (len(lines)):
-        for x1, y1, x2, y2 in lines[i]:
-            center_point = [((x1+x2)/2), ((y1+y2)/2)]
-            if center_thres == 1:
-                if center_point[1] < 7:
-                    continue
-            if center_point[1] < min_line:
-                min_line = center_point[1]
-                min_line_pos = i
-
-    angle = 0.0
-    nlines = lines.size
-    cnt = 0
-    for x1, y1, x2, y2 in lines[min_line_pos]:
-        ang = np.arctan2(y2 - y1, x2 - x1)
-        if math.fabs(ang) <= 30: # excluding extreme rotations
-            angle += ang
-            cnt += 1
-    if cnt == 0:
+    # pick the topmost line (smallest centre y, first one on ties) among lines
+    # whose centre is above row 100, skipping lines hugging the top border
+    # (centre above row 7) when center_thres == 1; fall back to the first line
+    lines = lines.reshape(-1, 4).astype(np.float64)
+    center_y = (lines[:, 1] + lines[:, 3]) / 2
+    valid = center_y < 100 * scale
+    if center_thres == 1:
+        valid &= center_y >= 7 * scale
+    min_line_pos = int(np.argmin(np.where(valid, center_y, np.inf))) if valid.any() else 0
+
+    x1, y1, x2, y2 = lines[min_line_pos]
+    return math.degrees(math.atan2(y2 - y1, x2 - x1))
+
+def compute_skew_min_area_rect(src_img, max_width=None):
+    # angle of the long edge of the min-area rectangle around the bright plate body
+    img, _ = _downscale(src_img, max_width)
+    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) if len(img.shape) == 3 else img
+    _, mask = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    if not contours:
         return 0.0
-    return (angle / cnt)*180/math.pi
+    box = cv2.boxPoints(cv2.minAreaRect(max(contours, key=cv2.contourArea)))
+    edges = np.roll(box, -1, axis=0) - box
+    dx, dy = edges[np.argmax(np.hypot(edges[:, 0], edges[:, 1]))]
+    if dx < 0:
+        dx, dy = -dx, -dy
+    angle = math.degrees(math.atan2(dy, dx))
+    # a long edge near vertical means the plate is on its side, not skewed
+    if angle > 45:
+        angle -= 90
+    elif angle < -45:
+        angle += 90
+    return angle
 
-def deskew(src_img, change_cons, center_thres):
+def deskew(src_img, change_cons, center_thres, max_width=None, method='hough'):
     if change_cons == 1:
-        return rotate_image(src_img, compute_skew(changeContrast(src_img), center_thres))
+        return rotate_image(src_img, compute_skew(changeContrast(src_img), center_thres, max_width, method))
     else:
-        return rotate_image(src_img, compute_skew(src_img, center_thres))
+        return rotate_image(src_img, compute_skew(src_img, center_thres, max_width, method))
+
+# ---------------------------------------------------------------------------
+# perspective rectification: find the plate outline inside the detector box
+# and warp it to a fronto-parallel plate in one warpPerspective, instead of
+# trying several in-plane deskew variants
+
+# width/height of Vietnamese plates: one line 520x110, two lines 330x165
+PLATE_ASPECTS = (520 / 110, 330 / 165)
+
+def order_corners(pts):
+    # top-left, top-right, bottom-right, bottom-left
+    pts = np.asarray(pts, dtype=np.float32).reshape(-1, 2)
+    s = pts.sum(axis=1)
+    d = pts[:, 1] - pts[:, 0]
+    quad = np.array([pts[np.argmin(s)], pts[np.argmin(d)], pts[np.argmax(s)], pts[np.argmax(d)]], dtype=np.float32)
+    if len(np.unique(quad.round(1), axis=0)) != 4:
+        return None
+    return quad
+
+def _quad_sides(quad):
+    tl, tr, br, bl = quad
+    width = max(np.linalg.norm(tr - tl), np.linalg.norm(br - bl))
+    height = max(np.linalg.norm(bl - tl), np.linalg.norm(br - tr))
+    return width, height
+
+def find_plate_quad(src_img, max_width=None, min_area=0.3):
+    # corners (tl, tr, br, bl) of the plate body in src_img coordinates, or
+    # None when no plausible quadrilateral is found
+    # min_area: smallest plate area as a fraction of the crop
+    img, scale = _downscale(src_img, max_width)
+    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) if len(img.shape) == 3 else img
+    h, w = gray.shape[:2]
+    if h < 8 or w < 8:
+        return None
+    gray = cv2.GaussianBlur(gray, (3, 3), 0)
+    _, mask = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    # plates are lighter than their surroundings on most cars; the inverted
+    # mask covers dark plates with light characters
+    for candidate in (mask, 255 - mask):
+        # every boundary pixel is kept: the side fit needs points along
+        # straight runs, which CHAIN_APPROX_SIMPLE reduces to their ends
+        contours, _ = cv2.findContours(candidate, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_NONE)
+        if not contours:
+            continue
+        contour = max(contours, key=cv2.contourArea)
+        if cv2.contourArea(contour) < min_area * h * w:
+            continue
+        hull = cv2.convexHull(contour)
+        perimeter = cv2.arcLength(hull, True)
+        approx = None
+        for eps in (0.02, 0.04, 0.06, 0.08):
+            approx = cv2.approxPolyDP(hull, eps * perimeter, True)
+            if len(approx) <= 4:
+                break
+        if approx is None or len(approx) != 4:
+            continue
+        quad = order_corners(approx)
+        if quad is None:
+            continue
+        quad = _fit_sides(contour.reshape(-1, 2).astype(np.float32), quad)
+        if quad is None:
+            continue
+        # a quad on the crop border is the detector box itself (plate cut
+        # off or filling the crop): nothing to rectify
+        margin = 2.0
+        on_border = ((quad[:, 0] <= margin) | (quad[:, 0] >= w - 1 - margin)) & \
+                    ((quad[:, 1] <= margin) | (quad[:, 1] >= h - 1 - margin))
+        if on_border.all():
+            continue
+        qw, qh = _quad_sides(quad)
+        if qh < 4 or not 0.8 <= qw / qh <= 8.0:
+            continue
+        return quad / scale
+    return None
+
+def _fit_sides(points, quad):
+    # approxPolyDP corners sit on the contour within eps; fitting a line to
+    # the contour points along each side and intersecting neighbouring
+    # sides puts them on the actual plate corners
+    lines = []
+    for i in range(4):
+        p1, p2 = quad[i], quad[(i + 1) % 4]
+        side = p2 - p1
+        length = np.linalg.norm(side)
+        if length < 4:
+            return None
+        direction = side / length
+        rel = points - p1
+        along = rel @ direction
+        across = np.abs(rel[:, 0] * direction[1] - rel[:, 1] * direction[0])
+        # middle 80% of the side, close to it (skips rounded corners)
+        near = (along > 0.1 * length) & (along < 0.9 * length) & (across < max(2.0, 0.05 * length))
+        if near.sum() < 2:
+            return None
+        vx, vy, x0, y0 = cv2.fitLine(points[near], cv2.DIST_HUBER, 0, 0.01, 0.01).ravel()
+        lines.append((np.array([x0, y0]), np.array([vx, vy])))
+    corners = []
+    for i in range(4):
+        # corner i joins side i-1 (ending there) and side i (starting there)
+        (p, r), (q, t) = lines[i - 1], lines[i]
+        cross = r[0] * t[1] - r[1] * t[0]
+        if abs(cross) < 1e-6:
+            return None
+        u = ((q[0] - p[0]) * t[1] - (q[1] - p[1]) * t[0]) / cross
+        corners.append(p + u * r)
+    fitted = np.array(corners, dtype=np.float32)
+    # a wild intersection means the sides were not straight
+    if np.abs(fitted - quad).max() > 0.25 * min(_quad_sides(quad)):
+        return None
+    return fitted
+
+def warp_plate(src_img, quad):
+    # fronto-parallel plate at the nearest standard aspect, height kept
+    width, height = _quad_sides(quad)
+    # perspective shortens the measured aspect, so snap to the standard one
+    aspect = width / max(height, 1.0)
+    split = math.sqrt(PLATE_ASPECTS[0] * PLATE_ASPECTS[1])
+    aspect = PLATE_ASPECTS[0] if aspect >= split else PLATE_ASPECTS[1]
+    out_h = max(8, int(round(height)))
+    out_w = max(8, int(round(out_h * aspect)))
+    dst = np.array([[0, 0], [out_w - 1, 0], [out_w - 1, out_h - 1], [0, out_h - 1]], dtype=np.float32)
+    matrix = cv2.getPerspectiveTransform(np.asarray(quad, dtype=np.float32), dst)
+    return cv2.warpPerspective(src_img, matrix, (out_w, out_h), flags=cv2.INTER_LINEAR,
+                               borderMode=cv2.BORDER_REPLICATE)
 
+def rectify_plate(src_img, change_cons=0, center_thres=0, max_width=None):
+    # one rectified crop for OCR: perspective warp of the plate outline, or
+    # the Hough deskew when no outline is found
+    # returns (image, True if the plate outline was used)
+    quad = find_plate_quad(src_img, max_width)
+    if quad is None:
+        return deskew(src_img, change_cons, center_thres, max_width), False
+    return warp_plate(src_img, quad), True
@@ -1,9 +1,7 @@
-from PIL import Image
 import cv2
 import torch
 import math 
 import function.utils_rotate as utils_rotate
-from IPython.display import display
 import os
 import time
 import argparse
@@ -38,7 +36,6 @@ while(True):
     list_plates = plates.pandas().xyxy[0].values.tolist()
     list_read_plates = set()
     for plate in list_plates:
-        flag = 0
         x = int(plate[0]) # xmin
         y = int(plate[1]) # ymin
         w = int(plate[2] - plate[0]) # xmax - xmin
@@ -48,15 +45,18 @@ while(True):
         cv2.imwrite("crop.jpg", crop_img)
         rc_image = cv2.imread("crop.jpg")
         lp = ""
-        for cc in range(0,2):
-            for ct in range(0,2):
-                lp = helper.read_plate(yolo_license_plate, utils_rotate.deskew(crop_img, cc, ct))
-                if lp != "unknown":
-                    list_read_plates.add(lp)
-                    cv2.putText(frame, lp, (int(plate[0]), int(plate[1]-10)), cv2.FONT_HERSHEY_SIMPLEX, 0.9, (36,255,12), 2)
-                    flag = 1
-                    break
-            if flag == 1:
+        # one OCR pass on the perspective-rectified plate; the deskew
+        # variants are only tried when no plate outline is found
+        quad = utils_rotate.find_plate_quad(crop_img)
+        if quad is not None:
+            candidates = [utils_rotate.warp_plate(crop_img, quad)]
+        else:
+            candidates = (utils_rotate.deskew(crop_img, cc, ct) for cc in range(0,2) for ct in range(0,2))
+        for candidate in candidates:
+            lp = helper.read_plate(yolo_license_plate, candidate)
+            if lp != "unknown":
+                list_read_plates.add(lp)
+                cv2.putText(frame, lp, (int(plate[0]), int(plate[1]-10)), cv2.FONT_HERSHEY_SIMPLEX, 0.9, (36,255,12), 2)
                 break
     new_frame_time = time.time()
     fps = 1/(new_frame_time-prev_frame_time)
@@ -3,7 +3,6 @@ const ParkingLog = require('../model/parkingLog');
 const LicensePlateClient = require('../utils/licensePlateClient');
 const multer = require('multer');
 const path = require('path');
-const fs = require('fs');
 
 // Setup multer to store in memory (for base64 conversion)
 const storage = multer.memoryStorage();
@@ -144,22 +143,12 @@ parkingLogsRouter.post('/recognize', upload.single('image'), async (request, res
     // Convert buffer to base64
     const imageBase64 = `data:${request.file.mimetype};base64,${request.file.buffer.toString('base64')}`;
 
-    // Save temporarily to disk for Python service
-    const tempDir = path.join(__dirname, '../temp');
-    if (!fs.existsSync(tempDir)) {
-      fs.mkdirSync(tempDir, { recursive: true });
-    }
-
-    const tempPath = path.join(tempDir, `${Date.now()}.jpg`);
-    fs.writeFileSync(tempPath, request.file.buffer);
-
-    // Call Python service to recognize license plate
-    const recognitionResult = await LicensePlateClient.recognizeFromFile(tempPath);
-
-    // Delete temp file
-    if (fs.existsSync(tempPath)) {
-      fs.unlinkSync(tempPath);
-    }
+    // Send the uploaded bytes straight to the Python service (raw body,
+    // compact response - the image is not echoed back)
+    const recognitionResult = await LicensePlateClient.recognizeFromBuffer(
+      request.file.buffer,
+      request.file.originalname
+    );
 
     if (!recognitionResult.success) {
       return response.status(422).json({
@@ -275,6 +264,41 @@ parkingLogsRouter.get('/lp-service/health', async (request, response) => {
   }
 });
 
+/**
+ * GET /api/parking/logs/lp-service/events
+ * Relay Server-Sent Events (recognition, track, camera) from the LP service
+ * so lanes can react to events instead of polling
+ */
+parkingLogsRouter.get('/lp-service/events', async (request, response) => {
+  let upstream;
+  try {
+    upstream = await LicensePlateClient.openEventStream(
+      request.query.types,
+      request.get('Last-Event-ID')
+    );
+  } catch (error) {
+    return response.status(502).json({
+      success: false,
+      error: {
+        message: 'LP service event stream unavailable',
+        details: error.message
+      }
+    });
+  }
+
+  response.set({
+    'Content-Type': 'text/event-stream',
+    'Cache-Control': 'no-cache',
+    'Connection': 'keep-alive',
+    'X-Accel-Buffering': 'no'
+  });
+  response.flushHeaders();
+
+  upstream.data.pipe(response);
+  upstream.data.on('error', () => response.end());
+  request.on('close', () => upstream.data.destroy());
+});
+
 /**
  * GET /api/parking/logs/:id
  * Get single parking log by ID
@@ -559,7 +583,7 @@ parkingLogsRouter.delete('/:id', async (request, response) => {
  */
 parkingLogsRouter.post('/recognize/pi-camera', async (request, response) => {
   try {
-    const result = await LicensePlateClient.recognizeFromPiCamera();
+    const result = await LicensePlateClient.recognizeFromPiCamera(request.body?.burst);
 
     if (result.success) {
       return response.json({
@@ -568,6 +592,7 @@ parkingLogsRouter.post('/recognize/pi-camera', async (request, response) => {
           licensePlate: result.licensePlate,
           confidence: result.confidence,
           imageData: result.imageData,
+          quality: result.quality,
           timestamp: result.timestamp
         },
         message: 'License plate captured from Pi Camera successfully'
@@ -647,16 +672,18 @@ parkingLogsRouter.post('/camera/preview/start', async (request, response) => {
 /**
  * 🆕 GET /api/parking/logs/camera/preview/frame
  * Get frame from active preview session (fast, no camera restart)
+ * Optional ?after=<version> waits briefly for a frame newer than the one shown
  */
 parkingLogsRouter.get('/camera/preview/frame', async (request, response) => {
   try {
-    const result = await LicensePlateClient.getPiCameraPreviewFrame();
+    const result = await LicensePlateClient.getPiCameraPreviewFrame(request.query.after);
 
     if (result.success) {
       return response.json({
         success: true,
         data: {
           imageData: result.imageData,
+          version: result.version,
           timestamp: result.timestamp
         }
       });
@@ -3,6 +3,14 @@ import axios from 'axios'
 // Base API URL
 const API_URL = import.meta.env.VITE_API_URL || 'http://localhost:3001/api'
 
+// LP service cameras (LP_CAMERAS names) watching each lane, comma separated;
+// empty = events of every camera
+const cameraList = (value) => (value || '').split(',').map((name) => name.trim()).filter(Boolean)
+const LANE_CAMERAS = {
+  entry: cameraList(import.meta.env.VITE_ENTRY_CAMERAS),
+  exit: cameraList(import.meta.env.VITE_EXIT_CAMERAS)
+}
+
 /**
  * Parking Log Service
  * Handles all API calls related to parking logs
@@ -157,6 +165,42 @@ const parkingLogService = {
     }
   },
 
+  /**
+   * Subscribe to LP service events (Server-Sent Events) instead of polling
+   * @param {Function} onEvent - Called with (type, data) for every event
+   * @param {string[]} [types] - Event types: 'recognition', 'track', 'camera'
+   * @param {string[]} [cameras] - Only events of these cameras (empty = all)
+   * @returns {Function} Unsubscribe function (closes the stream)
+   */
+  subscribeToLPEvents: (onEvent, types = ['recognition', 'track', 'camera'], cameras = []) => {
+    const url = `${API_URL}/parking/logs/lp-service/events?types=${types.join(',')}`
+    const source = new EventSource(url)
+    const handler = (event) => {
+      let data
+      try {
+        data = JSON.parse(event.data)
+      } catch (error) {
+        console.error('Invalid LP event:', error)
+        return
+      }
+      if (cameras.length > 0 && event.type !== 'dropped' && !cameras.includes(data.camera)) return
+      onEvent(event.type, data)
+    }
+    ;[...types, 'dropped'].forEach((type) => source.addEventListener(type, handler))
+    return () => source.close()
+  },
+
+  /**
+   * Subscribe to plate reads ('track') and camera status ('camera') of the
+   * cameras watching a lane (VITE_ENTRY_CAMERAS / VITE_EXIT_CAMERAS)
+   * @param {string} lane - 'entry' or 'exit'
+   * @param {Function} onEvent - Called with (type, data) for every event
+   * @returns {Function} Unsubscribe function (closes the stream)
+   */
+  subscribeToLaneEvents: (lane, onEvent) => {
+    return parkingLogService.subscribeToLPEvents(onEvent, ['track', 'camera'], LANE_CAMERAS[lane] || [])
+  },
+
   /**
    * Get current parking (vehicles currently in parking lot)
    * @returns {Promise<Object>} List of vehicles currently parked
@@ -459,11 +503,15 @@ const parkingLogService = {
 
   /**
    * 🆕 Get frame from active preview session (fast, no camera restart)
+   * @param {number} [after] - Version of the frame on screen (response.data.version);
+   *   the server waits briefly for a newer one instead of returning the same frame
    * @returns {Promise<Object>} Preview frame data
    */
-  getPiCameraPreviewFrame: async () => {
+  getPiCameraPreviewFrame: async (after) => {
     try {
-      const response = await axios.get(`${API_URL}/parking/logs/camera/preview/frame`)
+      const response = await axios.get(`${API_URL}/parking/logs/camera/preview/frame`, {
+        params: after !== undefined && after !== null ? { after } : {}
+      })
       return response.data
     } catch (error) {
       console.error('Failed to get preview frame:', error)
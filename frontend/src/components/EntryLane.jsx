@@ -16,13 +16,18 @@ function EntryLane({ latestEntry, allEntries, onEntryAdded }) {
   const [selectedEntry, setSelectedEntry] = useState(null);
   const [isRecognizing, setIsRecognizing] = useState(false);
   const [recognitionError, setRecognitionError] = useState('');
-  const [cameraType, setCameraType] = useState('unknown');
+  const [cameraStatus, setCameraStatus] = useState(null);
   const [showPiCameraPreview, setShowPiCameraPreview] = useState(false);
   const [previewImage, setPreviewImage] = useState(null);
   const [isLoadingPreview, setIsLoadingPreview] = useState(false);
 
   // Ref to track preview interval
   const previewIntervalRef = useRef(null);
+  const previewVersionRef = useRef(null);
+  const previewFetchingRef = useRef(false);
+  // Plate last filled in from a lane event (replaced by the next one unless
+  // the operator has edited the field)
+  const autoPlateRef = useRef('');
 
   // Tự động cập nhật selectedEntry khi có xe mới vào (latestEntry thay đổi)
   useEffect(() => {
@@ -31,19 +36,25 @@ function EntryLane({ latestEntry, allEntries, onEntryAdded }) {
     }
   }, [latestEntry]); // Depend on the whole object to catch all changes
 
-  // Test camera on mount
+  // Lane events pushed by the LP service (SSE) instead of polling: plates
+  // read by continuous recognition fill the form, camera status is shown
   useEffect(() => {
-    const checkCamera = async () => {
-      try {
-        const result = await parkingLogService.testCamera();
-        if (result.success) {
-          setCameraType(result.data.cameraType);
-        }
-      } catch (error) {
-        console.error('Camera test error:', error);
+    const unsubscribe = parkingLogService.subscribeToLaneEvents('entry', (type, data) => {
+      if (type === 'camera') {
+        setCameraStatus(data.status);
+        return;
       }
-    };
-    checkCamera();
+      if (type !== 'track' || data.state !== 'updated' || !data.licensePlate) return;
+      setFormData((prev) => {
+        if (prev.licensePlate && prev.licensePlate !== autoPlateRef.current) return prev;
+        autoPlateRef.current = data.licensePlate;
+        return { ...prev, licensePlate: data.licensePlate };
+      });
+      setShowForm(true);
+      setSuccess(`Nhận diện từ camera ${data.camera}: ${data.licensePlate}`);
+      setTimeout(() => setSuccess(''), 4000);
+    });
+    return unsubscribe;
   }, []);
 
   const handleEntryClick = async (entry) => {
@@ -192,6 +203,7 @@ function EntryLane({ latestEntry, allEntries, onEntryAdded }) {
 
     setShowPiCameraPreview(false);
     setPreviewImage(null);
+    previewVersionRef.current = null;
     setIsLoadingPreview(false);
   };
 
@@ -213,15 +225,22 @@ function EntryLane({ latestEntry, allEntries, onEntryAdded }) {
 
   // Fetch single preview frame from session
   const fetchPreviewFrame = async () => {
+    // The server holds the request until a newer frame exists, so skip
+    // ticks while one is still waiting
+    if (previewFetchingRef.current) return;
+    previewFetchingRef.current = true;
     try {
-      const result = await parkingLogService.getPiCameraPreviewFrame();
+      const result = await parkingLogService.getPiCameraPreviewFrame(previewVersionRef.current);
 
-      if (result.success && result.data.imageData) {
+      if (result.success && result.data.imageData && result.data.version !== previewVersionRef.current) {
+        previewVersionRef.current = result.data.version;
         setPreviewImage(result.data.imageData);
       }
     } catch (err) {
       console.error('Preview frame error:', err);
       // Don't show error for each failed frame - just log it
+    } finally {
+      previewFetchingRef.current = false;
     }
   };
 
@@ -297,6 +316,9 @@ function EntryLane({ latestEntry, allEntries, onEntryAdded }) {
         <div className="flex items-center gap-2">
           <ArrowDownCircle size={24} />
           <h2 className="text-xl font-semibold">Làn Vào - Xe Máy</h2>
+          {cameraStatus && (
+            <span className="text-xs bg-emerald-600 px-2 py-0.5 rounded-full">📷 {cameraStatus}</span>
+          )}
         </div>
         <button
           onClick={() => setShowForm(!showForm)}
@@ -1,4 +1,4 @@
-import { useState, useRef } from 'react';
+import { useState, useRef, useEffect } from 'react';
 import { ArrowUpCircle, CheckCircle2, XCircle, Clock, Calendar, Timer, Bike, LogOut, Camera, Upload, Zap, X } from 'lucide-react';
 import parkingLogService from '../../services/parkingLogService';
 
@@ -17,6 +17,28 @@ function ExitLane({ onExitProcessed }) {
   const [isConfirming, setIsConfirming] = useState(false);
   const [isRecognizing, setIsRecognizing] = useState(false);
   const [recognitionError, setRecognitionError] = useState('');
+  const [cameraStatus, setCameraStatus] = useState(null);
+  // Plate last filled in from a lane event (replaced by the next one unless
+  // the operator has edited the field)
+  const autoPlateRef = useRef('');
+
+  // Lane events pushed by the LP service (SSE) instead of polling: plates
+  // read by continuous recognition fill the form, camera status is shown
+  useEffect(() => {
+    const unsubscribe = parkingLogService.subscribeToLaneEvents('exit', (type, data) => {
+      if (type === 'camera') {
+        setCameraStatus(data.status);
+        return;
+      }
+      if (type !== 'track' || data.state !== 'updated' || !data.licensePlate) return;
+      setFormData((prev) => {
+        if (prev.exitLicensePlate && prev.exitLicensePlate !== autoPlateRef.current) return prev;
+        autoPlateRef.current = data.licensePlate;
+        return { ...prev, exitLicensePlate: data.licensePlate };
+      });
+    });
+    return unsubscribe;
+  }, []);
 
   const handleSubmit = async (e) => {
     e.preventDefault();
@@ -169,6 +191,9 @@ function ExitLane({ onExitProcessed }) {
       <div className="bg-blue-500 text-white p-4 flex items-center gap-2 flex-shrink-0">
         <ArrowUpCircle size={24} />
         <h2 className="text-xl font-semibold">Làn Ra - Xe Máy</h2>
+        {cameraStatus && (
+          <span className="text-xs bg-blue-600 px-2 py-0.5 rounded-full">📷 {cameraStatus}</span>
+        )}
       </div>
 
 
@@ -3,36 +3,135 @@ Flask REST API Server for License Plate Recognition
 Provides HTTP endpoints for Node.js backend to call Python recognition service
 """
 
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, request, jsonify, send_file
 from flask_cors import CORS
+from werkzeug.exceptions import RequestEntityTooLarge
 import os
 import base64
-import uuid
 from datetime import datetime
-from lp_recognition_service import get_recognition_service
-import cv2
-import numpy as np
+from urllib.parse import unquote
 import threading
 import platform
+import autotune
+import config
+import priority
+import profiling
+from event_hub import RECOGNITION, publish
+from result_cache import get_result_cache
+from service_loader import ServiceLoader
+
+# NOTE: keep module-level imports light (no torch/cv2/numpy) so /health
+# answers right after start; heavy modules are imported by the loader thread
+# or inside the handlers that need them
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for all routes
 
 # Configuration
-UPLOAD_FOLDER = 'uploads'
-MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
+MAX_FILE_SIZE = config.MAX_UPLOAD_MB * 1024 * 1024
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'bmp'}
+# Content types accepted as a raw image request body
+RAW_IMAGE_TYPES = {'application/octet-stream', 'image/jpeg', 'image/png', 'image/bmp'}
+
+# Reject oversized bodies while they stream in, before they are buffered.
+# Base64 JSON uploads are 4/3 of the image size, plus room for form fields
+app.config['MAX_CONTENT_LENGTH'] = MAX_FILE_SIZE * 4 // 3 + 64 * 1024
+
+def encode_frame_base64(frame):
+    """
+    Encode frame as JPEG data URL (None if encoding fails)
+    
+    Args:
+        frame: Frame or OpenCV BGR image
+    """
+    from frame_pipeline import as_frame
+    
+    buffer = as_frame(frame).encode_jpeg()
+    if buffer is None:
+        return None
+    jpg_base64 = base64.b64encode(buffer).decode('utf-8')
+    return f'data:image/jpeg;base64,{jpg_base64}'
+
+
+# Load recognition service (imports + models) in background. Capture and
+# inference child processes (shm_ring) are spawned and re-import this module
+# as __mp_main__; they must not load the service a second time
+loader = ServiceLoader()
+if __name__ != '__mp_main__':
+    loader.start()
 
-# Create upload folder if not exists
-os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 
-# Initialize recognition service
-try:
-    recognition_service = get_recognition_service()
-    SERVICE_READY = True
-except Exception as e:
-    print(f"❌ Failed to initialize recognition service: {e}")
-    SERVICE_READY = False
+def service_not_ready():
+    """503 response while models are loading or after a failed load"""
+    return jsonify({
+        'success': False,
+        'error': 'Recognition service is loading' if loader.state == 'loading'
+                 else 'Recognition service not ready',
+        'state': loader.state
+    }), 503
+
+
+def diagnostics_busy():
+    """
+    429 response while plate recognition is over its latency target
+    (LP_RECOGNITION_TARGET_MS), None when the diagnostic may run; waits for
+    recognitions that are already running
+    """
+    if priority.get_priority_gate().admit(priority.DIAGNOSTICS):
+        return None
+    response = jsonify({
+        'success': False,
+        'error': 'Recognition is over its latency target, try again later'
+    })
+    response.status_code = 429
+    response.headers['Retry-After'] = str(max(1, int(config.PRIORITY_WINDOW)))
+    return response
+
+
+def publish_recognition(source, result, camera=None):
+    """Push recognition result to /api/events subscribers (no image data)"""
+    publish(RECOGNITION, {
+        'source': source,
+        'camera': camera,
+        'success': bool(result.get('success')),
+        'licensePlate': result.get('licensePlate'),
+        'confidence': result.get('confidence', 0),
+        'error': result.get('error'),
+        'frameTimestamp': result.get('frameTimestamp'),
+        'timestamp': datetime.now().isoformat()
+    })
+
+
+def get_cameras():
+    """Camera registry (imported lazily - pulls in OpenCV)"""
+    from camera_manager import get_camera_registry
+    return get_camera_registry()
+
+
+def get_continuous():
+    """Continuous recognizer (imported lazily - pulls in OpenCV)"""
+    from continuous_recognizer import get_continuous_recognizer
+    return get_continuous_recognizer()
+
+
+def _start_continuous(service):
+    """Start background recognition of LP_CONTINUOUS lanes once models are loaded"""
+    if config.CONTINUOUS_CAMERAS:
+        get_continuous().start(service._process_image,
+                               stages=(service._detect_plates, service._read_plates))
+
+
+loader.on_ready(_start_continuous)
+
+
+def _start_governor(service):
+    """Start the thermal governor (LP_GOVERNOR) once models are loaded"""
+    if config.GOVERNOR:
+        from thermal_governor import get_governor
+        get_governor().start()
+
+
+loader.on_ready(_start_governor)
 
 
 # ==========================================
@@ -41,14 +140,14 @@ except Exception as e:
 class PreviewSessionManager:
     """
     Manages continuous Pi Camera preview session
-    Camera stays open for fast frame capture (like rpicam-hello -t 0)
+    Camera stays open for fast frame capture (like rpicam-hello -t 0); one
+    FrameHub thread captures and encodes each frame once for all viewers
     """
     def __init__(self):
         self.picam = None
+        self.hub = None
         self.is_active = False
         self.lock = threading.Lock()
-        self.last_frame = None
-        self.last_frame_time = None
     
     def start_preview(self):
         """Start preview session - open camera once"""
@@ -58,55 +157,65 @@ class PreviewSessionManager:
                 return {'success': True, 'message': 'Preview already running'}
             
             try:
-                from picamera_handler import get_picamera
+                from camera_backends import get_camera
+                from frame_hub import FrameHub
+                from frame_recorder import record_frame
                 
                 print("🎬 Starting preview session...")
-                self.picam = get_picamera()
+                self.picam = get_camera()
                 
                 if not self.picam.is_initialized:
                     return {'success': False, 'error': 'Camera initialization failed'}
                 
+                picam = self.picam
+                self.hub = FrameHub(
+                    picam.capture_raw,
+                    on_frame=lambda frame: record_frame(frame, 'preview', picam)
+                )
+                self.hub.start()
                 self.is_active = True
                 print("✅ Preview session started - camera ready for continuous capture")
                 return {'success': True, 'message': 'Preview session started'}
                 
             except Exception as e:
                 print(f"❌ Failed to start preview: {e}")
-                self.stop_preview()
+                self._close()
                 return {'success': False, 'error': str(e)}
     
-    def get_frame(self):
-        """Get current frame from active preview session"""
+    def get_frame(self, newer_than=None):
+        """
+        Get current frame from active preview session
+        
+        Args:
+            newer_than (int): Version the caller already has; waits up to
+                LP_PREVIEW_WAIT for a newer one
+        """
+        # Only the hub reference is read under the lock, so viewers never
+        # wait on each other or on the camera
         with self.lock:
-            if not self.is_active or self.picam is None:
-                return {'success': False, 'error': 'Preview session not active'}
-            
-            try:
-                frame = self.picam.capture_frame()
-                
-                if frame is None:
-                    return {'success': False, 'error': 'Could not capture frame'}
-                
-                # Cache frame
-                self.last_frame = frame
-                self.last_frame_time = datetime.now()
-                
-                # Encode to base64
-                success, buffer = cv2.imencode('.jpg', frame)
-                if not success:
-                    return {'success': False, 'error': 'Could not encode frame'}
-                
-                jpg_base64 = base64.b64encode(buffer).decode('utf-8')
-                
-                return {
-                    'success': True,
-                    'imageData': f'data:image/jpeg;base64,{jpg_base64}',
-                    'timestamp': self.last_frame_time.isoformat()
-                }
-                
-            except Exception as e:
-                print(f"❌ Error capturing frame: {e}")
-                return {'success': False, 'error': str(e)}
+            hub = self.hub if self.is_active else None
+        if hub is None:
+            return {'success': False, 'error': 'Preview session not active'}
+        
+        frame = hub.get(newer_than)
+        if frame is None:
+            return {'success': False, 'error': 'Could not capture frame'}
+        
+        return {
+            'success': True,
+            'imageData': frame.data_url,
+            'version': frame.version,
+            'timestamp': frame.timestamp.isoformat()
+        }
+    
+    def _close(self):
+        if self.hub is not None:
+            self.hub.stop()
+            self.hub = None
+        if self.picam:
+            self.picam.close()
+            self.picam = None
+        self.is_active = False
     
     def stop_preview(self):
         """Stop preview session - close camera"""
@@ -115,14 +224,7 @@ class PreviewSessionManager:
                 return {'success': True, 'message': 'Preview not active'}
             
             try:
-                if self.picam:
-                    self.picam.close()
-                    self.picam = None
-                
-                self.is_active = False
-                self.last_frame = None
-                self.last_frame_time = None
-                
+                self._close()
                 print("🛑 Preview session stopped")
                 return {'success': True, 'message': 'Preview session stopped'}
                 
@@ -130,13 +232,22 @@ class PreviewSessionManager:
                 print(f"⚠️ Error stopping preview: {e}")
                 return {'success': False, 'error': str(e)}
     
+    @staticmethod
+    def _frame_stats():
+        from frame_pipeline import get_frame_stats
+        return get_frame_stats()
+    
     def get_status(self):
         """Get preview session status"""
         with self.lock:
+            hub = self.hub
+            latest = hub.latest() if hub is not None else None
             return {
                 'active': self.is_active,
-                'has_frame': self.last_frame is not None,
-                'last_capture': self.last_frame_time.isoformat() if self.last_frame_time else None
+                'has_frame': latest is not None,
+                'last_capture': latest.timestamp.isoformat() if latest else None,
+                'broadcast': hub.get_stats() if hub is not None else None,
+                'frame_pipeline': self._frame_stats()
             }
 
 # Global preview session
@@ -149,17 +260,123 @@ def allowed_file(filename):
            filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
 
+
+# ==========================================
+# Request profiling (LP_PROFILE_TOKEN / LP_PROFILE_SAMPLE_RATE)
+# ==========================================
+def _is_recognition_endpoint(path):
+    return path.startswith('/api/recognize') or (
+        path.startswith('/api/cameras/') and path.endswith('/recognize'))
+
+
+@app.before_request
+def start_request_profile():
+    """Profile opted-in or sampled recognition requests"""
+    if not profiling.is_enabled() or not _is_recognition_endpoint(request.path):
+        return
+    reason = profiling.should_profile(request.headers, request.args)
+    if reason:
+        g.profile = profiling.RequestProfile(request.path, reason)
+        g.profile.start()
+
+
+@app.after_request
+def finish_request_profile(response):
+    profile = g.pop('profile', None)
+    if profile is not None:
+        try:
+            profile.stop(response.status_code)
+            response.headers['X-LP-Profile-Id'] = profile.id
+        except Exception as e:
+            print(f"⚠️ Could not save profile: {e}")
+    return response
+
+
+def process_stats():
+    """Resident memory (current and peak, MB) and thread count of this process"""
+    stats = {'threads': threading.active_count()}
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    stats['rssMb'] = round(int(line.split()[1]) / 1024.0, 1)
+                elif line.startswith('VmHWM:'):
+                    stats['peakRssMb'] = round(int(line.split()[1]) / 1024.0, 1)
+    except OSError:
+        try:
+            import resource
+            # ru_maxrss is KB on Linux, bytes on macOS
+            peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            stats['peakRssMb'] = round(peak / (1024.0 * 1024.0 if platform.system() == 'Darwin' else 1024.0), 1)
+        except ImportError:
+            pass
+    return stats
+
+
 @app.route('/health', methods=['GET'])
 def health_check():
-    """Health check endpoint"""
+    """
+    Health check endpoint
+    Answers immediately, also while models are still loading
+    
+    Response:
+        {
+            "status": "ok" | "loading" | "error",
+            "ready": false,
+            "loader": {"state": "loading", "uptime": 0.4, "timings": {...}},
+            "process": {"rssMb": 412.5, "peakRssMb": 430.1, "threads": 9},
+            "tuning": {"state": "profile", "settings": {"torchThreads": 4, "detectSize": 512, ...}},
+            "models": {"detector": {"variant": "int8", "agreement": 1.0, ...}, "ocr": {...}},
+            "priority": {"targetMs": 1500, "recognitionP95Ms": 412.0, "degraded": false, "classes": {...}}
+        }
+    """
+    status = {'ready': 'ok', 'loading': 'loading'}.get(loader.state, 'error')
     return jsonify({
-        'status': 'ok' if SERVICE_READY else 'error',
+        'status': status,
         'service': 'License Plate Recognition API',
         'version': '1.0.0',
-        'ready': SERVICE_READY
+        'ready': loader.is_ready,
+        'loader': loader.status(),
+        'process': process_stats(),
+        'tuning': autotune.get_status(),
+        'models': getattr(loader.service, 'model_variants', None),
+        'resultCache': get_result_cache().get_stats(),
+        'priority': priority.get_priority_gate().get_stats(),
+        'rectify': loader.service.get_rectify_stats() if loader.is_ready else None
     })
 
 
+def _compact_recognition_response(result, cache_status):
+    """Small JSON body plus X-LP-* result headers, no image echo"""
+    if result['success']:
+        body = {
+            'success': True,
+            'licensePlate': result['licensePlate'],
+            'confidence': result.get('confidence', 0),
+            'cache': cache_status
+        }
+        status = 200
+    else:
+        body = {
+            'success': False,
+            'error': result.get('error', 'Recognition failed'),
+            'cache': cache_status
+        }
+        status = 422
+    response = jsonify(body)
+    response.status_code = status
+    if result['success']:
+        response.headers['X-LP-License-Plate'] = result['licensePlate']
+        response.headers['X-LP-Confidence'] = str(result.get('confidence', 0))
+    response.headers['X-LP-Cache'] = cache_status
+    return response
+
+
+def _is_cacheable_result(result):
+    """Reads and 'no plate' answers are cached; processing errors may be transient"""
+    return result.get('success') or not str(result.get('error', '')).startswith('Processing error')
+
+
 @app.route('/api/recognize', methods=['POST'])
 def recognize_license_plate():
     """
@@ -170,6 +387,14 @@ def recognize_license_plate():
         - Multipart form-data with 'file' field
         OR
         - JSON with 'image' field (base64 encoded)
+        OR
+        - Raw image body (Content-Type: application/octet-stream or
+          image/jpeg|png|bmp, optional X-Filename header)
+    
+    Query:
+        compact: 1 = small response without the image echo; the result is
+            also sent as X-LP-License-Plate / X-LP-Confidence / X-LP-Cache
+            headers
     
     Response:
         {
@@ -179,18 +404,20 @@ def recognize_license_plate():
                 "confidence": 0.95,
                 "imageData": "data:image/jpeg;base64,...",
                 "imageMeta": {...},
+                "cache": "miss",  // "hit" | "coalesced" for duplicate images
                 "timestamp": "2025-12-08T10:30:00"
             }
         }
+    
+    Compact response:
+        {"success": true, "licensePlate": "59A1-2345", "confidence": 0.95, "cache": "miss"}
     """
-    if not SERVICE_READY:
-        return jsonify({
-            'success': False,
-            'error': 'Recognition service not ready'
-        }), 503
+    if not loader.is_ready:
+        return service_not_ready()
     
+    compact = request.args.get('compact', '').lower() in ('1', 'true', 'yes')
     try:
-        filepath = None
+        image_bytes = None
         image_base64 = None
         mime_type = None
         file_size = 0
@@ -213,27 +440,36 @@ def recognize_license_plate():
                 }), 400
             
             # Read file into memory
-            file_bytes = file.read()
-            file_size = len(file_bytes)
+            image_bytes = file.read()
+            file_size = len(image_bytes)
             
             if file_size > MAX_FILE_SIZE:
                 return jsonify({
                     'success': False,
-                    'error': 'File too large (max 10MB)'
+                    'error': f'File too large (max {config.MAX_UPLOAD_MB}MB)'
                 }), 400
             
             # Store metadata
             mime_type = file.content_type or 'image/jpeg'
             original_filename = file.filename
-            
-            # Convert to base64 for response
-            image_base64 = base64.b64encode(file_bytes).decode('utf-8')
-            
-            # Save temporary file for recognition
-            filename = f"{uuid.uuid4()}.jpg"
-            filepath = os.path.join(UPLOAD_FOLDER, filename)
-            with open(filepath, 'wb') as f:
-                f.write(file_bytes)
+        
+        # Handle raw image body (no multipart framing or base64 inflation)
+        elif request.mimetype in RAW_IMAGE_TYPES:
+            image_bytes = request.get_data(cache=False)
+            if not image_bytes:
+                return jsonify({
+                    'success': False,
+                    'error': 'Empty request body'
+                }), 400
+            file_size = len(image_bytes)
+            from image_ingest import sniff_mime_type
+            mime_type = sniff_mime_type(image_bytes)
+            if mime_type is None:
+                return jsonify({
+                    'success': False,
+                    'error': f'Invalid file type. Allowed: {", ".join(ALLOWED_EXTENSIONS)}'
+                }), 400
+            original_filename = unquote(request.headers.get('X-Filename', 'upload'))
         
         # Handle base64 encoded image
         elif request.is_json and 'image' in request.json:
@@ -253,12 +489,6 @@ def recognize_license_plate():
                 file_size = len(image_bytes)
                 image_base64 = image_data  # Already base64
                 original_filename = 'camera_capture.jpg'
-                
-                # Save to temporary file for recognition
-                filename = f"{uuid.uuid4()}.jpg"
-                filepath = os.path.join(UPLOAD_FOLDER, filename)
-                with open(filepath, 'wb') as f:
-                    f.write(image_bytes)
             except Exception as e:
                 return jsonify({
                     'success': False,
@@ -268,28 +498,43 @@ def recognize_license_plate():
         else:
             return jsonify({
                 'success': False,
-                'error': 'No image provided. Send multipart file or JSON with base64 image'
+                'error': 'No image provided. Send multipart file, JSON with base64 image or a raw image body'
             }), 400
         
-        # Recognize license plate
-        result = recognition_service.recognize_from_image(filepath)
+        if file_size > MAX_FILE_SIZE:
+            return jsonify({
+                'success': False,
+                'error': f'File too large (max {config.MAX_UPLOAD_MB}MB)'
+            }), 400
         
-        # Clean up temporary file
-        try:
-            if filepath and os.path.exists(filepath):
-                os.remove(filepath)
-        except Exception as e:
-            print(f"Warning: Could not delete temp file: {e}")
+        # Recognize license plate straight from memory (large images are
+        # decoded at reduced resolution, see image_ingest). Identical bytes
+        # (client retries, re-submitted frames) are answered from the result
+        # cache, and concurrent duplicates share one inference
+        def recognize():
+            with priority.get_priority_gate().track(priority.RECOGNITION):
+                result = loader.service.recognize_from_bytes(image_bytes)
+            publish_recognition('upload', result)
+            return result
+        
+        result, cache_status = get_result_cache().get_or_compute(
+            image_bytes, recognize, cacheable=_is_cacheable_result)
+        
+        if compact:
+            return _compact_recognition_response(result, cache_status)
         
         # Return result with base64 image data
         if result['success']:
             response_data = {
                 'licensePlate': result['licensePlate'],
                 'confidence': result.get('confidence', 0),
+                'cache': cache_status,
                 'timestamp': datetime.now().isoformat()
             }
             
-            # Add base64 image data if available
+            # Echo the image as base64 (JSON uploads reuse the string they sent)
+            if image_base64 is None:
+                image_base64 = base64.b64encode(image_bytes).decode('ascii')
             if image_base64:
                 response_data['imageData'] = f'data:{mime_type};base64,{image_base64}'
                 response_data['imageMeta'] = {
@@ -305,9 +550,12 @@ def recognize_license_plate():
         else:
             return jsonify({
                 'success': False,
-                'error': result.get('error', 'Recognition failed')
+                'error': result.get('error', 'Recognition failed'),
+                'cache': cache_status
             }), 422
             
+    except RequestEntityTooLarge as e:
+        return request_too_large(e)
     except Exception as e:
         print(f"Error in /api/recognize: {e}")
         return jsonify({
@@ -322,6 +570,10 @@ def recognize_from_picamera():
     Capture from Raspberry Pi Camera and recognize license plate
     🆕 Endpoint specifically for Raspberry Pi Camera Module
     
+    Burst mode (?burst=N or JSON {"burst": N}, default LP_PICAMERA_BURST)
+    grabs N frames, scores sharpness/exposure and runs the detector only on
+    the best LP_BURST_TOP of them
+    
     Response:
         {
             "success": true,
@@ -329,25 +581,32 @@ def recognize_from_picamera():
                 "licensePlate": "59A1-2345",
                 "confidence": 0.95,
                 "imageData": "data:image/jpeg;base64,...",
+                "quality": {"sharpness": 412.5, "bright": 0.01, "score": 404.2, ...},
+                "burst": {"frames": 5, "chosenIndex": 3, "attempts": 1},
                 "timestamp": "2025-12-13T10:30:00"
             }
         }
     """
-    if not SERVICE_READY:
-        return jsonify({
-            'success': False,
-            'error': 'Recognition service not ready'
-        }), 503
+    if not loader.is_ready:
+        return service_not_ready()
+    
+    data = request.get_json(silent=True) or {}
+    try:
+        burst = int(request.args.get('burst', data.get('burst', config.PICAMERA_BURST)))
+    except (TypeError, ValueError):
+        return jsonify({'success': False, 'error': 'burst must be an integer'}), 400
+    burst = max(1, min(burst, config.BURST_MAX))
     
     picam = None
     try:
-        from picamera_handler import get_picamera
-        import base64
+        from camera_backends import get_camera
+        from frame_recorder import record_frame
+        from frame_quality import capture_burst, rank_frames
         
-        print("📸 Initializing Pi Camera for recognition...")
+        print("📸 Initializing camera for recognition...")
         
-        # Get camera and capture frame
-        picam = get_picamera()
+        # Get camera (Pi Camera or LP_CAMERA_BACKEND) and capture frame(s)
+        picam = get_camera()
         
         if not picam.is_initialized:
             return jsonify({
@@ -355,30 +614,41 @@ def recognize_from_picamera():
                 'error': 'Camera initialization failed'
             }), 500
         
-        frame = picam.capture_frame()
+        frames = capture_burst(picam, burst)
         
-        if frame is None:
+        if not frames:
             return jsonify({
                 'success': False,
                 'error': 'Could not capture frame from Pi Camera'
             }), 500
         
-        # Process with recognition service
-        result = recognition_service._process_image(frame)
+        # Best scored frames first; only the top ones reach the detector
+        ranked = rank_frames(frames)
+        attempts = 0
+        with priority.get_priority_gate().track(priority.RECOGNITION):
+            for index, frame, quality in ranked[:max(1, config.BURST_TOP)]:
+                record_frame(frame, 'picamera', picam)
+                attempts += 1
+                
+                # Process with recognition service
+                result = loader.service._process_image(frame)
+                if result['success']:
+                    break
+        publish_recognition('picamera', result)
+        
+        burst_info = {'frames': len(frames), 'chosenIndex': index, 'attempts': attempts}
         
         if result['success']:
-            # Encode frame as base64 for response
-            success, buffer = cv2.imencode('.jpg', frame)
-            if success:
-                jpg_base64 = base64.b64encode(buffer).decode('utf-8')
-                image_data = f'data:image/jpeg;base64,{jpg_base64}'
-            else:
-                image_data = None
+            # Encode frame as base64 for response (reuses the BGR conversion
+            # made for inference, if any)
+            image_data = encode_frame_base64(frame)
             
             response_data = {
                 'licensePlate': result['licensePlate'],
                 'confidence': result.get('confidence', 0),
                 'imageData': image_data,
+                'quality': quality,
+                'burst': burst_info,
                 'timestamp': datetime.now().isoformat()
             }
             
@@ -389,7 +659,9 @@ def recognize_from_picamera():
         else:
             return jsonify({
                 'success': False,
-                'error': result.get('error', 'Recognition failed')
+                'error': result.get('error', 'Recognition failed'),
+                'quality': ranked[0][2],
+                'burst': burst_info
             }), 422
             
     except Exception as e:
@@ -406,34 +678,371 @@ def recognize_from_picamera():
                 pass
 
 
+@app.route('/api/recognize/camera', methods=['POST'])
+def recognize_from_named_camera():
+    """
+    Capture from a camera and recognize license plate
+    Registered cameras (LP_CAMERAS) use their running capture thread; a
+    device index allowed by LP_CAMERA_DEVICES gets one registered for it.
+    Anything else is 404, clients cannot make the service open a source
+
+    Request:
+        {
+            "cameraId": "entry-1"   (camera name or device index)
+        }
+    """
+    if not loader.is_ready:
+        return service_not_ready()
+
+    data = request.get_json(silent=True) or {}
+    camera_id = data.get('cameraId', 0)
+
+    camera_registry = get_cameras()
+    worker = camera_registry.get(camera_id) or camera_registry.get_device(camera_id)
+    if worker is None:
+        return jsonify({'success': False, 'error': f"Camera '{camera_id}' not registered"}), 404
+    return _recognize_registered_camera(worker.name)
+
+
+def _recognize_registered_camera(name, **extra):
+    """Run recognition on a registered camera and build the HTTP response"""
+    try:
+        result = get_cameras().recognize(name, loader.service._process_image)
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+    if not result.get('busy'):
+        publish_recognition('camera', result, camera=name)
+    if result.get('success'):
+        lane = get_continuous().get_lane(name) if config.CONTINUOUS_CAMERAS else None
+        if lane is not None:
+            lane.store(result, result.get('frame'), datetime.fromisoformat(result['frameTimestamp'])
+                       if result.get('frameTimestamp') else None)
+    return _camera_result_response(name, result, **extra)
+
+
+def _camera_result_response(name, result, **extra):
+    """HTTP response for a camera recognition result dict"""
+    frame = result.get('frame')
+    if result.get('busy'):
+        return jsonify({'success': False, 'error': result['error']}), 429
+    if result.get('timeout'):
+        return jsonify({'success': False, 'camera': name, 'error': result['error']}), 504
+
+    if result['success']:
+        data = {
+            'licensePlate': result['licensePlate'],
+            'confidence': result.get('confidence', 0),
+            'camera': name,
+            'imageData': encode_frame_base64(frame) if frame is not None else None,
+            'frameTimestamp': result.get('frameTimestamp'),
+            'timestamp': datetime.now().isoformat()
+        }
+        data.update(extra)
+        return jsonify({'success': True, 'data': data})
+    return jsonify({
+        'success': False,
+        'camera': name,
+        'error': result.get('error', 'Recognition failed')
+    }), 422
+
+
+@app.route('/api/recognize/latest', methods=['GET'])
+def recognize_latest():
+    """
+    ⚡ Latest plate read of a lane, for card taps
+    Answers from the continuous recognition cache (LP_CONTINUOUS) when the
+    cached read is fresh enough, otherwise recognizes synchronously
+
+    Query:
+        camera: Camera name (default: first continuous camera)
+        maxAge: Max age of the cached read in seconds (default: LP_LATEST_MAX_AGE)
+
+    Response:
+        {
+            "success": true,
+            "data": {
+                "licensePlate": "30A-12345",
+                "source": "cached" | "live",
+                "age": 0.4,
+                "frameTimestamp": "...",
+                ...
+            }
+        }
+    """
+    if not loader.is_ready:
+        return service_not_ready()
+
+    try:
+        max_age = float(request.args.get('maxAge', config.LATEST_MAX_AGE))
+    except ValueError:
+        return jsonify({'success': False, 'error': 'maxAge must be a number'}), 400
+
+    continuous = get_continuous() if config.CONTINUOUS_CAMERAS else None
+    name = request.args.get('camera')
+    if name is None and continuous is not None:
+        name = continuous.default_camera()
+    if name is None:
+        names = get_cameras().names()
+        name = names[0] if names else None
+    if name is None or get_cameras().get(name) is None:
+        return jsonify({'success': False, 'error': f"Camera '{name}' not registered"}), 404
+
+    lane = continuous.get_lane(name) if continuous is not None else None
+    cached = lane.latest(max_age) if lane is not None else None
+    if cached is not None:
+        cached['frameTimestamp'] = cached['frameTime'].isoformat()
+        return _camera_result_response(name, cached, source='cached', age=round(cached['age'], 3))
+
+    return _recognize_registered_camera(name, source='live', age=0.0)
+
+
+@app.route('/api/events', methods=['GET'])
+def stream_events():
+    """
+    📡 Server-Sent Events stream of recognition, track and camera events
+
+    Query:
+        types: Comma separated event types (recognition,track,camera; default all)
+
+    Each client has a bounded queue (LP_EVENTS_QUEUE_SIZE): a slow client
+    loses its oldest events and receives a "dropped" event with the count,
+    so it can resync. Reconnecting clients send Last-Event-ID to replay
+    events still in the recent history.
+    """
+    from event_hub import get_event_hub, format_sse
+
+    hub = get_event_hub()
+    types = [t.strip() for t in request.args.get('types', '').split(',') if t.strip()]
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('lastEventId')
+    try:
+        last_event_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        last_event_id = None
+
+    subscriber = hub.subscribe(types or None, last_event_id)
+    if subscriber is None:
+        return jsonify({'success': False, 'error': 'Too many event clients'}), 503
+
+    def stream():
+        reported_drops = 0
+        try:
+            yield 'retry: 3000\n\n'
+            while True:
+                events = subscriber.get(timeout=config.EVENTS_HEARTBEAT)
+                if subscriber.dropped > reported_drops:
+                    yield (f"event: dropped\n"
+                           f"data: {{\"count\": {subscriber.dropped - reported_drops}}}\n\n")
+                    reported_drops = subscriber.dropped
+                if not events:
+                    yield ': keep-alive\n\n'
+                    continue
+                for event in events:
+                    yield format_sse(event)
+        finally:
+            hub.unsubscribe(subscriber)
+
+    return Response(stream(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+
+@app.route('/api/events/status', methods=['GET'])
+def events_status():
+    """
+    📡 Connected event clients with queued/delivered/dropped counters
+    """
+    from event_hub import get_event_hub
+
+    return jsonify({'success': True, 'data': get_event_hub().get_stats()})
+
+
+@app.route('/api/cameras', methods=['GET'])
+def list_cameras():
+    """
+    📷 List registered cameras with capture and inference stats
+
+    Response:
+        {
+            "success": true,
+            "data": {
+                "cameras": [{"name": "entry-1", "fps": 14.8, "framesDropped": 3, ...}],
+                "pending": {"entry-1": 1},
+                "framePipeline": {"allocationsPerFrame": 0.1, "bytesCopiedPerFrame": 2764800, ...}
+            }
+        }
+    """
+    from frame_pipeline import get_frame_stats
+    
+    stats = get_cameras().get_stats()
+    stats['framePipeline'] = get_frame_stats()
+    if config.CONTINUOUS_CAMERAS:
+        stats['continuous'] = get_continuous().get_stats()
+        stats['recognitionPipeline'] = get_continuous().get_pipeline_stats()
+    return jsonify({
+        'success': True,
+        'data': stats
+    })
+
+
+@app.route('/api/cameras/<name>/frame', methods=['GET'])
+def get_camera_frame(name):
+    """
+    📸 Get newest frame of a registered camera (diagnostic, see diagnostics_busy)
+    """
+    worker = get_cameras().get(name)
+    if worker is None:
+        return jsonify({'success': False, 'error': f"Camera '{name}' not registered"}), 404
+
+    busy = diagnostics_busy()
+    if busy is not None:
+        return busy
+
+    seq, frame, frame_time = worker.get_latest(timeout=config.INFERENCE_TIMEOUT)
+    if frame is None:
+        return jsonify({
+            'success': False,
+            'error': worker.last_error or 'No frame available'
+        }), 503
+
+    return jsonify({
+        'success': True,
+        'data': {
+            'imageData': encode_frame_base64(frame),
+            'sequence': seq,
+            'timestamp': frame_time.isoformat()
+        }
+    })
+
+
+@app.route('/api/cameras/<name>/recognize', methods=['POST'])
+def recognize_camera(name):
+    """
+    🔍 Recognize license plate from newest frame of a registered camera
+    """
+    if not loader.is_ready:
+        return service_not_ready()
+
+    if get_cameras().get(name) is None:
+        return jsonify({'success': False, 'error': f"Camera '{name}' not registered"}), 404
+
+    return _recognize_registered_camera(name)
+
+
+@app.route('/api/governor', methods=['GET'])
+def governor_status():
+    """
+    🌡️ Thermal governor state (LP_GOVERNOR)
+
+    Response:
+        {
+            "success": true,
+            "data": {
+                "enabled": true,
+                "level": 1,
+                "reasons": ["temperature 77.2C >= 75C"],
+                "temperatureC": 77.2,
+                "loadPerCpu": 0.84,
+                "recognitionP95Ms": 640.0,
+                "settings": {"previewFps": 5.0, "continuousInterval": 1.0, "detectSize": 512}
+            }
+        }
+    """
+    from thermal_governor import get_governor
+
+    return jsonify({'success': True, 'data': get_governor().get_stats()})
+
+
+@app.route('/api/recording/status', methods=['GET'])
+def recording_status():
+    """
+    🎞️ Frame recorder status (LP_RECORD_PATH)
+
+    Response:
+        {
+            "success": true,
+            "data": {"enabled": true, "framesRecorded": 1200, "framesDropped": 0, ...}
+        }
+    """
+    if not config.RECORD_PATH:
+        return jsonify({'success': True, 'data': {'enabled': False}})
+
+    from frame_recorder import get_frame_recorder
+
+    stats = get_frame_recorder().get_stats()
+    stats['enabled'] = True
+    return jsonify({'success': True, 'data': stats})
+
+
+@app.route('/api/profiles', methods=['GET'])
+def list_profiles():
+    """
+    🔬 List stored request profiles (admin token required)
+
+    Response:
+        {
+            "success": true,
+            "data": [{"id": "20240101-120000-ab12cd", "endpoint": "/api/recognize",
+                      "durationMs": 812.4, "files": ["cprofile.txt", ...]}, ...]
+        }
+    """
+    if not profiling.is_authorized(request.headers, request.args):
+        return jsonify({'success': False, 'error': 'Profiling token required'}), 403
+    return jsonify({'success': True, 'data': profiling.list_profiles()})
+
+
+@app.route('/api/profiles/<profile_id>/<filename>', methods=['GET'])
+def download_profile(profile_id, filename):
+    """
+    🔬 Download one profile file (cprofile.prof, cprofile.txt,
+    torch_trace.json, torch_ops.txt, tracemalloc.txt, meta.json)
+    """
+    if not profiling.is_authorized(request.headers, request.args):
+        return jsonify({'success': False, 'error': 'Profiling token required'}), 403
+    path = profiling.profile_path(profile_id, filename)
+    if path is None:
+        return jsonify({'success': False, 'error': 'Profile file not found'}), 404
+    return send_file(os.path.abspath(path), as_attachment=True, download_name=f'{profile_id}_{filename}')
+
+
 @app.route('/api/camera/test', methods=['GET'])
 def test_camera():
     """
-    Test Pi Camera availability
+    Test availability of the configured camera backend
+    Diagnostic: waits for running recognitions and answers 429 while
+    recognition is over its latency target
     """
-    import platform
+    from camera_backends import describe_backend, test_camera as run_camera_test
+    
+    busy = diagnostics_busy()
+    if busy is not None:
+        return busy
     
+    backend = describe_backend()
     try:
-        from picamera_handler import test_picamera
-        success = test_picamera()
+        with priority.get_priority_gate().track(priority.DIAGNOSTICS):
+            success = run_camera_test()
         return jsonify({
             'success': success,
-            'camera_type': 'Raspberry Pi Camera',
-            'platform': platform.machine()
+            'camera_type': backend['backend'],
+            'source': backend['source'],
+            'platform': backend['platform']
         })
     except Exception as e:
         return jsonify({
             'success': False,
             'error': str(e),
-            'camera_type': 'Raspberry Pi Camera'
+            'camera_type': backend['backend']
         }), 500
 
 
 @app.route('/api/camera/preview/start', methods=['POST'])
 def start_camera_preview():
     """
-    🎬 Start continuous Pi Camera preview session
+    🎬 Start continuous camera preview session
     Camera stays open for fast frame capture (like rpicam-hello -t 0)
+    Uses the Pi Camera on a Raspberry Pi, or LP_CAMERA_BACKEND (e.g. a video
+    replay) anywhere else
     
     Response:
         {
@@ -441,14 +1050,6 @@ def start_camera_preview():
             "message": "Preview session started"
         }
     """
-    is_pi = platform.machine() in ['armv7l', 'aarch64']
-    
-    if not is_pi:
-        return jsonify({
-            'success': False,
-            'error': 'Preview only works on Raspberry Pi'
-        }), 400
-    
     result = preview_session.start_preview()
     
     if result['success']:
@@ -461,17 +1062,29 @@ def start_camera_preview():
 def get_preview_frame():
     """
     📸 Get frame from active preview session (fast, no camera restart)
+    Frames are captured and encoded once and shared by all viewers
+    
+    Query:
+        after: Version the viewer already shows; waits (up to
+            LP_PREVIEW_WAIT seconds) for a newer frame
     
     Response:
         {
             "success": true,
             "data": {
                 "imageData": "data:image/jpeg;base64,...",
+                "version": 42,
                 "timestamp": "2025-12-14T10:30:00"
             }
         }
     """
-    result = preview_session.get_frame()
+    after = request.args.get('after')
+    try:
+        after = int(after) if after is not None else None
+    except ValueError:
+        return jsonify({'success': False, 'error': 'after must be a frame version'}), 400
+    
+    result = preview_session.get_frame(after)
     
     if result['success']:
         return jsonify({
@@ -514,12 +1127,13 @@ def preview_status():
 
 @app.route('/api/test', methods=['GET'])
 def test_endpoint():
-    """Test endpoint with sample image"""
-    if not SERVICE_READY:
-        return jsonify({
-            'success': False,
-            'error': 'Recognition service not ready'
-        }), 503
+    """Test endpoint with sample image (diagnostic, see diagnostics_busy)"""
+    if not loader.is_ready:
+        return service_not_ready()
+    
+    busy = diagnostics_busy()
+    if busy is not None:
+        return busy
     
     try:
         # Test with sample image
@@ -537,7 +1151,8 @@ def test_endpoint():
                 'error': f'Test image not found: {test_image_path}'
             }), 404
         
-        result = recognition_service.recognize_from_image(test_image_path)
+        with priority.get_priority_gate().track(priority.DIAGNOSTICS):
+            result = loader.service.recognize_from_image(test_image_path)
         
         return jsonify({
             'success': result['success'],
@@ -561,6 +1176,15 @@ def not_found(error):
     }), 404
 
 
+@app.errorhandler(413)
+def request_too_large(error):
+    """Handle bodies over MAX_CONTENT_LENGTH"""
+    return jsonify({
+        'success': False,
+        'error': f'File too large (max {config.MAX_UPLOAD_MB}MB)'
+    }), 413
+
+
 @app.errorhandler(500)
 def internal_error(error):
     """Handle 500 errors"""
@@ -593,6 +1217,10 @@ if __name__ == '__main__':
     print(f"📍 Health Check: http://localhost:5001/health")
     print(f"📍 Recognize Endpoint: POST http://localhost:5001/api/recognize")
     print(f"📍 Pi Camera Endpoint: POST http://localhost:5001/api/recognize/picamera")
+    print(f"📍 Camera Recognize: POST http://localhost:5001/api/recognize/camera")
+    print(f"📍 Latest Read: GET http://localhost:5001/api/recognize/latest?camera=<name>&maxAge=2")
+    print(f"📍 Cameras: GET http://localhost:5001/api/cameras")
+    print(f"📍 Events (SSE): GET http://localhost:5001/api/events")
     print(f"📍 Camera Test: GET http://localhost:5001/api/camera/test")
     print(f"📍 Preview Start: POST http://localhost:5001/api/camera/preview/start")
     print(f"📍 Preview Frame: GET http://localhost:5001/api/camera/preview/frame")
@@ -0,0 +1,459 @@
+"""
+Startup auto-tuning
+Benchmarks torch thread counts and detector/OCR input sizes on a set of
+calibration images and keeps the fastest configuration whose plate reads
+stay within LP_AUTOTUNE_TOLERANCE of the full-size reference run
+
+The result is saved to a profile file (LP_AUTOTUNE_PROFILE) tied to the
+device (CPU, core count, torch version, model files), so calibration runs
+once per device and later starts only apply the saved settings
+
+Usage:
+    LP_AUTOTUNE=1 python api_server.py     # calibrate on first start
+    python autotune.py [--force]           # calibrate now and save
+    python autotune.py --show              # print the saved profile
+"""
+import glob
+import json
+import os
+import platform
+import sys
+import time
+from datetime import datetime
+
+import config
+
+PROFILE_VERSION = 1
+
+# Tuned setting -> (config attribute, environment variable that pins it)
+TUNABLE = {
+    'torchThreads': ('TORCH_THREADS', 'LP_TORCH_THREADS'),
+    'detectSize': ('DETECT_SIZE', 'LP_DETECT_SIZE'),
+    'ocrSize': ('OCR_SIZE', 'LP_OCR_SIZE'),
+}
+
+# Models use stride 32: sizes are rounded to a multiple of it
+STRIDE = 32
+
+MODEL_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'License-Plate-Recognition', 'model')
+DEFAULT_IMAGE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..',
+                                 'License-Plate-Recognition', 'test_image')
+
+# 'disabled' | 'pending' | 'calibrating' | 'profile' | 'calibrated' | 'failed'
+_status = {
+    'state': 'pending' if config.AUTOTUNE else 'disabled',
+    'error': None,
+    'profile': None
+}
+
+
+def _cpu_model():
+    try:
+        with open('/proc/cpuinfo') as f:
+            for line in f:
+                # x86: "model name", Raspberry Pi: "Model"
+                key = line.split(':', 1)[0].strip().lower()
+                if key in ('model name', 'model') and ':' in line:
+                    return line.split(':', 1)[1].strip()
+    except OSError:
+        pass
+    return platform.processor() or platform.machine()
+
+
+def device_fingerprint():
+    """
+    Identify the device and models a profile was calibrated for
+
+    Returns:
+        dict: machine, cpu, cpus, torch version and model files
+    """
+    torch = sys.modules.get('torch')
+    models = {}
+    for path in sorted(glob.glob(os.path.join(MODEL_DIR, '*.pt'))):
+        models[os.path.basename(path)] = os.path.getsize(path)
+    return {
+        'machine': platform.machine(),
+        'cpu': _cpu_model(),
+        'cpus': os.cpu_count(),
+        'torch': getattr(torch, '__version__', None),
+        'models': models,
+        'modelVariant': config.MODEL_VARIANT,
+        'modelBackend': config.MODEL_BACKEND
+    }
+
+
+def _pinned(key):
+    """True if the setting was given explicitly in the environment"""
+    return TUNABLE[key][1] in os.environ
+
+
+def _tunes_threads():
+    """
+    Thread count is only tuned when the models run on torch: the fake
+    backend never imports it, and tuning must not either
+    """
+    return config.MODEL_BACKEND != 'fake' and 'torch' in sys.modules
+
+
+def current_settings():
+    """Settings in effect now (torchThreads is None without torch)"""
+    threads = sys.modules['torch'].get_num_threads() if _tunes_threads() else None
+    return {
+        'torchThreads': threads,
+        'detectSize': config.DETECT_SIZE,
+        'ocrSize': config.OCR_SIZE
+    }
+
+
+def apply_settings(settings, force=False):
+    """
+    Apply tuned settings to the running process
+
+    Args:
+        settings (dict): torchThreads / detectSize / ocrSize
+        force (bool): Also override settings pinned by environment variables
+            (used while calibrating)
+    """
+    for key, value in settings.items():
+        if key not in TUNABLE or value is None or (_pinned(key) and not force):
+            continue
+        if key == 'torchThreads':
+            if int(value) <= 0 or not _tunes_threads():
+                continue
+            sys.modules['torch'].set_num_threads(int(value))
+        setattr(config, TUNABLE[key][0], int(value))
+        if key == 'detectSize' and 'LP_INGEST_TARGET_SIZE' not in os.environ:
+            # Uploads only need to be decoded at the size the detector uses
+            config.INGEST_TARGET_SIZE = int(value)
+
+
+# ==========================================
+# Profile file
+# ==========================================
+def load_profile(path=None):
+    """
+    Read the saved profile
+
+    Returns:
+        dict: Profile, or None if missing, unreadable or calibrated for
+        another device, model set or OCR confidence
+    """
+    path = path or config.AUTOTUNE_PROFILE
+    try:
+        with open(path) as f:
+            profile = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if profile.get('version') != PROFILE_VERSION:
+        return None
+    if profile.get('device') != device_fingerprint():
+        print(f"⚠️ Auto-tune profile {path} was calibrated on another device or model set")
+        return None
+    if profile.get('ocrConf') != config.OCR_CONF:
+        print("⚠️ Auto-tune profile was calibrated with another LP_OCR_CONF")
+        return None
+    return profile
+
+
+def save_profile(profile, path=None):
+    path = path or config.AUTOTUNE_PROFILE
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp = path + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(profile, f, indent=2)
+    os.replace(tmp, path)
+
+
+# ==========================================
+# Calibration
+# ==========================================
+def _synthetic_image(seed, width=1280, height=720):
+    """Plate-like white rectangle with dark characters on a noisy background"""
+    import cv2
+    import numpy as np
+    rng = np.random.default_rng(seed)
+    img = rng.integers(40, 120, size=(height, width, 3), dtype=np.uint8)
+    plate_w, plate_h = width // 6, width // 24
+    x = int(rng.integers(width // 4, width - width // 4 - plate_w))
+    y = int(rng.integers(height // 3, height - height // 4 - plate_h))
+    img[y:y + plate_h, x:x + plate_w] = 235
+    cv2.putText(img, '59A1-2345', (x + plate_w // 16, y + plate_h * 3 // 4),
+                cv2.FONT_HERSHEY_SIMPLEX, plate_h / 40.0, (20, 20, 20), 2)
+    return img
+
+
+def calibration_images(limit=None):
+    """
+    Images to calibrate on: LP_AUTOTUNE_IMAGES (or the bundled test images),
+    else frames spread over the LP_RECORD_PATH ring, else synthetic plates
+
+    Returns:
+        tuple: (list of BGR images, source description)
+    """
+    import cv2
+    limit = limit or config.AUTOTUNE_MAX_IMAGES
+    image_dir = config.AUTOTUNE_IMAGES or DEFAULT_IMAGE_DIR
+    paths = []
+    if os.path.isdir(image_dir):
+        for pattern in ('*.jpg', '*.jpeg', '*.png', '*.bmp'):
+            paths.extend(glob.glob(os.path.join(image_dir, pattern)))
+    images = [img for img in (cv2.imread(p) for p in sorted(paths)[:limit]) if img is not None]
+    if images:
+        return images, image_dir
+
+    if config.RECORD_PATH and os.path.exists(config.RECORD_PATH):
+        try:
+            from frame_recorder import RecordingReader
+            reader = RecordingReader(config.RECORD_PATH)
+            try:
+                entries = reader.entries()
+                step = max(1, len(entries) // limit)
+                for _, _, _, index in entries[::step][-limit:]:
+                    item = reader.read(index)
+                    if item is not None:
+                        images.append(item[3].as_format('BGR'))
+            finally:
+                reader.close()
+        except Exception as e:
+            print(f"⚠️ Could not read calibration frames from {config.RECORD_PATH}: {e}")
+        if images:
+            return images, config.RECORD_PATH
+
+    return [_synthetic_image(i) for i in range(limit)], 'synthetic'
+
+
+def _parse_threads(text):
+    cpus = os.cpu_count() or 1
+    if text.strip().lower() == 'auto':
+        values, n = [], 1
+        while n < cpus:
+            values.append(n)
+            n *= 2
+        values.append(cpus)
+    else:
+        values = [int(v) for v in text.split(',') if v.strip()]
+    return sorted({v for v in values if 0 < v <= cpus})
+
+
+def _parse_sizes(text):
+    sizes = {max(STRIDE, int(round(int(v) / STRIDE)) * STRIDE) for v in text.split(',') if v.strip()}
+    return sorted(sizes, reverse=True)
+
+
+class Calibrator:
+    """
+    Times the recognition pipeline of a loaded service under candidate
+    settings and compares its plate reads with a reference run
+    """
+
+    def __init__(self, service, images, repeat=None, max_seconds=None, tolerance=None):
+        self.service = service
+        self.images = images
+        self.repeat = config.AUTOTUNE_REPEAT if repeat is None else repeat
+        self.max_seconds = config.AUTOTUNE_MAX_SECONDS if max_seconds is None else max_seconds
+        self.tolerance = config.AUTOTUNE_TOLERANCE if tolerance is None else tolerance
+        self.results = []
+        self.reference = []
+        self.truncated = False
+        self._start = time.monotonic()
+
+    def out_of_time(self):
+        if time.monotonic() - self._start > self.max_seconds:
+            self.truncated = True
+        return self.truncated
+
+    def run(self, settings):
+        """
+        Recognize every calibration image under settings
+
+        Returns:
+            tuple: (mean milliseconds per image, plate read per image)
+        """
+        apply_settings(settings, force=True)
+        self.service._process_image(self.images[0])  # warm-up for new shapes/threads
+        reads, durations = [], []
+        for img in self.images:
+            result = None
+            for _ in range(max(1, self.repeat)):
+                t0 = time.perf_counter()
+                result = self.service._process_image(img)
+                durations.append((time.perf_counter() - t0) * 1000.0)
+            reads.append(result['licensePlate'] if result.get('success') else None)
+        return sum(durations) / len(durations), reads
+
+    @staticmethod
+    def agreement(reads, reference):
+        if not reference:
+            return 1.0
+        return sum(1 for a, b in zip(reads, reference) if a == b) / float(len(reference))
+
+    def _try(self, settings, reference):
+        mean_ms, reads = self.run(settings)
+        agreement = self.agreement(reads, reference) if reference is not None else 1.0
+        entry = dict(settings, meanMs=round(mean_ms, 1), agreement=round(agreement, 3),
+                     accepted=agreement >= 1.0 - self.tolerance)
+        self.results.append(entry)
+        print(f"   threads={settings['torchThreads']} detect={settings['detectSize']} "
+              f"ocr={settings['ocrSize']}: {mean_ms:.1f} ms, agreement {agreement:.0%}")
+        return entry, reads
+
+    def calibrate(self, threads, detect_sizes, ocr_sizes):
+        """
+        Staged search: thread count at the reference sizes (threads do not
+        change reads), then detector size, then OCR size
+
+        Returns:
+            tuple: (chosen settings, reference entry, chosen entry, reads found)
+        """
+        best = current_settings()
+        reference_entry, reference = self._try(best, None)
+        self.reference = reference
+        chosen_entry = reference_entry
+
+        for n in threads:
+            if n == best['torchThreads'] or self.out_of_time():
+                continue
+            entry, _ = self._try(dict(best, torchThreads=n), None)
+            if entry['meanMs'] < chosen_entry['meanMs']:
+                chosen_entry = entry
+        best['torchThreads'] = chosen_entry['torchThreads']
+
+        # Without any successful reference read the accuracy check is
+        # meaningless, so sizes are only reduced on images with plates
+        reads_found = any(reference)
+        for key, sizes in (('detectSize', detect_sizes), ('ocrSize', ocr_sizes)):
+            if not reads_found:
+                break
+            for size in sizes:
+                if size == best[key] or self.out_of_time():
+                    continue
+                entry, _ = self._try(dict(best, **{key: size}), reference)
+                if entry['accepted'] and entry['meanMs'] < chosen_entry['meanMs']:
+                    chosen_entry = entry
+            best[key] = chosen_entry[key]
+        return best, reference_entry, chosen_entry, reads_found
+
+
+def calibrate(service, save=True):
+    """
+    Calibrate on the loaded service and save the profile
+
+    Returns:
+        dict: Profile
+    """
+    images, source = calibration_images()
+    print(f"🎛️ Auto-tuning on {len(images)} calibration images ({source})...")
+    baseline = current_settings()
+
+    threads = [] if _pinned('torchThreads') or not _tunes_threads() else _parse_threads(config.AUTOTUNE_THREADS)
+    detect_sizes = [] if _pinned('detectSize') else _parse_sizes(config.AUTOTUNE_DETECT_SIZES)
+    ocr_sizes = [] if _pinned('ocrSize') else _parse_sizes(config.AUTOTUNE_OCR_SIZES)
+
+    calibrator = Calibrator(service, images)
+    try:
+        settings, reference, chosen, reads_found = calibrator.calibrate(threads, detect_sizes, ocr_sizes)
+    finally:
+        apply_settings(baseline, force=True)
+
+    if not reads_found:
+        print("⚠️ No plates read in the calibration images - "
+              + ("only thread count was tuned" if threads else "nothing was tuned"))
+    if calibrator.truncated:
+        print(f"⚠️ Auto-tune stopped after LP_AUTOTUNE_MAX_SECONDS={config.AUTOTUNE_MAX_SECONDS:g}")
+
+    profile = {
+        'version': PROFILE_VERSION,
+        'device': device_fingerprint(),
+        'calibratedAt': datetime.now().isoformat(),
+        'settings': settings,
+        'ocrConf': config.OCR_CONF,
+        'tolerance': calibrator.tolerance,
+        'images': {'count': len(images), 'source': source,
+                   'platesRead': sum(1 for read in calibrator.reference if read)},
+        'referenceMs': reference['meanMs'],
+        'tunedMs': chosen['meanMs'],
+        'agreement': chosen['agreement'],
+        'sizesTuned': reads_found,
+        'truncated': calibrator.truncated,
+        'candidates': calibrator.results
+    }
+    if save:
+        save_profile(profile)
+        print(f"💾 Auto-tune profile saved to {config.AUTOTUNE_PROFILE}")
+    return profile
+
+
+def tune(service):
+    """
+    Apply the saved profile, calibrating first if there is none for this
+    device (called by the service loader when LP_AUTOTUNE is on)
+    """
+    if not hasattr(service, '_process_image'):
+        return
+    try:
+        profile = load_profile()
+        if profile is None:
+            _status['state'] = 'calibrating'
+            profile = calibrate(service)
+            state = 'calibrated'
+        else:
+            state = 'profile'
+        apply_settings(profile['settings'])
+        _status.update(state=state, profile=profile, error=None)
+        print(f"🎛️ Tuned settings ({state}): {current_settings()}")
+    except Exception as e:
+        _status.update(state='failed', error=str(e))
+        print(f"⚠️ Auto-tune failed, keeping defaults: {e}")
+
+
+def get_status():
+    """Auto-tuning state and the settings in effect (for /health)"""
+    status = {
+        'enabled': config.AUTOTUNE,
+        'state': _status['state'],
+        'settings': dict(current_settings(), ocrConf=config.OCR_CONF),
+        'pinned': [key for key in TUNABLE if _pinned(key)]
+    }
+    profile = _status['profile']
+    if profile is not None:
+        status.update({
+            'profile': config.AUTOTUNE_PROFILE,
+            'calibratedAt': profile.get('calibratedAt'),
+            'referenceMs': profile.get('referenceMs'),
+            'tunedMs': profile.get('tunedMs'),
+            'agreement': profile.get('agreement')
+        })
+    if _status['error']:
+        status['error'] = _status['error']
+    return status
+
+
+def main():
+    import argparse
+    ap = argparse.ArgumentParser(description='Calibrate torch threads and inference sizes')
+    ap.add_argument('--force', action='store_true', help='Recalibrate even if a valid profile exists')
+    ap.add_argument('--show', action='store_true', help='Print the saved profile and exit')
+    args = ap.parse_args()
+
+    if args.show:
+        if not os.path.exists(config.AUTOTUNE_PROFILE):
+            print(f"No profile at {config.AUTOTUNE_PROFILE}")
+            return
+        with open(config.AUTOTUNE_PROFILE) as f:
+            print(f.read())
+        return
+
+    from lp_recognition_service import get_recognition_service
+    service = get_recognition_service()
+    profile = None if args.force else load_profile()
+    if profile is not None:
+        print(f"✅ Valid profile already saved (use --force to recalibrate): {profile['settings']}")
+        return
+    profile = calibrate(service)
+    print(f"✅ {profile['settings']} - {profile['referenceMs']} ms -> {profile['tunedMs']} ms per image")
+
+
+if __name__ == '__main__':
+    main()
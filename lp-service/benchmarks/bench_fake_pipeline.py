@@ -0,0 +1,231 @@
+"""
+Benchmark: pipeline overhead around the models, without weights
+
+Runs the recognition pipeline with the fake model backend
+(LP_MODEL_BACKEND=fake, fake_models.py), so it works on any machine without
+the .pt weights, torch.hub or torch. Every request is timed and the
+simulated model time is subtracted; what is left is the cost of everything
+around the models (decode, conversions, crops, read_plate, JSON, base64,
+Flask). The layers are measured separately:
+
+    process         service._process_image on a decoded BGR frame
+    bytes           service.recognize_from_bytes (upload decode + process)
+    http-raw        POST /api/recognize raw body, ?compact=1 (Flask test client)
+    http-multipart  POST /api/recognize multipart, full response with image echo
+    http-base64     POST /api/recognize base64 JSON, full response
+
+The result cache is disabled so every request runs the pipeline. With
+--max-overhead-ms the script exits 1 if any layer's p50 overhead is above
+the limit (for CI). It also exits 1 if torch was imported: the fake backend
+must start without it, or its import time and memory would skew startup and
+RSS measurements. The same holds for a start with LP_AUTOTUNE=1, which a
+fresh subprocess checks (auto-tuning must also not fail there). LP_FAKE_*
+variables set the simulated latencies
+
+Usage:
+    python benchmarks/bench_fake_pipeline.py [--images DIR] [--repeat 20]
+        [--layers process,bytes,http-raw] [--concurrency 1] [--max-overhead-ms 50]
+"""
+import argparse
+import base64
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+# Must be set before config is imported
+os.environ['LP_MODEL_BACKEND'] = 'fake'
+os.environ.setdefault('LP_RESULT_CACHE_SIZE', '0')
+
+import cv2
+
+from bench_utils import load_images, print_table, summarize
+from load_test import multipart_body
+
+LAYERS = ('process', 'bytes', 'http-raw', 'http-multipart', 'http-base64')
+
+
+def simulated_ms(service):
+    """Total simulated model time so far"""
+    return service.yolo_LP_detect.simulated_ms + service.yolo_license_plate.simulated_ms
+
+
+def make_call(layer, service, client, name, img, data):
+    """
+    One request of a layer
+
+    Returns:
+        callable: Runs the request, returns True on a plate read
+    """
+    if layer == 'process':
+        return lambda: service._process_image(img)['success']
+    if layer == 'bytes':
+        return lambda: service.recognize_from_bytes(data)['success']
+    if layer == 'http-raw':
+        return lambda: client.post('/api/recognize?compact=1', data=data,
+                                   content_type='application/octet-stream').status_code == 200
+    if layer == 'http-multipart':
+        body, content_type = multipart_body(name, data, 'image/jpeg')
+        return lambda: client.post('/api/recognize', data=body, content_type=content_type).status_code == 200
+    payload = json.dumps({'image': 'data:image/jpeg;base64,' + base64.b64encode(data).decode('ascii')})
+    return lambda: client.post('/api/recognize', data=payload,
+                               content_type='application/json').status_code == 200
+
+
+def run_layer(layer, service, client, corpus, repeat):
+    """
+    Sequential requests; model time is known exactly per request
+
+    Returns:
+        tuple: (wall ms list, overhead ms list, reads)
+    """
+    calls = [make_call(layer, service, client, name, img, data) for name, img, data in corpus]
+    calls[0]()
+    wall, overhead, reads = [], [], 0
+    for i in range(repeat * len(calls)):
+        before = simulated_ms(service)
+        start = time.perf_counter()
+        reads += bool(calls[i % len(calls)]())
+        elapsed = (time.perf_counter() - start) * 1000.0
+        wall.append(elapsed)
+        overhead.append(elapsed - (simulated_ms(service) - before))
+    return wall, overhead, reads
+
+
+def run_concurrent(layer, service, client, corpus, repeat, concurrency):
+    """
+    Requests from several threads
+
+    Returns:
+        tuple: (requests per second, wall ms list)
+    """
+    calls = [make_call(layer, service, client, name, img, data) for name, img, data in corpus]
+    total = repeat * len(calls)
+    counter = iter(range(total))
+    lock = threading.Lock()
+    wall = []
+
+    def worker():
+        while True:
+            with lock:
+                i = next(counter, None)
+            if i is None:
+                return
+            start = time.perf_counter()
+            calls[i % len(calls)]()
+            with lock:
+                wall.append((time.perf_counter() - start) * 1000.0)
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return total / (time.perf_counter() - start), wall
+
+
+def autotune_child():
+    """Start the service with LP_AUTOTUNE=1 in this (fresh) process and report"""
+    import api_server
+    import autotune
+
+    api_server.loader.wait(120)
+    status = autotune.get_status()
+    print(json.dumps({'state': status['state'], 'error': status.get('error'),
+                      'torch': 'torch' in sys.modules}))
+
+
+def autotune_startup():
+    """
+    Service start with LP_AUTOTUNE=1 in a subprocess, calibrating into a
+    temporary profile
+
+    Returns:
+        dict: {'state', 'error', 'torch'}
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, LP_AUTOTUNE='1', LP_AUTOTUNE_PROFILE=os.path.join(tmp, 'profile.json'),
+                   LP_AUTOTUNE_MAX_IMAGES='2', LP_AUTOTUNE_REPEAT='1')
+        proc = subprocess.run([sys.executable, __file__, '--autotune-child'],
+                              capture_output=True, text=True, env=env)
+    if proc.returncode != 0:
+        return {'state': 'crashed', 'error': proc.stderr[-1000:], 'torch': None}
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main():
+    ap = argparse.ArgumentParser(description='Pipeline overhead with the fake model backend')
+    ap.add_argument('--images', help='Image folder (default: License-Plate-Recognition test images)')
+    ap.add_argument('--limit', type=int, default=8, help='Maximum images')
+    ap.add_argument('--repeat', type=int, default=10, help='Passes over the images per layer')
+    ap.add_argument('--layers', default=','.join(LAYERS))
+    ap.add_argument('--concurrency', type=int, default=1, help='Threads for an extra throughput run (>1)')
+    ap.add_argument('--max-overhead-ms', type=float, default=0.0,
+                    help='Exit 1 if a layer p50 overhead is above this (0 = report only)')
+    ap.add_argument('--autotune-child', action='store_true', help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.autotune_child:
+        autotune_child()
+        return
+
+    import api_server
+    from lp_recognition_service import get_recognition_service
+
+    service = get_recognition_service()
+    api_server.loader.wait(60)
+    api_server.loader.service = service
+    api_server.loader.state = 'ready'
+    client = api_server.app.test_client()
+
+    corpus = []
+    for name, img in load_images(args.images, limit=args.limit):
+        corpus.append((name, img, cv2.imencode('.jpg', img)[1].tobytes()))
+
+    layers = [layer for layer in args.layers.split(',') if layer]
+    rows, failed = [], []
+    for layer in layers:
+        print(f"⏱️ {layer}...")
+        wall, overhead, reads = run_layer(layer, service, client, corpus, args.repeat)
+        wall_stats, overhead_stats = summarize(wall), summarize(overhead)
+        rows.append([layer, len(wall), f'{reads / len(wall):.0%}', wall_stats['p50'], wall_stats['p95'],
+                     overhead_stats['p50'], overhead_stats['p95'], overhead_stats['max']])
+        if args.max_overhead_ms and overhead_stats['p50'] > args.max_overhead_ms:
+            failed.append(layer)
+
+    print(f"\n{len(corpus)} images, fake detector {service.yolo_LP_detect.latency_ms:g} ms + "
+          f"OCR {service.yolo_license_plate.latency_ms:g} ms per call (at size 640)\n")
+    print_table(['layer', 'requests', 'reads', 'wall p50 ms', 'wall p95 ms',
+                 'overhead p50 ms', 'overhead p95 ms', 'overhead max ms'], rows)
+
+    if args.concurrency > 1:
+        rows = []
+        for layer in layers:
+            rate, wall = run_concurrent(layer, service, client, corpus, args.repeat, args.concurrency)
+            stats = summarize(wall)
+            rows.append([layer, args.concurrency, rate, stats['p50'], stats['p95']])
+        print()
+        print_table(['layer', 'threads', 'requests/s', 'wall p50 ms', 'wall p95 ms'], rows)
+
+    torch_loaded = 'torch' in sys.modules
+    if torch_loaded:
+        print("\n❌ torch was imported with the fake model backend")
+    tuned = autotune_startup()
+    if tuned['torch']:
+        print("\n❌ torch was imported with the fake model backend and LP_AUTOTUNE=1")
+        torch_loaded = True
+    tune_failed = tuned['state'] not in ('calibrated', 'profile')
+    if tune_failed:
+        print(f"\n❌ Auto-tune with the fake model backend ended '{tuned['state']}': {tuned['error']}")
+    if failed:
+        print(f"\n❌ Overhead p50 above {args.max_overhead_ms:g} ms: {', '.join(failed)}")
+    if failed or torch_loaded or tune_failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
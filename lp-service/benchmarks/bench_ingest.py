@@ -0,0 +1,169 @@
+"""
+Benchmark: upload ingestion (full vs reduced-resolution decode)
+
+For large JPEGs, compares decode time and peak memory of a full decode
+(previous behaviour) with image_ingest's reduced decode, alone and with
+the higher-resolution re-decode used for small plate crops. Peak memory is
+the growth of the RSS high-water mark, measured in a fresh subprocess per
+case
+
+With --models, also runs both paths end-to-end through the recognition
+service and checks they read the same plates
+
+Usage:
+    python benchmarks/bench_ingest.py [--sizes 1920x1080,4000x3000,6000x4000] [--images DIR] [--models]
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+
+import cv2
+import numpy as np
+
+from bench_utils import load_images, print_table, summarize, synthetic_plate_image, time_call
+
+import image_ingest
+
+
+def reset_peak_rss():
+    """Reset the kernel's RSS high-water mark (Linux), falls back to ru_maxrss"""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        pass
+
+
+def peak_rss_mb():
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024.0
+    except OSError:
+        pass
+    # ru_maxrss is in KB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+def current_rss_mb():
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1]) / 1024.0
+    return peak_rss_mb()
+
+
+def child(mode, path):
+    """Decode once in this (fresh) process and report peak RSS growth"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    # Warm up codec libraries on a tiny image so their setup is not counted
+    cv2.imdecode(cv2.imencode('.jpg', np.zeros((16, 16, 3), np.uint8))[1], cv2.IMREAD_COLOR)
+    reset_peak_rss()
+    before = current_rss_mb()
+    if mode == 'full':
+        decode_full(data)
+    elif mode == 'reduced':
+        decode_reduced(data, refine=False)
+    else:
+        decode_reduced(data, refine=True)
+    print(json.dumps({'peakMb': peak_rss_mb() - before}))
+
+
+def peak_memory(mode, path):
+    proc = subprocess.run([sys.executable, __file__, '--child', mode, path],
+                          capture_output=True, text=True)
+    if proc.returncode != 0:
+        print(proc.stderr[-1000:])
+        return float('nan')
+    return json.loads(proc.stdout.strip().splitlines()[-1])['peakMb']
+
+
+def decode_full(data):
+    return cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+
+
+def decode_reduced(data, refine=False):
+    upload = image_ingest.decode_upload(data)
+    if refine:
+        # A plate too narrow for OCR in the working image forces one
+        # higher resolution re-decode (worst case)
+        h, w = upload.image.shape[:2]
+        upload.crop(w // 3, h // 2, 40, 12)
+    upload.release()
+    return upload
+
+
+def compare_models(samples):
+    from lp_recognition_service import get_recognition_service
+    service = get_recognition_service()
+    rows = []
+    for name, data in samples:
+        legacy_time = time_call(lambda: service._process_image(decode_full(data)), repeat=3, warmup=1)
+        legacy = service._process_image(decode_full(data))
+        new_time = time_call(lambda: service.recognize_from_bytes(data), repeat=3, warmup=1)
+        new = service.recognize_from_bytes(data)
+        rows.append([name, legacy.get('licensePlate') or '-', new.get('licensePlate') or '-',
+                     summarize(legacy_time)['mean'], summarize(new_time)['mean'],
+                     new.get('decode', {}).get('reduction')])
+    print()
+    print_table(['image', 'full decode plate', 'reduced plate', 'full ms', 'reduced ms', 'reduction'], rows)
+
+
+def main():
+    ap = argparse.ArgumentParser(description='Upload ingestion benchmark')
+    ap.add_argument('--sizes', default='1920x1080,4000x3000,6000x4000',
+                    help='Synthetic JPEG sizes (WxH, comma separated)')
+    ap.add_argument('--images', default=None, help='Use JPEG files from this folder instead')
+    ap.add_argument('--quality', type=int, default=92)
+    ap.add_argument('--repeat', type=int, default=10)
+    ap.add_argument('--models', action='store_true', help='Also run recognition end-to-end')
+    ap.add_argument('--child', nargs=2, metavar=('MODE', 'PATH'), help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.child:
+        child(*args.child)
+        return
+
+    samples = []
+    if args.images:
+        for name, img in load_images(args.images, synthetic_count=0):
+            samples.append((name, cv2.imencode('.jpg', img, [cv2.IMWRITE_JPEG_QUALITY, args.quality])[1].tobytes()))
+    else:
+        for i, size in enumerate(args.sizes.split(',')):
+            w, h = (int(v) for v in size.lower().split('x'))
+            img = synthetic_plate_image(w, h, seed=i)
+            samples.append((size, cv2.imencode('.jpg', img, [cv2.IMWRITE_JPEG_QUALITY, args.quality])[1].tobytes()))
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, data in samples:
+            path = os.path.join(tmp, 'image.jpg')
+            with open(path, 'wb') as f:
+                f.write(data)
+            full = summarize(time_call(lambda: decode_full(data), args.repeat, warmup=1))
+            reduced = summarize(time_call(lambda: decode_reduced(data), args.repeat, warmup=1))
+            refined = summarize(time_call(lambda: decode_reduced(data, refine=True), args.repeat, warmup=1))
+            upload = image_ingest.decode_upload(data)
+            rows.append([
+                name, len(data) / 1e6, upload.reduction,
+                full['mean'], reduced['mean'], refined['mean'],
+                peak_memory('full', path), peak_memory('reduced', path), peak_memory('refined', path)
+            ])
+
+    print_table(['image', 'MB', 'reduction', 'full ms', 'reduced ms', 'reduced+crop ms',
+                 'full peak MB', 'reduced peak MB', 'reduced+crop peak MB'], rows)
+    print("\nreduced+crop adds the higher resolution re-decode made when a detected "
+          "plate is narrower than LP_INGEST_MIN_PLATE_WIDTH (worst case)")
+
+    if args.models:
+        compare_models(samples)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+"""
+Benchmark: bytes moved and latency of the /api/recognize input modes
+
+Sends the same images to a running lp-service as multipart upload, base64
+JSON and raw octet-stream body, each with the full response (image echoed
+back as base64) and the compact one (?compact=1), and reports request and
+response bytes and client-side latency per combination
+
+By default every image is sent once first, so measured requests are answered
+from the result cache and latency is transport and parsing only. With
+--unique each request carries distinct bytes (padding after the JPEG end
+marker, ignored by decoders) and goes through inference
+
+Start the server first (python api_server.py), then e.g.:
+    python benchmarks/bench_input_modes.py --repeat 20
+    python benchmarks/bench_input_modes.py --unique --images /data/plates
+
+Usage:
+    python benchmarks/bench_input_modes.py [--url http://localhost:5001] [--images DIR]
+        [--repeat 10] [--unique] [--size WxH] [--quality 90]
+"""
+import argparse
+import base64
+import json
+import time
+import urllib.error
+import urllib.request
+import uuid
+
+from bench_utils import print_table, summarize
+from load_test import load_corpus, multipart_body
+
+INPUT_MODES = ('multipart', 'base64', 'raw')
+
+
+def build_body(mode, name, data, mime):
+    """
+    Returns:
+        tuple: (body bytes, Content-Type)
+    """
+    if mode == 'multipart':
+        return multipart_body(name, data, mime)
+    if mode == 'base64':
+        payload = {'image': f'data:{mime};base64,' + base64.b64encode(data).decode('ascii')}
+        return json.dumps(payload).encode(), 'application/json'
+    return data, 'application/octet-stream'
+
+
+def post(url, body, content_type, timeout):
+    """
+    Returns:
+        tuple: (HTTP status, response bytes incl. headers, milliseconds)
+    """
+    req = urllib.request.Request(url, data=body, headers={'Content-Type': content_type}, method='POST')
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as resp:
+            payload = resp.read()
+            status, headers = resp.status, resp.headers
+    except urllib.error.HTTPError as e:
+        payload = e.read()
+        status, headers = e.code, e.headers
+    elapsed = (time.perf_counter() - start) * 1000.0
+    return status, len(payload) + len(str(headers)), elapsed
+
+
+def unique(data):
+    """Distinct bytes for the same image (trailing padding is ignored by decoders)"""
+    return data + uuid.uuid4().bytes
+
+
+def main():
+    ap = argparse.ArgumentParser(description='/api/recognize input mode benchmark')
+    ap.add_argument('--url', default='http://localhost:5001', help='lp-service base URL')
+    ap.add_argument('--images', default=None, help='Upload images from this folder (default: synthetic)')
+    ap.add_argument('--size', default='1280x720', help='Synthetic image size (WxH)')
+    ap.add_argument('--quality', type=int, default=90, help='Synthetic JPEG quality')
+    ap.add_argument('--repeat', type=int, default=10, help='Requests per image and combination')
+    ap.add_argument('--unique', action='store_true', help='Bypass the result cache (full inference)')
+    ap.add_argument('--timeout', type=float, default=60.0)
+    args = ap.parse_args()
+
+    size = tuple(int(v) for v in args.size.lower().split('x'))
+    corpus = load_corpus(args.images, size, args.quality)
+    image_bytes = sum(len(data) for _, data, _ in corpus) / len(corpus)
+    if not args.unique:
+        for name, data, mime in corpus:
+            body, content_type = build_body('raw', name, data, mime)
+            post(args.url + '/api/recognize', body, content_type, args.timeout)
+
+    rows = []
+    for mode in INPUT_MODES:
+        for compact in (False, True):
+            url = args.url + '/api/recognize' + ('?compact=1' if compact else '')
+            durations, sent, received, failed = [], 0, 0, 0
+            for _ in range(args.repeat):
+                for name, data, mime in corpus:
+                    body, content_type = build_body(mode, name, unique(data) if args.unique else data, mime)
+                    status, response_bytes, ms = post(url, body, content_type, args.timeout)
+                    durations.append(ms)
+                    sent += len(body)
+                    received += response_bytes
+                    failed += status >= 400 and status != 422
+            count = len(durations)
+            stats = summarize(durations)
+            rows.append([mode, 'compact' if compact else 'full', count, sent / count / 1024.0,
+                         received / count / 1024.0, (sent + received) / count / image_bytes,
+                         stats['p50'], stats['p95'], failed])
+
+    print(f"\n{len(corpus)} images, {image_bytes / 1024.0:.1f} KB on average, "
+          f"{'inference on every request' if args.unique else 'answered from the result cache'}\n")
+    print_table(['input', 'response', 'requests', 'sent KB', 'received KB', 'x image size',
+                 'p50 ms', 'p95 ms', 'errors'], rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""
+Benchmark: YOLOv5 AutoShape vs the lean inference path
+
+Reports per-call latency of the detector and the OCR model through both
+paths, the raw model forward time (so the overhead each path adds on top of
+the network itself is visible) and whether both paths agree on the result
+
+Usage:
+    python benchmarks/bench_lean_inference.py [--images DIR] [--repeat 20]
+"""
+import argparse
+
+import numpy as np
+import torch
+
+from bench_utils import load_images, load_models, print_table, summarize, time_call
+from lean_inference import LeanDetector
+
+from function import helper
+
+
+def raw_forward_ms(lean, img, size, repeat):
+    """Time only the network forward on an already prepared input tensor"""
+    with lean._lock, torch.inference_mode():
+        _, tensor = lean._prepare(img, size)
+        return time_call(lambda: lean.model(tensor), repeat=repeat)
+
+
+def boxes_agree(rows_a, rows_b, tol=2.0):
+    """Same number of boxes, same classes and corners within tol pixels"""
+    if len(rows_a) != len(rows_b):
+        return False
+    key = lambda r: (r[0], r[1])
+    for a, b in zip(sorted(rows_a, key=key), sorted(rows_b, key=key)):
+        if a[5] != b[5] or np.max(np.abs(np.array(a[:4]) - np.array(b[:4]))) > tol:
+            return False
+    return True
+
+
+def main():
+    ap = argparse.ArgumentParser(description='AutoShape vs lean inference benchmark')
+    ap.add_argument('--images', default=None, help='Folder with test images')
+    ap.add_argument('--repeat', type=int, default=20)
+    ap.add_argument('--size', type=int, default=640)
+    args = ap.parse_args()
+
+    detector, ocr = load_models()
+    lean_detector = LeanDetector(detector, size=args.size)
+    lean_ocr = LeanDetector(ocr)
+    images = load_images(args.images)
+
+    rows = []
+    agree = 0
+    for name, img in images:
+        auto_ms = summarize(time_call(lambda: detector(img, size=args.size), args.repeat))
+        lean_ms = summarize(time_call(lambda: lean_detector(img, size=args.size), args.repeat))
+        raw_ms = summarize(raw_forward_ms(lean_detector, img, args.size, args.repeat))
+
+        auto_rows = helper.detection_rows(detector(img, size=args.size))
+        lean_rows = lean_detector(img, size=args.size).tolist()
+        same = boxes_agree(auto_rows, lean_rows)
+        agree += same
+
+        # OCR on the first detected plate (or the whole image)
+        crop = img
+        if auto_rows:
+            x1, y1, x2, y2 = [int(v) for v in auto_rows[0][:4]]
+            crop = img[y1:y2, x1:x2]
+        ocr_auto = summarize(time_call(lambda: helper.read_plate(ocr, crop), args.repeat))
+        ocr_lean = summarize(time_call(lambda: helper.read_plate(lean_ocr, crop), args.repeat))
+
+        rows.append([
+            name, auto_ms['p50'], lean_ms['p50'], raw_ms['p50'],
+            auto_ms['p50'] - raw_ms['p50'], lean_ms['p50'] - raw_ms['p50'],
+            ocr_auto['p50'], ocr_lean['p50'], 'yes' if same else 'NO'
+        ])
+
+    print()
+    print_table(
+        ['image', 'det auto', 'det lean', 'forward', 'auto ovh', 'lean ovh',
+         'ocr auto', 'ocr lean', 'agree'],
+        rows
+    )
+    mean = lambda i: sum(r[i] for r in rows) / len(rows)
+    print(f"\nMean p50 (ms): AutoShape {mean(1):.2f}, lean {mean(2):.2f}, "
+          f"overhead saved per detector call {mean(4) - mean(5):.2f}")
+    print(f"Box agreement: {agree}/{len(rows)} images")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,218 @@
+"""
+Benchmark: perspective rectification vs deskew retries in function/utils_rotate
+
+The scripts used to read every plate crop up to four times (deskew with and
+without contrast change / center threshold) until the OCR returned a
+number. rectify_plate finds the plate outline inside the detector box and
+warps it to a fronto-parallel plate in one warpPerspective, so OCR runs
+once; crops without an outline fall back to the deskew.
+
+Synthetic plates under a random perspective (known corners) measure how
+often the outline is found, how far its corners are from the true ones and
+what finding + warping costs next to the deskew. With --models the real
+detector/OCR weights also read every crop four ways:
+
+    scripts: deskew retries   lp_image.py/webcam.py before (up to 4 passes)
+    scripts: rectified        lp_image.py/webcam.py now (1 pass with an outline)
+    service: raw crop         lp-service default, one pass on the crop
+    service: LP_RECTIFY       lp-service with LP_RECTIFY=1, one pass on
+                              rectify_plate output
+
+and reports OCR passes per plate, read rate and exact text. OCR passes are
+saved only in the scripts; the service reads once either way, so for it the
+comparison is the accuracy effect of rectifying
+
+Usage:
+    python benchmarks/bench_rectify.py [--count 40] [--max-width 320]
+        [--models] [--images DIR]
+"""
+import argparse
+import sys
+
+import cv2
+import numpy as np
+
+from bench_utils import draw_plate, load_images, print_table, summarize, time_call
+
+from function import utils_rotate
+
+# Plate sizes drawn (one-line and two-line proportions) and the width of
+# the border draw_plate paints; the outline found is the inside of it
+PLATE_SIZES = ((260, 55), (200, 100))
+BORDER = 3
+
+
+# ==========================================
+# Crops
+# ==========================================
+def plate_text(rng):
+    letters = 'ABCDEFGHKLMNPSTUVXYZ'
+    return (f'{rng.integers(10, 99)}{letters[rng.integers(len(letters))]}{rng.integers(1, 9)}'
+            f'-{rng.integers(1000, 9999)}')
+
+
+def synthetic_crops(count, jitter=0.12, seed=1):
+    """
+    Plates under a random perspective on a noisy background, cropped to
+    their bounding box plus a margin like a detector box
+
+    Returns:
+        list: (name, crop, true corners in crop coordinates, text)
+    """
+    rng = np.random.default_rng(seed)
+    crops = []
+    for i in range(count):
+        plate_w, plate_h = PLATE_SIZES[i % len(PLATE_SIZES)]
+        text = plate_text(rng)
+        plate = draw_plate(plate_w, plate_h, text)
+        src = np.float32([[0, 0], [plate_w - 1, 0], [plate_w - 1, plate_h - 1], [0, plate_h - 1]])
+        dst = (src + rng.uniform(-jitter, jitter, (4, 2)) * [plate_w, plate_h] + [60, 40]).astype(np.float32)
+        matrix = cv2.getPerspectiveTransform(src, dst)
+        scene = rng.integers(40, 120, (plate_h + 120, plate_w + 160, 3), dtype=np.uint8)
+        size = (scene.shape[1], scene.shape[0])
+        warped = cv2.warpPerspective(plate, matrix, size)
+        mask = cv2.warpPerspective(np.full((plate_h, plate_w), 255, np.uint8), matrix, size)
+        scene[mask > 0] = warped[mask > 0]
+
+        x, y, w, h = cv2.boundingRect(dst)
+        pad = 6
+        crop = scene[y - pad:y + h + pad, x - pad:x + w + pad]
+        inner = np.float32([[BORDER, BORDER], [plate_w - 1 - BORDER, BORDER],
+                            [plate_w - 1 - BORDER, plate_h - 1 - BORDER], [BORDER, plate_h - 1 - BORDER]])
+        corners = cv2.perspectiveTransform(inner.reshape(-1, 1, 2), matrix).reshape(4, 2) - [x - pad, y - pad]
+        crops.append((f'synthetic_{i}', crop, corners, text))
+    return crops
+
+
+def image_crops(image_dir, detector):
+    """Detector boxes of folder images, no known corners or text"""
+    crops = []
+    for name, img in load_images(image_dir, synthetic_count=0):
+        for i, plate in enumerate(detector(img, size=640).pandas().xyxy[0].values.tolist()):
+            x1, y1, x2, y2 = (int(v) for v in plate[:4])
+            crop = img[max(0, y1):y2, max(0, x1):x2]
+            if crop.size:
+                crops.append((f'{name}#{i}', crop, None, None))
+    return crops
+
+
+# ==========================================
+# Legacy read loop vs single pass
+# ==========================================
+def read_legacy(helper, reader, crop):
+    """Deskew variants until one reads (the scripts' original loop)"""
+    passes = 0
+    for cc in range(0, 2):
+        for ct in range(0, 2):
+            passes += 1
+            lp = helper.read_plate(reader, utils_rotate.deskew(crop, cc, ct))
+            if lp != "unknown":
+                return lp, passes
+    return "unknown", passes
+
+
+def read_rectified(helper, reader, crop, max_width):
+    """One pass on the warped outline; deskew variants without an outline"""
+    quad = utils_rotate.find_plate_quad(crop, max_width)
+    if quad is not None:
+        return helper.read_plate(reader, utils_rotate.warp_plate(crop, quad)), 1
+    return read_legacy(helper, reader, crop)
+
+
+def read_service(helper, reader, crop, max_width, rectify):
+    """The service's single pass, on the crop or on rectify_plate output"""
+    if rectify:
+        crop, _ = utils_rotate.rectify_plate(crop, max_width=max_width)
+    return helper.read_plate(reader, crop), 1
+
+
+def compare_reads(crops, max_width):
+    from bench_utils import load_models
+    from function import helper
+
+    detector, reader = load_models()
+    if not crops:
+        print("\n⚠️  No plate crops to read")
+        return detector
+    modes = {
+        'scripts: deskew retries': lambda crop: read_legacy(helper, reader, crop),
+        'scripts: rectified': lambda crop: read_rectified(helper, reader, crop, max_width),
+        'service: raw crop': lambda crop: read_service(helper, reader, crop, max_width, False),
+        'service: LP_RECTIFY': lambda crop: read_service(helper, reader, crop, max_width, True),
+    }
+    totals = {mode: [0, 0, 0] for mode in modes}
+    plates = {mode: [] for mode in modes}
+    known = sum(text is not None for _, _, _, text in crops)
+    for name, crop, _, text in crops:
+        for mode, read in modes.items():
+            lp, passes = read(crop)
+            totals[mode][0] += passes
+            totals[mode][1] += lp != "unknown"
+            totals[mode][2] += text is not None and lp == text
+            plates[mode].append(lp)
+    rows = [[mode, passes / len(crops), f'{reads}/{len(crops)}', f'{exact}/{known}' if known else '-']
+            for mode, (passes, reads, exact) in totals.items()]
+    print()
+    print_table(['read path', 'OCR passes/plate', 'read', 'exact text'], rows)
+
+    def agreement(a, b):
+        return sum(x == y for x, y in zip(plates[a], plates[b]))
+
+    legacy, rectified = totals['scripts: deskew retries'][0], totals['scripts: rectified'][0]
+    print(f"\nScripts: {legacy - rectified} of {legacy} OCR passes saved "
+          f"({(legacy - rectified) / max(legacy, 1):.0%}), same result on "
+          f"{agreement('scripts: deskew retries', 'scripts: rectified')}/{len(crops)} plates")
+    raw_reads, rect_reads = totals['service: raw crop'][1], totals['service: LP_RECTIFY'][1]
+    print(f"Service: one OCR pass either way, {rect_reads - raw_reads:+d} plates read with LP_RECTIFY, "
+          f"same result on {agreement('service: raw crop', 'service: LP_RECTIFY')}/{len(crops)} plates")
+    return detector
+
+
+def main():
+    ap = argparse.ArgumentParser(description='Perspective rectification vs deskew benchmark')
+    ap.add_argument('--count', type=int, default=40, help='Synthetic plates')
+    ap.add_argument('--jitter', type=float, default=0.12,
+                    help='Corner displacement as a fraction of the plate size')
+    ap.add_argument('--max-width', type=int, default=320, help='Outline search width (LP_RECTIFY_MAX_WIDTH)')
+    ap.add_argument('--tolerance', type=float, default=2.0, help='Corner error counted as accurate (px)')
+    ap.add_argument('--repeat', type=int, default=20)
+    ap.add_argument('--models', action='store_true', help='Also read the crops with the detector/OCR weights')
+    ap.add_argument('--images', default=None, help='With --models: folder whose detector boxes are read too')
+    args = ap.parse_args()
+
+    crops = synthetic_crops(args.count, args.jitter)
+    found, errors = 0, []
+    rectify_ms, deskew_ms, legacy_ms = [], [], []
+    for name, crop, corners, _ in crops:
+        quad = utils_rotate.find_plate_quad(crop, args.max_width)
+        if quad is not None:
+            found += 1
+            errors.append(float(np.linalg.norm(quad - corners, axis=1).max()))
+        rectify_ms.extend(time_call(lambda: utils_rotate.rectify_plate(crop, max_width=args.max_width),
+                                    repeat=args.repeat, warmup=1))
+        deskew_ms.extend(time_call(lambda: utils_rotate.deskew(crop, 0, 0), repeat=args.repeat, warmup=1))
+        legacy_ms.extend(time_call(lambda: [utils_rotate.deskew(crop, cc, ct) for cc in (0, 1) for ct in (0, 1)],
+                                   repeat=args.repeat, warmup=1))
+
+    error_stats = summarize(errors)
+    accurate = sum(error <= args.tolerance for error in errors)
+    print(f"Plate outline found on {found}/{len(crops)} crops, corner error mean "
+          f"{error_stats['mean']:.2f} px, max {error_stats['max']:.2f} px, "
+          f"{accurate}/{len(crops)} within {args.tolerance:g} px\n")
+    rows = []
+    for label, durations in (('rectify_plate (outline + warp)', rectify_ms),
+                             ('deskew, 1 variant', deskew_ms),
+                             ('deskew, all 4 variants', legacy_ms)):
+        stats = summarize(durations)
+        rows.append([label, stats['mean'], stats['p95']])
+    print_table(['preprocessing per crop', 'mean ms', 'p95 ms'], rows)
+
+    if args.models:
+        detector = compare_reads(crops, args.max_width)
+        if args.images:
+            compare_reads(image_crops(args.images, detector), args.max_width)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,255 @@
+"""
+Benchmark: frame handoff from capture to inference
+
+Compares three ways of getting camera frames to a busy inference loop:
+
+    thread  capture thread and inference in one process (latest-frame buffer,
+            as CameraWorker does without LP_CAPTURE_PROCESS)
+    queue   capture process sending frames to an inference process through a
+            multiprocessing.Queue (every frame pickled and copied)
+    shm     capture process writing into a shared-memory FrameRing, inference
+            process(es) mapping frames zero-copy (InferenceWorkerPool)
+
+A synthetic camera produces --size frames at --fps; inference is simulated
+by --work-ms of GIL-holding Python work per frame (real pre/post-processing
+holds the GIL too). Reported per mode: handoff latency (capture to
+inference start), dropped-frame rate (frames never processed), how late the
+capture loop ran against its schedule, and frames processed per second
+
+Usage:
+    python benchmarks/bench_shm_ring.py [--fps 30] [--size 1280x720] [--work-ms 80]
+        [--duration 10] [--workers 1] [--modes thread,queue,shm]
+"""
+import argparse
+import multiprocessing
+import queue
+import threading
+import time
+
+import numpy as np
+
+from bench_utils import print_table, summarize
+from shm_ring import FrameRing, InferenceWorkerPool
+
+_mp = multiprocessing.get_context('spawn')
+
+
+def busy(ms):
+    """Hold the GIL for ms milliseconds"""
+    end = time.perf_counter() + ms / 1000.0
+    n = 0
+    while time.perf_counter() < end:
+        n += 1
+    return n
+
+
+def make_template(width, height):
+    rng = np.random.default_rng(0)
+    return rng.integers(0, 255, size=(height, width, 3), dtype=np.uint8)
+
+
+def produce(deliver, fps, duration, template):
+    """
+    Capture loop: one new frame buffer per tick (like a camera driver)
+
+    Returns:
+        tuple: (frames produced, list of lateness against schedule in ms)
+    """
+    interval = 1.0 / fps
+    start = time.monotonic()
+    produced, lateness = 0, []
+    while True:
+        scheduled = start + produced * interval
+        now = time.monotonic()
+        if scheduled - start >= duration:
+            break
+        if scheduled > now:
+            time.sleep(scheduled - now)
+        lateness.append(max(0.0, time.monotonic() - scheduled) * 1000.0)
+        frame = template.copy()
+        frame[0, 0, 0] = produced % 256
+        deliver(frame, time.time())
+        produced += 1
+    return produced, lateness
+
+
+# ==========================================
+# thread: one process
+# ==========================================
+def run_thread(args, template):
+    cond = threading.Condition()
+    latest = {'frame': None, 'seq': 0, 'timestamp': 0.0}
+    done = threading.Event()
+    handoff, processed = [], [0]
+    report = {}
+
+    def deliver(frame, timestamp):
+        with cond:
+            latest['frame'] = frame
+            latest['seq'] += 1
+            latest['timestamp'] = timestamp
+            cond.notify_all()
+
+    def capture():
+        report['produced'], report['lateness'] = produce(deliver, args.fps, args.duration, template)
+        done.set()
+        with cond:
+            cond.notify_all()
+
+    def inference():
+        seen = 0
+        while not done.is_set():
+            with cond:
+                while latest['seq'] <= seen and not done.is_set():
+                    cond.wait(0.5)
+                if latest['seq'] <= seen:
+                    break
+                seen, frame, timestamp = latest['seq'], latest['frame'], latest['timestamp']
+            handoff.append((time.time() - timestamp) * 1000.0)
+            frame.mean(axis=(0, 1))
+            busy(args.work_ms)
+            processed[0] += 1
+
+    threads = [threading.Thread(target=capture), threading.Thread(target=inference)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return report['produced'], processed[0], handoff, report['lateness']
+
+
+# ==========================================
+# queue: pickled frames between processes
+# ==========================================
+def _queue_producer(frames, stats, fps, duration, width, height):
+    template = make_template(width, height)
+
+    def deliver(frame, timestamp):
+        try:
+            frames.put_nowait((frame, timestamp))
+        except queue.Full:
+            pass
+
+    stats.put(produce(deliver, fps, duration, template))
+    frames.put(None)
+
+
+def _queue_consumer(frames, results, work_ms):
+    handoff = []
+    while True:
+        item = frames.get()
+        if item is None:
+            break
+        frame, timestamp = item
+        handoff.append((time.time() - timestamp) * 1000.0)
+        frame.mean(axis=(0, 1))
+        busy(work_ms)
+    results.put(handoff)
+
+
+def run_queue(args, template):
+    width, height = template.shape[1], template.shape[0]
+    frames, stats, results = _mp.Queue(maxsize=2), _mp.Queue(), _mp.Queue()
+    consumer = _mp.Process(target=_queue_consumer, args=(frames, results, args.work_ms))
+    producer = _mp.Process(target=_queue_producer, args=(frames, stats, args.fps, args.duration, width, height))
+    consumer.start()
+    time.sleep(args.startup)
+    producer.start()
+    produced, lateness = stats.get()
+    handoff = results.get()
+    producer.join()
+    consumer.join()
+    return produced, len(handoff), handoff, lateness
+
+
+# ==========================================
+# shm: FrameRing + InferenceWorkerPool
+# ==========================================
+def _ring_producer(handle, stats, fps, duration, width, height):
+    ring = FrameRing.attach(handle)
+    template = make_template(width, height)
+    try:
+        stats.put(produce(lambda frame, ts: ring.write(frame, timestamp=ts), fps, duration, template))
+    finally:
+        ring.close()
+
+
+_WORK_MS = 80.0
+
+
+def _simulated_inference(frame):
+    frame.data.mean(axis=(0, 1))
+    busy(_WORK_MS)
+    return {'success': True}
+
+
+def make_worker_fn():
+    """Worker setup (runs in each inference process)"""
+    import os
+    global _WORK_MS
+    _WORK_MS = float(os.environ.get('BENCH_WORK_MS', _WORK_MS))
+    return _simulated_inference
+
+
+def run_shm(args, template):
+    import os
+    width, height = template.shape[1], template.shape[0]
+    os.environ['BENCH_WORK_MS'] = str(args.work_ms)
+    ring = FrameRing.create(slots=args.slots, slot_size=template.nbytes)
+    pool = InferenceWorkerPool(ring, workers=args.workers, setup=make_worker_fn, name='bench')
+    stats = _mp.Queue()
+    producer = _mp.Process(target=_ring_producer, args=(ring.handle, stats, args.fps, args.duration, width, height))
+    try:
+        pool.start()
+        time.sleep(args.startup)
+        producer.start()
+        produced, lateness = stats.get()
+        producer.join()
+        handoff = []
+        while True:
+            item = pool.get_result(timeout=args.work_ms / 1000.0 * 2 + 1.0)
+            if item is None:
+                break
+            handoff.append(item['handoffMs'])
+        return produced, len(handoff), handoff, lateness
+    finally:
+        pool.stop()
+        ring.close()
+        ring.unlink()
+
+
+RUNNERS = {'thread': run_thread, 'queue': run_queue, 'shm': run_shm}
+
+
+def main():
+    ap = argparse.ArgumentParser(description='Capture to inference frame handoff benchmark')
+    ap.add_argument('--fps', type=float, default=30.0, help='Synthetic camera frame rate')
+    ap.add_argument('--size', default='1280x720', help='Frame size (WxH, BGR)')
+    ap.add_argument('--work-ms', type=float, default=80.0, help='Simulated inference time per frame')
+    ap.add_argument('--duration', type=float, default=10.0, help='Seconds of capture per mode')
+    ap.add_argument('--workers', type=int, default=1, help='Inference processes in shm mode')
+    ap.add_argument('--slots', type=int, default=4, help='Ring slots in shm mode')
+    ap.add_argument('--startup', type=float, default=1.0, help='Seconds for consumer processes to start')
+    ap.add_argument('--modes', default='thread,queue,shm')
+    args = ap.parse_args()
+
+    width, height = (int(v) for v in args.size.lower().split('x'))
+    template = make_template(width, height)
+    rows = []
+    for mode in args.modes.split(','):
+        print(f"⏱️ {mode}...")
+        produced, processed, handoff, lateness = RUNNERS[mode](args, template)
+        handoff_stats = summarize(handoff)
+        lateness_stats = summarize(lateness)
+        rows.append([mode, produced, processed, f'{1 - processed / max(1, produced):.1%}',
+                     handoff_stats['p50'], handoff_stats['p95'], lateness_stats['p95'], lateness_stats['max'],
+                     processed / args.duration])
+
+    print(f"\n{width}x{height} frames ({template.nbytes / 1e6:.1f} MB) at {args.fps:g} fps, "
+          f"{args.work_ms:g} ms inference\n")
+    print_table(['mode', 'captured', 'processed', 'dropped', 'handoff p50 ms', 'handoff p95 ms',
+                 'capture late p95 ms', 'capture late max ms', 'processed/s'], rows)
+
+
+if __name__ == '__main__':
+    main()
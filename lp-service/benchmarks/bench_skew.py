@@ -0,0 +1,166 @@
+"""
+Benchmark: skew estimation in function/utils_rotate
+
+Times the original nested-loop compute_skew (kept here as reference) against
+the vectorized version at full resolution, with downscaling, and the cheaper
+min-area-rect estimator, and checks the angles agree
+
+Exit code is 1 if the vectorized estimator at full resolution disagrees with
+the original on any crop, so this doubles as the angle-agreement test
+
+Usage:
+    python benchmarks/bench_skew.py [--images DIR] [--max-width 160] [--tolerance 2.0]
+"""
+import argparse
+import math
+import sys
+
+import cv2
+import numpy as np
+
+from bench_utils import load_images, print_table, summarize, synthetic_plate_image, time_call
+
+from function import utils_rotate
+
+
+# ==========================================
+# Original implementation (reference)
+# ==========================================
+def legacy_change_contrast(img):
+    lab = cv2.cvtColor(img, cv2.COLOR_BGR2LAB)
+    l_channel, a, b = cv2.split(lab)
+    clahe = cv2.createCLAHE(clipLimit=3.0, tileGridSize=(8, 8))
+    cl = clahe.apply(l_channel)
+    limg = cv2.merge((cl, a, b))
+    return cv2.cvtColor(limg, cv2.COLOR_LAB2BGR)
+
+
+def legacy_compute_skew(src_img, center_thres):
+    if len(src_img.shape) == 3:
+        h, w, _ = src_img.shape
+    else:
+        h, w = src_img.shape
+    img = cv2.medianBlur(src_img, 3)
+    edges = cv2.Canny(img, threshold1=30, threshold2=100, apertureSize=3, L2gradient=True)
+    lines = cv2.HoughLinesP(edges, 1, math.pi / 180, 30, minLineLength=w / 1.5, maxLineGap=h / 3.0)
+    if lines is None:
+        return 1
+    # OpenCV 4.x layout (n, 1, 4); newer versions may return (n, 4)
+    lines = lines.reshape(-1, 1, 4)
+
+    min_line = 100
+    min_line_pos = 0
+    for i in range(len(lines)):
+        for x1, y1, x2, y2 in lines[i]:
+            center_point = [((x1 + x2) / 2), ((y1 + y2) / 2)]
+            if center_thres == 1:
+                if center_point[1] < 7:
+                    continue
+            if center_point[1] < min_line:
+                min_line = center_point[1]
+                min_line_pos = i
+
+    angle = 0.0
+    cnt = 0
+    for x1, y1, x2, y2 in lines[min_line_pos]:
+        ang = np.arctan2(y2 - y1, x2 - x1)
+        if math.fabs(ang) <= 30:
+            angle += ang
+            cnt += 1
+    if cnt == 0:
+        return 0.0
+    return (angle / cnt) * 180 / math.pi
+
+
+# ==========================================
+# Crops
+# ==========================================
+def synthetic_crops(count=24):
+    """Rotated plate crops with known angle"""
+    crops = []
+    for i in range(count):
+        angle = -12 + 24 * i / max(count - 1, 1)
+        img = synthetic_plate_image(1920, 1080, seed=100 + i, angle=angle)
+        # plate body is the brightest region - crop around it with a margin
+        mask = (img.min(axis=2) > 200).astype(np.uint8)
+        x, y, w, h = cv2.boundingRect(mask)
+        pad = max(4, h // 6)
+        crop = img[max(0, y - pad):y + h + pad, max(0, x - pad):x + w + pad]
+        # rotating the plate counter-clockwise gives a negative measured skew
+        crops.append((f'synthetic_{angle:+.1f}', crop, -angle))
+    return crops
+
+
+def image_crops(image_dir):
+    """Use folder images (ideally plate crops) as-is, no known angle"""
+    return [(name, img, None) for name, img in load_images(image_dir, synthetic_count=0)]
+
+
+def main():
+    ap = argparse.ArgumentParser(description='Skew estimation benchmark / agreement check')
+    ap.add_argument('--images', default=None, help='Folder with plate crops (default: synthetic)')
+    ap.add_argument('--max-width', type=int, default=160, help='Downscale width for the fast path')
+    ap.add_argument('--tolerance', type=float, default=2.0,
+                    help='Allowed degrees of difference for downscaled/min-area-rect estimates')
+    ap.add_argument('--repeat', type=int, default=50)
+    args = ap.parse_args()
+
+    crops = image_crops(args.images) if args.images else synthetic_crops()
+    if not crops:
+        print("❌ No crops to benchmark")
+        return 1
+
+    variants = {
+        'legacy': lambda c, t: legacy_compute_skew(c, t),
+        'vectorized': lambda c, t: utils_rotate.compute_skew(c, t),
+        f'downscaled({args.max_width})': lambda c, t: utils_rotate.compute_skew(c, t, args.max_width),
+        'min_area_rect': lambda c, t: utils_rotate.compute_skew(c, t, args.max_width, 'min_area_rect'),
+    }
+    timings = {name: [] for name in variants}
+    exact_mismatch = 0
+    within_tol = {name: 0 for name in variants}
+    within_true = {name: 0 for name in variants}
+    known = 0
+
+    for name, crop, true_angle in crops:
+        for center_thres in (0, 1):
+            angles = {}
+            for variant, fn in variants.items():
+                timings[variant].extend(time_call(lambda: fn(crop, center_thres), repeat=args.repeat, warmup=1))
+                angles[variant] = fn(crop, center_thres)
+            if abs(angles['vectorized'] - angles['legacy']) > 1e-9:
+                exact_mismatch += 1
+                print(f"❌ {name} ct={center_thres}: legacy {angles['legacy']:.4f} "
+                      f"vs vectorized {angles['vectorized']:.4f}")
+            for variant, angle in angles.items():
+                if abs(angle - angles['legacy']) <= args.tolerance:
+                    within_tol[variant] += 1
+                if true_angle is not None and abs(angle - true_angle) <= args.tolerance:
+                    within_true[variant] += 1
+            known += true_angle is not None
+
+    contrast_legacy = summarize(time_call(lambda: [legacy_change_contrast(c) for _, c, _ in crops], args.repeat))
+    contrast_new = summarize(time_call(lambda: [utils_rotate.changeContrast(c) for _, c, _ in crops], args.repeat))
+
+    total = len(crops) * 2
+    rows = []
+    for variant in variants:
+        stats = summarize(timings[variant])
+        rows.append([variant, stats['mean'] * 1000, stats['p95'] * 1000,
+                     f'{within_tol[variant]}/{total}',
+                     f'{within_true[variant]}/{known}' if known else '-'])
+    print()
+    print_table(['estimator', 'mean us', 'p95 us', f'within {args.tolerance} deg of legacy',
+                 'within tol of true angle'], rows)
+    print(f"\nchangeContrast for {len(crops)} crops: legacy {contrast_legacy['mean']:.2f} ms, "
+          f"reused CLAHE {contrast_new['mean']:.2f} ms")
+
+    if exact_mismatch:
+        print(f"\n❌ Vectorized estimator disagrees with legacy on {exact_mismatch}/{total} cases")
+        return 1
+    print(f"\n✅ Vectorized estimator matches legacy on all {total} cases")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,116 @@
+"""
+Benchmark: lp-service startup
+
+1. Import-time profile of api_server (python -X importtime), listing the
+   slowest modules by cumulative import time
+2. Time from process start until /health answers, and until it reports ready
+
+Usage:
+    python benchmarks/bench_startup.py [--top 15] [--port 5099] [--ready-timeout 300]
+"""
+import argparse
+import json
+import subprocess
+import sys
+import time
+import urllib.request
+
+from bench_utils import LP_SERVICE_DIR, print_table
+
+
+def import_profile(module='api_server'):
+    """
+    Run `python -X importtime -c "import <module>"` and parse its report
+
+    Returns:
+        list: [(module, self_us, cumulative_us), ...] in import order
+    """
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=LP_SERVICE_DIR, capture_output=True, text=True
+    )
+    entries = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        # "import time:       629 |     267469 |   flask"
+        fields = line[len('import time:'):].split('|')
+        if len(fields) != 3:
+            continue
+        entries.append((fields[2].strip(), int(fields[0]), int(fields[1])))
+    if proc.returncode != 0:
+        print(proc.stderr[-2000:])
+    return entries
+
+
+def wait_for_health(port, proc, ready_timeout):
+    """
+    Poll /health until it answers and until it reports ready
+
+    Returns:
+        tuple: (seconds to first answer, seconds to ready, last health payload)
+    """
+    url = f'http://127.0.0.1:{port}/health'
+    start = time.perf_counter()
+    first = None
+    payload = None
+    while time.perf_counter() - start < ready_timeout:
+        if proc.poll() is not None:
+            break
+        try:
+            with urllib.request.urlopen(url, timeout=1) as resp:
+                payload = json.loads(resp.read())
+            if first is None:
+                first = time.perf_counter() - start
+            if payload.get('status') != 'loading':
+                return first, time.perf_counter() - start, payload
+        except Exception:
+            pass
+        time.sleep(0.05)
+    return first, None, payload
+
+
+def main():
+    ap = argparse.ArgumentParser(description='lp-service startup benchmark')
+    ap.add_argument('--top', type=int, default=15, help='Slowest modules to list')
+    ap.add_argument('--port', type=int, default=5099)
+    ap.add_argument('--ready-timeout', type=float, default=300.0)
+    args = ap.parse_args()
+
+    print("📦 Import-time profile: import api_server")
+    entries = import_profile()
+    total = next((cum for name, _, cum in entries if name == 'api_server'), 0)
+    slowest = sorted(entries, key=lambda e: e[2], reverse=True)[:args.top]
+    print_table(
+        ['module', 'self ms', 'cumulative ms'],
+        [[name, self_us / 1000.0, cum / 1000.0] for name, self_us, cum in slowest]
+    )
+    # The loader thread starts importing during the profile, so a heavy
+    # module showing up here is not necessarily on the main import path
+    heavy = sorted({name.split('.')[0] for name, _, _ in entries}
+                   & {'torch', 'torchvision', 'cv2', 'numpy', 'pandas'})
+    print(f"\nimport api_server: {total / 1000.0:.1f} ms "
+          f"(heavy modules seen: {', '.join(heavy) or 'none'})")
+
+    print(f"\n🚀 Starting api_server on port {args.port}")
+    code = ('import api_server; '
+            f'api_server.app.run(host="127.0.0.1", port={args.port}, threaded=True)')
+    started = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, '-c', code], cwd=LP_SERVICE_DIR,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        first, ready, payload = wait_for_health(args.port, proc, args.ready_timeout)
+    finally:
+        proc.terminate()
+        proc.wait(10)
+
+    print(f"  /health first answer: {first:.2f}s" if first is not None else "  /health never answered")
+    if ready is not None:
+        print(f"  service {payload.get('status')}: {ready:.2f}s")
+        print(f"  loader timings: {json.dumps(payload.get('loader', {}).get('timings', {}))}")
+    else:
+        print(f"  service not ready after {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
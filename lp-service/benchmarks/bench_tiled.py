@@ -0,0 +1,135 @@
+"""
+Benchmark: tiled vs single-pass plate detection
+
+Reports detector latency and plate recall of the single-pass detector
+(whole frame letterboxed to --size) and of TiledDetector for each tile
+size, overall and for small (distant) plates
+
+Ground truth comes from synthetic scenes with plates of several widths, or,
+with --images, from YOLO label files next to the images (same name, .txt,
+"class cx cy w h" normalized per line). Images without labels are skipped
+
+Usage:
+    python benchmarks/bench_tiled.py [--images DIR] [--tile-sizes 640,480] [--overlap 128]
+        [--plate-widths 40,60,90,200] [--small 80]
+"""
+import argparse
+import glob
+import os
+
+import cv2
+
+from bench_utils import IMAGE_EXTENSIONS, box_iou, load_models, print_table, summarize, synthetic_scene, time_call
+from lean_inference import LeanDetector, TiledDetector
+
+
+def labelled_images(image_dir):
+    """
+    Images with YOLO label files
+
+    Returns:
+        list: [(name, BGR image, [[x1, y1, x2, y2], ...]), ...]
+    """
+    samples = []
+    paths = []
+    for pattern in IMAGE_EXTENSIONS:
+        paths.extend(glob.glob(os.path.join(image_dir, pattern)))
+    for path in sorted(paths):
+        label = os.path.splitext(path)[0] + '.txt'
+        img = cv2.imread(path)
+        if img is None or not os.path.exists(label):
+            continue
+        h, w = img.shape[:2]
+        boxes = []
+        with open(label) as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) < 5:
+                    continue
+                cx, cy, bw, bh = (float(v) for v in parts[1:5])
+                boxes.append([(cx - bw / 2) * w, (cy - bh / 2) * h, (cx + bw / 2) * w, (cy + bh / 2) * h])
+        samples.append((os.path.basename(path), img, boxes))
+    return samples
+
+
+def matched(truth, rows, iou=0.5):
+    """Ground-truth boxes matched by a detection (greedy, one detection each)"""
+    used = set()
+    hits = []
+    for box in truth:
+        best, best_iou = None, iou
+        for i, row in enumerate(rows):
+            if i in used:
+                continue
+            overlap = box_iou(box, row[:4])
+            if overlap >= best_iou:
+                best, best_iou = i, overlap
+        hits.append(best is not None)
+        if best is not None:
+            used.add(best)
+    return hits
+
+
+def evaluate(name, detector, samples, small, repeat):
+    durations = []
+    found = total = found_small = total_small = detections = 0
+    for _, img, truth in samples:
+        durations += time_call(lambda: detector(img), repeat=repeat, warmup=1)
+        rows = detector(img).tolist()
+        detections += len(rows)
+        for box, hit in zip(truth, matched(truth, rows)):
+            total += 1
+            found += hit
+            if box[2] - box[0] < small:
+                total_small += 1
+                found_small += hit
+    stats = summarize(durations)
+    return [name, stats['p50'], stats['p95'],
+            f'{found}/{total} ({found / max(1, total):.0%})',
+            f'{found_small}/{total_small} ({found_small / max(1, total_small):.0%})',
+            detections - found]
+
+
+def main():
+    ap = argparse.ArgumentParser(description='Tiled vs single-pass detection benchmark')
+    ap.add_argument('--images', default=None, help='Folder with images and YOLO label files')
+    ap.add_argument('--count', type=int, default=8, help='Synthetic scenes')
+    ap.add_argument('--frame', default='1280x720', help='Synthetic frame size (WxH)')
+    ap.add_argument('--plate-widths', default='40,60,90,200', help='Synthetic plate widths (px)')
+    ap.add_argument('--size', type=int, default=640, help='Single-pass inference size')
+    ap.add_argument('--tile-sizes', default='640', help='Tile sizes to compare (comma separated)')
+    ap.add_argument('--overlap', type=int, default=128, help='Tile overlap (px)')
+    ap.add_argument('--small', type=int, default=80, help='Plates narrower than this count as small')
+    ap.add_argument('--repeat', type=int, default=5)
+    args = ap.parse_args()
+
+    if args.images:
+        samples = labelled_images(args.images)
+        if not samples:
+            print(f"❌ No labelled images in {args.images}")
+            return
+    else:
+        width, height = (int(v) for v in args.frame.lower().split('x'))
+        widths = [int(v) for v in args.plate_widths.split(',')]
+        samples = []
+        for i in range(args.count):
+            img, boxes = synthetic_scene(width, height, widths, seed=i)
+            samples.append((f'scene_{i}', img, boxes))
+
+    detector, _ = load_models()
+    single = LeanDetector(detector, size=args.size)
+    rows = [evaluate(f'single pass ({args.size})', single, samples, args.small, args.repeat)]
+    for tile_size in (int(v) for v in args.tile_sizes.split(',')):
+        for include_full in (True, False):
+            tiled = TiledDetector(detector, tile_size=tile_size, overlap=args.overlap, include_full=include_full)
+            tiled(samples[0][1])
+            label = f'tiled {tile_size}/{tiled.overlap} x{tiled.last_tile_count}' + (' + full' if include_full else '')
+            rows.append(evaluate(label, tiled, samples, args.small, args.repeat))
+
+    print(f"\n{len(samples)} images, {sum(len(s[2]) for s in samples)} plates "
+          f"(small: narrower than {args.small}px)\n")
+    print_table(['detector', 'p50 ms', 'p95 ms', 'recall', 'small recall', 'extra boxes'], rows)
+
+
+if __name__ == '__main__':
+    main()
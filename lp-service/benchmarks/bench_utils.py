@@ -0,0 +1,191 @@
+"""
+Shared helpers for lp-service benchmarks
+Run benchmarks from the lp-service folder, e.g. python benchmarks/bench_lean_inference.py
+"""
+import glob
+import math
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+LP_SERVICE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+LPR_DIR = os.path.abspath(os.path.join(LP_SERVICE_DIR, '..', 'License-Plate-Recognition'))
+DEFAULT_IMAGE_DIR = os.path.join(LPR_DIR, 'test_image')
+
+# Make service modules and the License-Plate-Recognition helpers importable
+for path in (LP_SERVICE_DIR, LPR_DIR):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+IMAGE_EXTENSIONS = ('*.jpg', '*.jpeg', '*.png', '*.bmp')
+
+
+def draw_plate(plate_w, plate_h, text='59A1-2345'):
+    """White plate with a dark border and text, as a BGR array"""
+    plate = np.full((plate_h, plate_w, 3), 235, dtype=np.uint8)
+    cv2.rectangle(plate, (1, 1), (plate_w - 2, plate_h - 2), (20, 20, 20), 2)
+    scale = plate_h / 40.0
+    cv2.putText(plate, text, (int(plate_w * 0.06), int(plate_h * 0.75)),
+                cv2.FONT_HERSHEY_SIMPLEX, scale, (20, 20, 20), max(1, int(scale * 2)))
+    return plate
+
+
+def synthetic_scene(width=1280, height=720, plate_widths=(60, 90, 200), seed=0):
+    """
+    Noisy background with several non-overlapping plates of the given widths
+    (narrow ones stand in for distant vehicles)
+
+    Returns:
+        tuple: (BGR image, list of [x1, y1, x2, y2] plate boxes)
+    """
+    rng = np.random.default_rng(seed)
+    img = rng.integers(40, 120, size=(height, width, 3), dtype=np.uint8)
+    boxes = []
+    for plate_w in plate_widths:
+        plate_h = max(8, plate_w // 4)
+        for _ in range(50):
+            x = int(rng.integers(0, width - plate_w))
+            y = int(rng.integers(0, height - plate_h))
+            box = [x, y, x + plate_w, y + plate_h]
+            # keep a margin between plates so boxes stay unambiguous
+            if all(box[0] > b[2] + 20 or box[2] < b[0] - 20 or box[1] > b[3] + 20 or box[3] < b[1] - 20
+                   for b in boxes):
+                break
+        else:
+            continue
+        img[y:y + plate_h, x:x + plate_w] = draw_plate(plate_w, plate_h)
+        boxes.append(box)
+    return img, boxes
+
+
+def box_iou(a, b):
+    """IoU of two [x1, y1, x2, y2] boxes"""
+    iw = max(0.0, min(a[2], b[2]) - max(a[0], b[0]))
+    ih = max(0.0, min(a[3], b[3]) - max(a[1], b[1]))
+    inter = iw * ih
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union if union > 0 else 0.0
+
+
+def synthetic_plate_image(width=1280, height=720, text='59A1-2345', seed=0, angle=0.0):
+    """
+    Draw a plate-like white rectangle with dark text on a noisy background
+
+    Args:
+        width, height (int): Image size
+        text (str): Plate text
+        seed (int): Random seed for background noise and plate position
+        angle (float): In-plane rotation of the plate in degrees
+
+    Returns:
+        numpy.ndarray: BGR image
+    """
+    rng = np.random.default_rng(seed)
+    img = rng.integers(40, 120, size=(height, width, 3), dtype=np.uint8)
+    plate_w, plate_h = width // 6, width // 24
+    x = int(rng.integers(width // 4, width - width // 4 - plate_w))
+    y = int(rng.integers(height // 3, height - height // 4 - plate_h))
+
+    img[y:y + plate_h, x:x + plate_w] = draw_plate(plate_w, plate_h, text)
+    if angle:
+        # rotate a region around the plate so its corners are not clipped
+        m = plate_w // 4
+        y0, y1, x0, x1 = max(0, y - m), min(height, y + plate_h + m), max(0, x - m), min(width, x + plate_w + m)
+        roi = img[y0:y1, x0:x1]
+        rot = cv2.getRotationMatrix2D((x + plate_w / 2 - x0, y + plate_h / 2 - y0), angle, 1.0)
+        img[y0:y1, x0:x1] = cv2.warpAffine(roi, rot, (x1 - x0, y1 - y0), borderMode=cv2.BORDER_REFLECT)
+    return img
+
+
+def load_images(image_dir=None, limit=None, synthetic_count=8, width=1280, height=720):
+    """
+    Load benchmark images from a folder, or generate synthetic ones
+
+    Returns:
+        list: [(name, BGR image), ...]
+    """
+    image_dir = image_dir or DEFAULT_IMAGE_DIR
+    paths = []
+    if os.path.isdir(image_dir):
+        for pattern in IMAGE_EXTENSIONS:
+            paths.extend(glob.glob(os.path.join(image_dir, pattern)))
+    paths = sorted(paths)[:limit] if limit else sorted(paths)
+
+    images = []
+    for path in paths:
+        img = cv2.imread(path)
+        if img is not None:
+            images.append((os.path.basename(path), img))
+
+    if not images:
+        print(f"⚠️  No images in {image_dir} - using {synthetic_count} synthetic images")
+        images = [
+            (f'synthetic_{i}.jpg', synthetic_plate_image(width, height, seed=i))
+            for i in range(synthetic_count)
+        ]
+    return images
+
+
+def time_call(fn, repeat=20, warmup=3):
+    """
+    Time fn() repeatedly
+
+    Returns:
+        list: Durations in milliseconds
+    """
+    for _ in range(warmup):
+        fn()
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        durations.append((time.perf_counter() - start) * 1000.0)
+    return durations
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, math.ceil(pct / 100.0 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(durations):
+    """Mean/p50/p95/max of a list of milliseconds"""
+    if not durations:
+        return {'mean': 0.0, 'p50': 0.0, 'p95': 0.0, 'max': 0.0}
+    return {
+        'mean': sum(durations) / len(durations),
+        'p50': percentile(durations, 50),
+        'p95': percentile(durations, 95),
+        'max': max(durations)
+    }
+
+
+def print_table(headers, rows):
+    """Print rows as an aligned text table"""
+    cells = [[str(h) for h in headers]]
+    for row in rows:
+        cells.append([f'{c:.2f}' if isinstance(c, float) else str(c) for c in row])
+    widths = [max(len(r[i]) for r in cells) for i in range(len(headers))]
+    for n, row in enumerate(cells):
+        print('  '.join(c.ljust(w) for c, w in zip(row, widths)))
+        if n == 0:
+            print('  '.join('-' * w for w in widths))
+
+
+def load_models():
+    """
+    Load detector and OCR models the same way LicensePlateRecognitionService does
+
+    Returns:
+        tuple: (detector, ocr) AutoShape models
+    """
+    from lp_recognition_service import get_recognition_service
+    service = get_recognition_service()
+    return service.yolo_LP_detect, service.yolo_license_plate
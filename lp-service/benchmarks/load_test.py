@@ -0,0 +1,390 @@
+"""
+Load test: latency and throughput of a running lp-service
+
+Drives /api/recognize (multipart upload, base64 JSON, raw body) and the camera
+preview endpoints with a fixed number of concurrent clients, optionally at
+a fixed request rate (open loop), and reports per endpoint:
+
+    - p50/p95/p99/max latency
+    - throughput (completed requests per second)
+    - no-read (422), shed (429/503) and error rates
+    - server RSS over time (polled from /health)
+
+With --rate, requests are scheduled at fixed times and latency is measured
+from the scheduled time, so a saturated server shows up as growing latency
+instead of a silently lower request rate. Without --rate each client sends
+its next request as soon as the previous one finishes (closed loop).
+
+Pass several concurrency levels (--concurrency 1,2,4,8) to step through them
+and find where p95 latency or the shed rate stops being acceptable.
+
+Start the server first (python api_server.py), then e.g.:
+    python benchmarks/load_test.py --mode multipart,base64 --concurrency 1,2,4 --duration 30
+    python benchmarks/load_test.py --mode preview --concurrency 4 --rate 10
+    python benchmarks/load_test.py --images /data/plates --json report.json
+
+Usage:
+    python benchmarks/load_test.py [--url http://localhost:5001] [--mode multipart,base64,raw,preview]
+        [--concurrency 1,2,4] [--rate R] [--duration S] [--images DIR] [--size WxH] [--json FILE]
+"""
+import argparse
+import base64
+import itertools
+import json
+import os
+import queue
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+
+import cv2
+
+from bench_utils import DEFAULT_IMAGE_DIR, IMAGE_EXTENSIONS, percentile, print_table, synthetic_plate_image
+
+MODES = ('multipart', 'base64', 'raw', 'preview')
+SHED_STATUSES = (429, 503)
+
+
+# ==========================================
+# Requests
+# ==========================================
+def load_corpus(image_dir, size, quality, synthetic_count=8):
+    """
+    Encoded images to upload: files from image_dir as they are, or synthetic
+    plates when there are none
+
+    Returns:
+        list: [(name, JPEG/PNG bytes, mime type), ...]
+    """
+    image_dir = image_dir or DEFAULT_IMAGE_DIR
+    corpus = []
+    if os.path.isdir(image_dir):
+        extensions = tuple(ext[1:] for ext in IMAGE_EXTENSIONS)
+        for name in sorted(os.listdir(image_dir)):
+            if name.lower().endswith(extensions):
+                with open(os.path.join(image_dir, name), 'rb') as f:
+                    mime = 'image/png' if name.lower().endswith('.png') else 'image/jpeg'
+                    corpus.append((name, f.read(), mime))
+    if not corpus:
+        print(f"⚠️  No images in {image_dir} - using {synthetic_count} synthetic images")
+        width, height = size
+        for i in range(synthetic_count):
+            img = synthetic_plate_image(width, height, seed=i)
+            data = cv2.imencode('.jpg', img, [cv2.IMWRITE_JPEG_QUALITY, quality])[1].tobytes()
+            corpus.append((f'synthetic_{i}.jpg', data, 'image/jpeg'))
+    return corpus
+
+
+def multipart_body(name, data, mime):
+    boundary = uuid.uuid4().hex
+    body = b''.join([
+        f'--{boundary}\r\n'.encode(),
+        f'Content-Disposition: form-data; name="file"; filename="{name}"\r\n'.encode(),
+        f'Content-Type: {mime}\r\n\r\n'.encode(),
+        data,
+        f'\r\n--{boundary}--\r\n'.encode()
+    ])
+    return body, f'multipart/form-data; boundary={boundary}'
+
+
+def build_request(url, mode, image):
+    """
+    Prepared request for one mode
+
+    Returns:
+        tuple: (endpoint label, method, url, body, headers)
+    """
+    name, data, mime = image
+    if mode == 'multipart':
+        body, content_type = multipart_body(name, data, mime)
+        return 'POST /api/recognize (multipart)', 'POST', url + '/api/recognize', body, {'Content-Type': content_type}
+    if mode == 'base64':
+        payload = {'image': f'data:{mime};base64,' + base64.b64encode(data).decode('ascii')}
+        body = json.dumps(payload).encode()
+        return 'POST /api/recognize (base64)', 'POST', url + '/api/recognize', body, {'Content-Type': 'application/json'}
+    if mode == 'raw':
+        return ('POST /api/recognize (raw)', 'POST', url + '/api/recognize?compact=1', data,
+                {'Content-Type': 'application/octet-stream'})
+    return 'GET /api/camera/preview/frame', 'GET', url + '/api/camera/preview/frame', None, {}
+
+
+def send(method, url, body=None, headers=None, timeout=60.0):
+    """
+    Send one request
+
+    Returns:
+        tuple: (HTTP status or None on connection error/timeout, error text)
+    """
+    req = urllib.request.Request(url, data=body, headers=headers or {}, method=method)
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as resp:
+            resp.read()
+            return resp.status, None
+    except urllib.error.HTTPError as e:
+        e.read()
+        return e.code, None
+    except Exception as e:
+        return None, f'{type(e).__name__}: {e}'
+
+
+def get_json(url, timeout=5.0):
+    try:
+        with urllib.request.urlopen(url, timeout=timeout) as resp:
+            return json.loads(resp.read())
+    except Exception:
+        return None
+
+
+# ==========================================
+# Load generation
+# ==========================================
+class Results:
+    """Per-endpoint latencies and outcome counts (thread-safe)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.endpoints = {}
+        self.errors = {}
+
+    def add(self, endpoint, status, latency_ms, error=None):
+        with self._lock:
+            entry = self.endpoints.setdefault(endpoint, {'latencies': [], 'ok': 0, 'noRead': 0,
+                                                         'shed': 0, 'errors': 0})
+            entry['latencies'].append(latency_ms)
+            if status is not None and status < 400:
+                entry['ok'] += 1
+            elif status == 422:
+                entry['noRead'] += 1
+            elif status in SHED_STATUSES:
+                entry['shed'] += 1
+            else:
+                entry['errors'] += 1
+                key = error or f'HTTP {status}'
+                self.errors[key] = self.errors.get(key, 0) + 1
+
+
+class RssMonitor(threading.Thread):
+    """Polls /health for the server's RSS while the test runs"""
+
+    def __init__(self, url, interval):
+        super().__init__(daemon=True)
+        self.url = url + '/health'
+        self.interval = interval
+        self.samples = []
+        self._stop_event = threading.Event()
+        self._start = time.monotonic()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            health = get_json(self.url)
+            process = (health or {}).get('process', {})
+            if 'rssMb' in process:
+                self.samples.append((time.monotonic() - self._start, process['rssMb'],
+                                     process.get('threads')))
+            self._stop_event.wait(self.interval)
+
+    def stop(self):
+        self._stop_event.set()
+        self.join(self.interval + 5.0)
+
+
+def run_step(args, corpus, concurrency):
+    """
+    Run one load step
+
+    Returns:
+        tuple: (Results, wall time in seconds)
+    """
+    results = Results()
+    # Bodies are built once so client-side encoding does not count as latency
+    plan = itertools.cycle([build_request(args.url, mode, image) for image in corpus for mode in args.mode])
+    plan_lock = threading.Lock()
+    deadline = time.monotonic() + args.duration
+    remaining = [args.requests] if args.requests else None
+
+    def next_request():
+        with plan_lock:
+            if remaining is not None:
+                if remaining[0] <= 0:
+                    return None
+                remaining[0] -= 1
+            return next(plan)
+
+    # Open loop: a ticker puts scheduled send times into a queue, clients
+    # take them and measure latency from that time
+    tickets = queue.Queue() if args.rate else None
+
+    def ticker():
+        interval = 1.0 / args.rate
+        scheduled = time.monotonic()
+        while scheduled < deadline:
+            now = time.monotonic()
+            if scheduled > now:
+                time.sleep(scheduled - now)
+            tickets.put(scheduled)
+            scheduled += interval
+        for _ in range(concurrency):
+            tickets.put(None)
+
+    def client():
+        while True:
+            if tickets is not None:
+                scheduled = tickets.get()
+                if scheduled is None:
+                    return
+            else:
+                if time.monotonic() >= deadline:
+                    return
+                scheduled = time.monotonic()
+            request = next_request()
+            if request is None:
+                return
+            endpoint, method, url, body, headers = request
+            status, error = send(method, url, body, headers, timeout=args.timeout)
+            results.add(endpoint, status, (time.monotonic() - scheduled) * 1000.0, error)
+
+    threads = [threading.Thread(target=client, daemon=True) for _ in range(concurrency)]
+    if tickets is not None:
+        threads.append(threading.Thread(target=ticker, daemon=True))
+    start = time.monotonic()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results, time.monotonic() - start
+
+
+def summarize_step(results, wall, concurrency):
+    rows = []
+    report = []
+    for endpoint, entry in sorted(results.endpoints.items()):
+        latencies = entry['latencies']
+        count = len(latencies)
+        item = {
+            'concurrency': concurrency,
+            'endpoint': endpoint,
+            'requests': count,
+            'throughput': count / wall if wall > 0 else 0.0,
+            'p50': percentile(latencies, 50),
+            'p95': percentile(latencies, 95),
+            'p99': percentile(latencies, 99),
+            'max': max(latencies) if latencies else 0.0,
+            'ok': entry['ok'],
+            'noReadRate': entry['noRead'] / count if count else 0.0,
+            'shedRate': entry['shed'] / count if count else 0.0,
+            'errorRate': entry['errors'] / count if count else 0.0
+        }
+        report.append(item)
+        rows.append([concurrency, endpoint, count, item['throughput'], item['p50'], item['p95'],
+                     item['p99'], item['max'], f"{item['noReadRate']:.1%}", f"{item['shedRate']:.1%}",
+                     f"{item['errorRate']:.1%}"])
+    return rows, report
+
+
+def main():
+    ap = argparse.ArgumentParser(description='lp-service load test')
+    ap.add_argument('--url', default='http://localhost:5001', help='lp-service base URL')
+    ap.add_argument('--mode', default='multipart',
+                    help=f'Comma separated request types to rotate through: {", ".join(MODES)}')
+    ap.add_argument('--concurrency', default='1,2,4',
+                    help='Concurrent clients; several comma separated levels run as steps')
+    ap.add_argument('--rate', type=float, default=0.0,
+                    help='Total requests per second (open loop); 0 = as fast as the clients can')
+    ap.add_argument('--duration', type=float, default=20.0, help='Seconds per step')
+    ap.add_argument('--requests', type=int, default=0, help='Stop a step after this many requests')
+    ap.add_argument('--images', default=None, help='Upload images from this folder (default: synthetic)')
+    ap.add_argument('--size', default='1280x720', help='Synthetic image size (WxH)')
+    ap.add_argument('--quality', type=int, default=90, help='Synthetic JPEG quality')
+    ap.add_argument('--timeout', type=float, default=60.0, help='Per-request timeout (seconds)')
+    ap.add_argument('--rss-interval', type=float, default=1.0, help='Seconds between /health RSS samples')
+    ap.add_argument('--json', default=None, help='Also write the report to this file')
+    args = ap.parse_args()
+
+    args.url = args.url.rstrip('/')
+    args.mode = [m.strip() for m in args.mode.split(',') if m.strip()]
+    unknown = [m for m in args.mode if m not in MODES]
+    if unknown:
+        ap.error(f'unknown mode(s): {", ".join(unknown)}')
+    levels = [int(c) for c in args.concurrency.split(',')]
+    width, height = (int(v) for v in args.size.lower().split('x'))
+
+    health = get_json(args.url + '/health')
+    if health is None:
+        print(f"❌ lp-service not reachable at {args.url}")
+        sys.exit(1)
+    if not health.get('ready'):
+        print(f"⚠️  Service not ready (status: {health.get('status')}) - recognition requests will be shed")
+
+    corpus = load_corpus(args.images, (width, height), args.quality)
+    print(f"📦 {len(corpus)} images, mean {sum(len(d) for _, d, _ in corpus) / len(corpus) / 1024:.0f} KB")
+
+    started_preview = False
+    if 'preview' in args.mode:
+        status = get_json(args.url + '/api/camera/preview/status') or {}
+        if not status.get('active'):
+            code, error = send('POST', args.url + '/api/camera/preview/start', b'')
+            if code != 200:
+                print(f"❌ Could not start preview session ({error or f'HTTP {code}'})")
+                sys.exit(1)
+            started_preview = True
+
+    monitor = RssMonitor(args.url, args.rss_interval)
+    monitor.start()
+    rows, report, errors = [], [], {}
+    try:
+        for concurrency in levels:
+            print(f"🚦 {concurrency} client(s), {args.duration:.0f}s"
+                  + (f", {args.rate:g} req/s" if args.rate else '') + '...')
+            results, wall = run_step(args, corpus, concurrency)
+            step_rows, step_report = summarize_step(results, wall, concurrency)
+            rows += step_rows
+            report += step_report
+            for key, count in results.errors.items():
+                errors[key] = errors.get(key, 0) + count
+    finally:
+        monitor.stop()
+        if started_preview:
+            send('POST', args.url + '/api/camera/preview/stop', b'')
+
+    print()
+    print_table(['clients', 'endpoint', 'requests', 'req/s', 'p50 ms', 'p95 ms', 'p99 ms', 'max ms',
+                 'no read', 'shed', 'errors'], rows)
+    if args.rate:
+        print("\nLatency measured from scheduled send time (includes client-side queueing)")
+
+    if errors:
+        print("\nErrors:")
+        for key, count in sorted(errors.items(), key=lambda item: -item[1]):
+            print(f"  {count:6d}  {key}")
+
+    if monitor.samples:
+        print("\nServer RSS:")
+        step = max(1, len(monitor.samples) // 20)
+        print_table(['t (s)', 'RSS MB', 'threads'],
+                    [[t, rss, threads] for t, rss, threads in monitor.samples[::step]])
+        rss = [s[1] for s in monitor.samples]
+        print(f"\nRSS start {rss[0]:.1f} MB, peak {max(rss):.1f} MB, end {rss[-1]:.1f} MB")
+    else:
+        print("\n⚠️  /health did not report process RSS")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({
+                'url': args.url,
+                'modes': args.mode,
+                'rate': args.rate,
+                'duration': args.duration,
+                'images': len(corpus),
+                'steps': report,
+                'errors': errors,
+                'rss': [{'t': round(t, 2), 'rssMb': rss, 'threads': threads}
+                        for t, rss, threads in monitor.samples]
+            }, f, indent=2)
+        print(f"💾 Report written to {args.json}")
+
+
+if __name__ == '__main__':
+    main()
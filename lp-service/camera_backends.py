@@ -0,0 +1,368 @@
+"""
+Pluggable camera backends
+All backends expose the PiCameraHandler interface (is_initialized,
+capture_raw(), capture_frame(), close()) so the preview session, the camera
+registry and /api/recognize/picamera work the same with any of them:
+
+    picamera2  Raspberry Pi Camera Module (picamera_handler.PiCameraHandler)
+    opencv     cv2.VideoCapture: V4L2 index, RTSP/HTTP URL
+    video      Video file replay, at real-time or maximum speed
+    images     Image directory replay, at a fixed FPS or maximum speed
+    recording  Frame ring file written by frame_recorder, at recorded timing
+
+The backend is chosen by LP_CAMERA_BACKEND / LP_CAMERA_SOURCE, or per camera
+with a source spec such as "video:/data/lane1.mp4" or "images-max:/data/frames"
+"""
+import glob
+import os
+import platform
+import threading
+import time
+
+import cv2
+
+import config
+from frame_pipeline import Frame, BGR
+
+IS_RASPBERRY_PI = platform.machine() in ['armv7l', 'aarch64']
+
+IMAGE_EXTENSIONS = ('*.jpg', '*.jpeg', '*.png', '*.bmp')
+
+# Replays continue where the previous instance stopped, so opening the
+# camera once per request still walks through the recording
+_replay_positions = {}
+_replay_lock = threading.Lock()
+
+
+class CameraBackend:
+    """
+    Base class for camera backends
+    """
+
+    name = 'base'
+
+    def __init__(self):
+        self.is_initialized = False
+
+    def read(self):
+        """Read next frame as numpy array (None when no frame available)"""
+        raise NotImplementedError
+
+    def capture_raw(self):
+        """
+        Capture single frame without colour conversion
+
+        Returns:
+            Frame: Captured frame, or None
+        """
+        if not self.is_initialized:
+            print("❌ Camera not initialized")
+            return None
+        try:
+            data = self.read()
+        except Exception as e:
+            print(f"❌ Error capturing frame: {e}")
+            return None
+        return Frame(data, BGR) if data is not None else None
+
+    def capture_frame(self):
+        """
+        Capture single frame
+
+        Returns:
+            numpy.ndarray: OpenCV BGR image
+        """
+        frame = self.capture_raw()
+        return frame.as_bgr() if frame is not None else None
+
+    def close(self):
+        self.is_initialized = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class OpenCVCamera(CameraBackend):
+    """
+    cv2.VideoCapture backend (V4L2 device index, RTSP/HTTP URL)
+    """
+
+    name = 'opencv'
+
+    def __init__(self, source=0):
+        super().__init__()
+        self.source = source
+        self.cap = cv2.VideoCapture(source)
+        if not self.cap.isOpened():
+            self.cap.release()
+            raise RuntimeError(f'Could not open camera {source}')
+        self.is_initialized = True
+
+    def read(self):
+        ret, frame = self.cap.read()
+        return frame if ret else None
+
+    def close(self):
+        if self.cap is not None:
+            self.cap.release()
+            self.cap = None
+        super().close()
+
+
+class _ReplayClock:
+    """
+    Paces replayed frames: frame n is released at start + n / (fps * speed)
+    (speed 0 = unpaced)
+    """
+
+    def __init__(self, fps, speed=1.0):
+        self.interval = 1.0 / (fps * speed) if (speed and fps and fps > 0) else 0.0
+        self.start = None
+        self.count = 0
+
+    def wait(self):
+        if self.interval <= 0:
+            return
+        now = time.monotonic()
+        if self.start is None:
+            self.start = now
+        due = self.start + self.count * self.interval
+        if due > now:
+            time.sleep(due - now)
+        self.count += 1
+
+
+class VideoFileCamera(CameraBackend):
+    """
+    Replays a video file as if it were a live camera
+    """
+
+    name = 'video'
+
+    def __init__(self, path, speed=None, loop=None):
+        super().__init__()
+        if not os.path.isfile(path):
+            raise RuntimeError(f'Video file not found: {path}')
+        self.path = path
+        self.speed = config.REPLAY_SPEED if speed is None else speed
+        self.loop = config.REPLAY_LOOP if loop is None else loop
+        self.cap = cv2.VideoCapture(path)
+        if not self.cap.isOpened():
+            self.cap.release()
+            raise RuntimeError(f'Could not open video {path}')
+
+        with _replay_lock:
+            position = _replay_positions.get(('video', path), 0)
+        if position:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, position)
+        self.position = position
+
+        fps = self.cap.get(cv2.CAP_PROP_FPS) or config.REPLAY_FPS
+        self.clock = _ReplayClock(fps, self.speed)
+        self.is_initialized = True
+
+    def read(self):
+        self.clock.wait()
+        ret, frame = self.cap.read()
+        if not ret and self.loop:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            self.position = 0
+            ret, frame = self.cap.read()
+        if not ret:
+            return None
+        self.position += 1
+        with _replay_lock:
+            _replay_positions[('video', self.path)] = self.position
+        return frame
+
+    def close(self):
+        if self.cap is not None:
+            self.cap.release()
+            self.cap = None
+        super().close()
+
+
+class ImageDirectoryCamera(CameraBackend):
+    """
+    Replays the images of a directory (sorted by name) as camera frames
+    """
+
+    name = 'images'
+
+    def __init__(self, directory, fps=None, speed=None, loop=None):
+        super().__init__()
+        self.paths = []
+        for pattern in IMAGE_EXTENSIONS:
+            self.paths.extend(glob.glob(os.path.join(directory, pattern)))
+        self.paths.sort()
+        if not self.paths:
+            raise RuntimeError(f'No images found in {directory}')
+        self.directory = directory
+        self.loop = config.REPLAY_LOOP if loop is None else loop
+        speed = config.REPLAY_SPEED if speed is None else speed
+        self.clock = _ReplayClock(fps or config.REPLAY_FPS, speed)
+        with _replay_lock:
+            self.position = _replay_positions.get(('images', directory), 0)
+        self.is_initialized = True
+
+    def read(self):
+        self.clock.wait()
+        if self.position >= len(self.paths):
+            if not self.loop:
+                return None
+            self.position = 0
+        frame = cv2.imread(self.paths[self.position])
+        self.position += 1
+        with _replay_lock:
+            _replay_positions[('images', self.directory)] = self.position
+        return frame
+
+
+# ==========================================
+# Factory
+# ==========================================
+BACKENDS = ('picamera2', 'opencv', 'video', 'images', 'recording')
+
+
+def parse_camera_spec(spec):
+    """
+    Split a camera source spec into (backend, source, speed)
+
+    Accepted forms:
+        "picamera"                     -> Pi Camera
+        "0"                            -> OpenCV device index
+        "rtsp://..." / "http://..."    -> OpenCV stream
+        "video:/path.mp4"              -> video replay, real-time
+        "video-max:/path.mp4"          -> video replay, max speed
+        "images:/dir" / "images-max:/dir"
+        "recording:/lane.ring" / "recording-max:/lane.ring"
+        "/path.mp4" / "/dir"           -> video / images replay by file type
+
+    Returns:
+        tuple: (backend, source, replay speed or None for config default)
+    """
+    if isinstance(spec, int):
+        return 'opencv', spec, None
+    spec = str(spec).strip()
+    if spec.lower() in ('picamera', 'pi', 'picamera2'):
+        return 'picamera2', None, None
+    if spec.isdigit():
+        return 'opencv', int(spec), None
+
+    prefix, sep, rest = spec.partition(':')
+    prefix = prefix.lower()
+    if sep and prefix in ('video', 'video-max', 'images', 'images-max',
+                          'recording', 'recording-max', 'opencv'):
+        speed = 0.0 if prefix.endswith('-max') else None
+        backend = prefix.replace('-max', '')
+        source = int(rest) if backend == 'opencv' and rest.isdigit() else rest
+        return backend, source, speed
+
+    if os.path.isdir(spec):
+        return 'images', spec, None
+    if os.path.isfile(spec):
+        return 'video', spec, None
+    return 'opencv', spec, None
+
+
+def default_backend():
+    """Backend used when LP_CAMERA_BACKEND is 'auto'"""
+    if IS_RASPBERRY_PI:
+        try:
+            import picamera2  # noqa: F401
+            return 'picamera2'
+        except ImportError:
+            pass
+    return 'opencv'
+
+
+def create_camera(backend=None, source=None, speed=None):
+    """
+    Open a camera backend
+
+    Args:
+        backend (str): 'picamera2', 'opencv', 'video', 'images', 'recording'
+            or 'auto'
+            (default: LP_CAMERA_BACKEND)
+        source: Device index, URL, file or directory (default: LP_CAMERA_SOURCE)
+        speed (float): Replay speed, 0 = unpaced (default: LP_REPLAY_SPEED)
+
+    Returns:
+        CameraBackend: Opened camera (raises on failure)
+    """
+    backend = (backend or config.CAMERA_BACKEND or 'auto').lower()
+    if backend == 'auto':
+        backend = default_backend()
+    if source is None:
+        source = config.CAMERA_SOURCE
+
+    if backend in ('picamera2', 'picamera'):
+        from picamera_handler import PiCameraHandler
+        return PiCameraHandler()
+    if backend == 'opencv':
+        if isinstance(source, str) and source.isdigit():
+            source = int(source)
+        return OpenCVCamera(source if source not in (None, '') else 0)
+    if backend == 'video':
+        return VideoFileCamera(source, speed=speed)
+    if backend == 'images':
+        return ImageDirectoryCamera(source, speed=speed)
+    if backend == 'recording':
+        from frame_recorder import RecordingCamera
+        return RecordingCamera(source, speed=speed)
+    raise ValueError(f"Unknown camera backend '{backend}' (expected one of {', '.join(BACKENDS)})")
+
+
+def open_camera(spec):
+    """Open camera from a source spec (see parse_camera_spec)"""
+    backend, source, speed = parse_camera_spec(spec)
+    return create_camera(backend, source, speed)
+
+
+def get_camera():
+    """
+    Open the configured camera (LP_CAMERA_BACKEND / LP_CAMERA_SOURCE)
+    New instance per call, like get_picamera()
+
+    Returns:
+        CameraBackend: Opened camera
+    """
+    return create_camera()
+
+
+def describe_backend():
+    """Configured backend and source, for status endpoints"""
+    backend = (config.CAMERA_BACKEND or 'auto').lower()
+    return {
+        'backend': default_backend() if backend == 'auto' else backend,
+        'source': config.CAMERA_SOURCE,
+        'platform': platform.machine()
+    }
+
+
+def test_camera():
+    """
+    Capture one frame from the configured camera
+
+    Returns:
+        bool: Success status
+    """
+    print(f"\n🧪 Testing camera ({describe_backend()['backend']})...")
+    camera = None
+    try:
+        camera = get_camera()
+        frame = camera.capture_raw()
+        if frame is None:
+            print("❌ Failed to capture frame")
+            return False
+        print(f"✅ Captured frame shape: {frame.shape}")
+        return True
+    except Exception as e:
+        print(f"❌ Test failed: {e}")
+        return False
+    finally:
+        if camera:
+            camera.close()
@@ -0,0 +1,648 @@
+"""
+Multi-camera manager
+Each named camera gets its own capture thread and latest-frame buffer,
+and all cameras share the recognition engine through a round-robin scheduler
+"""
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from datetime import datetime
+
+import config
+import priority
+import profiling
+from camera_backends import open_camera
+from event_hub import CAMERA, publish
+from frame_recorder import record_frame
+
+
+class RateMeter:
+    """
+    Sliding window events-per-second meter
+    """
+
+    def __init__(self, window=5.0):
+        self.window = window
+        self._events = deque()
+        self._lock = threading.Lock()
+
+    def mark(self, now=None):
+        """Record one event"""
+        now = now if now is not None else time.monotonic()
+        with self._lock:
+            self._events.append(now)
+            self._trim(now)
+
+    def rate(self, now=None):
+        """Events per second over the window"""
+        now = now if now is not None else time.monotonic()
+        with self._lock:
+            self._trim(now)
+            if len(self._events) < 2:
+                return 0.0
+            span = now - self._events[0]
+            return len(self._events) / span if span > 0 else 0.0
+
+    def _trim(self, now):
+        while self._events and now - self._events[0] > self.window:
+            self._events.popleft()
+
+
+class LatencyStats:
+    """
+    Running latency statistics (count, last, average, max) in milliseconds
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.last_ms = 0.0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, seconds):
+        """Record one measurement given in seconds"""
+        ms = seconds * 1000.0
+        with self._lock:
+            self.count += 1
+            self.last_ms = ms
+            self.total_ms += ms
+            self.max_ms = max(self.max_ms, ms)
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                'count': self.count,
+                'lastMs': round(self.last_ms, 1),
+                'avgMs': round(self.total_ms / self.count, 1) if self.count else 0.0,
+                'maxMs': round(self.max_ms, 1)
+            }
+
+
+def parse_camera_config(spec):
+    """
+    Parse camera registry config
+
+    Args:
+        spec (str): "name=source,name=source" (source specs as in
+            camera_backends.parse_camera_spec)
+
+    Returns:
+        list: [(name, source), ...]
+    """
+    cameras = []
+    for entry in (spec or '').split(','):
+        entry = entry.strip()
+        if not entry:
+            continue
+        if '=' in entry:
+            name, source = entry.split('=', 1)
+        else:
+            name, source = entry, entry
+        cameras.append((name.strip(), source.strip()))
+    return cameras
+
+
+def parse_device_indices(spec):
+    """'0,2' -> {0, 2} (LP_CAMERA_DEVICES)"""
+    return {int(part) for part in (spec or '').split(',') if part.strip().isdigit()}
+
+
+# ==========================================
+# Per-camera capture worker
+# ==========================================
+class CameraWorker:
+    """
+    Owns one camera: a capture thread keeps only the newest frame in memory
+    so consumers never read a stale, queued-up frame
+    """
+
+    def __init__(self, name, source):
+        self.name = name
+        self.source = source
+        self.status = 'stopped'
+        self.last_error = None
+
+        self._cond = threading.Condition()
+        self._frame = None
+        self._frame_seq = 0
+        self._frame_time = None
+        self._consumed_seq = 0
+
+        self._stop_event = threading.Event()
+        self._thread = None
+        self.ring = None
+
+        # Stats
+        self.capture_rate = RateMeter()
+        self.frames_captured = 0
+        self.frames_dropped = 0
+        self.capture_errors = 0
+        self.reconnects = 0
+        self.inference_latency = LatencyStats()
+        self.queue_wait = LatencyStats()
+        self.recognitions_shed = 0
+
+    def start(self):
+        """Start capture thread (no-op if already running)"""
+        with self._cond:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop_event.clear()
+            self._set_status('starting')
+            self._thread = threading.Thread(
+                target=self._run, name=f'camera-{self.name}', daemon=True
+            )
+            self._thread.start()
+
+    def stop(self, timeout=5.0):
+        """Stop capture thread and release camera"""
+        self._stop_event.set()
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+        with self._cond:
+            self._thread = None
+            self._set_status('stopped')
+            self._cond.notify_all()
+
+    @property
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def _set_status(self, status):
+        """Update status, publishing a camera event when it changes"""
+        if status == self.status:
+            return
+        previous, self.status = self.status, status
+        publish(CAMERA, {
+            'camera': self.name,
+            'status': status,
+            'previous': previous,
+            'error': self.last_error,
+            'timestamp': datetime.now().isoformat()
+        })
+
+    def _run(self):
+        if config.CAPTURE_PROCESS:
+            self._run_capture_process()
+            return
+        capture = None
+        while not self._stop_event.is_set():
+            if capture is None:
+                try:
+                    capture = open_camera(self.source)
+                    self.last_error = None
+                    self._set_status('running')
+                    print(f"📷 Camera '{self.name}' opened ({self.source})")
+                except Exception as e:
+                    self.last_error = str(e)
+                    self.reconnects += 1
+                    self._set_status('reconnecting')
+                    print(f"⚠️ Camera '{self.name}' unavailable: {e}")
+                    self._stop_event.wait(config.CAMERA_RECONNECT_DELAY)
+                    continue
+
+            try:
+                frame = capture.capture_raw()
+            except Exception as e:
+                frame = None
+                self.last_error = str(e)
+
+            if frame is None:
+                # Camera stopped delivering frames - reopen it
+                self.capture_errors += 1
+                self._set_status('reconnecting')
+                try:
+                    capture.close()
+                except Exception:
+                    pass
+                capture = None
+                self._stop_event.wait(config.CAMERA_RECONNECT_DELAY)
+                continue
+
+            record_frame(frame, self.name, capture)
+            self._publish(frame)
+
+        if capture is not None:
+            try:
+                capture.close()
+            except Exception as e:
+                print(f"⚠️ Error closing camera '{self.name}': {e}")
+
+    def _run_capture_process(self):
+        """
+        Capture in a child process (LP_CAPTURE_PROCESS); this thread copies
+        each new frame out of the shared-memory ring and publishes it. A
+        fatal error from the child (a frame larger than LP_SHM_SLOT_MB) ends
+        capture with status 'error' instead of restarting it
+        """
+        from shm_ring import CaptureProcess, FrameRing
+
+        ring = FrameRing.create()
+        process = CaptureProcess(self.source, ring, name=self.name)
+        self.ring = ring
+        recordable = True
+        exited = False
+        process.start()
+        print(f"📷 Camera '{self.name}' capturing in process {process.pid} ({self.source})")
+        try:
+            while not self._stop_event.is_set():
+                fatal = False
+                for status, error, recordable in process.poll_status():
+                    self.last_error = error
+                    if status == 'reconnecting':
+                        self.reconnects += 1
+                        self.capture_errors += 1
+                        print(f"⚠️ Camera '{self.name}' unavailable: {error}")
+                    elif status == 'error':
+                        self.capture_errors += 1
+                        fatal = True
+                        print(f"❌ Camera '{self.name}' capture stopped: {error}")
+                    self._set_status(status)
+                if fatal:
+                    break
+                if exited:
+                    # Statuses were drained above and none was fatal
+                    exited = False
+                    self.last_error = 'capture process exited'
+                    self._set_status('reconnecting')
+                    self.reconnects += 1
+                    self._stop_event.wait(config.CAMERA_RECONNECT_DELAY)
+                    process.start()
+                    continue
+                item = ring.read_copy(timeout=0.5)
+                if item is None:
+                    exited = not process.is_alive()
+                    continue
+                _, frame = item
+                if recordable:
+                    record_frame(frame, self.name)
+                self._publish(frame)
+        finally:
+            process.stop()
+            self.ring = None
+            ring.close()
+            ring.unlink()
+
+    def _publish(self, frame):
+        now = time.monotonic()
+        with self._cond:
+            # Previous frame was never read by anyone - count it as dropped
+            if self._frame is not None and self._consumed_seq < self._frame_seq:
+                self.frames_dropped += 1
+            self._frame = frame
+            self._frame_seq += 1
+            self._frame_time = datetime.now()
+            self.frames_captured += 1
+            self._cond.notify_all()
+        self.capture_rate.mark(now)
+
+    def get_latest(self, newer_than=0, timeout=None):
+        """
+        Get newest frame
+
+        Args:
+            newer_than (int): Only return a frame with a higher sequence number
+            timeout (float): Seconds to wait for such a frame (None = forever)
+
+        Returns:
+            tuple: (seq, Frame, timestamp) or (None, None, None) on timeout
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._frame is None or self._frame_seq <= newer_than:
+                if not self.is_running:
+                    return None, None, None
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return None, None, None
+                self._cond.wait(remaining)
+            self._consumed_seq = self._frame_seq
+            return self._frame_seq, self._frame, self._frame_time
+
+    def get_stats(self):
+        """Per-camera capture and inference statistics"""
+        with self._cond:
+            last_frame = self._frame_time.isoformat() if self._frame_time else None
+        ring = self.ring
+        return {
+            'name': self.name,
+            'source': str(self.source),
+            'status': self.status,
+            'lastError': self.last_error,
+            'lastFrame': last_frame,
+            'fps': round(self.capture_rate.rate(), 2),
+            'framesCaptured': self.frames_captured,
+            'framesDropped': self.frames_dropped,
+            'captureErrors': self.capture_errors,
+            'reconnects': self.reconnects,
+            'recognitionsShed': self.recognitions_shed,
+            'inferenceLatency': self.inference_latency.to_dict(),
+            'queueWait': self.queue_wait.to_dict(),
+            # Capture process handoff (LP_CAPTURE_PROCESS)
+            'sharedMemory': ring.get_stats() if ring is not None else None
+        }
+
+
+# ==========================================
+# Shared inference scheduler
+# ==========================================
+class SchedulerBusyError(Exception):
+    """Raised when a camera already has too many recognitions queued"""
+
+
+class InferenceScheduler:
+    """
+    Runs inference jobs on a single worker thread. Jobs go by priority
+    class (recognition requests, then exit lanes, then entry lanes, see
+    priority.py); within a class one job per camera is taken in turn
+    (round-robin) so a busy lane cannot starve the others
+    """
+
+    def __init__(self, max_pending=None):
+        self.max_pending = max_pending or config.INFERENCE_MAX_PENDING
+        self._cond = threading.Condition()
+        self._queues = {}
+        # Priority -> round-robin line of keys with queued work
+        self._ready = {}
+        self._thread = None
+        self._running = False
+
+    def start(self):
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+            self._thread = threading.Thread(
+                target=self._run, name='inference-scheduler', daemon=True
+            )
+            self._thread.start()
+
+    def stop(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(5.0)
+            self._thread = None
+
+    def submit(self, key, fn, *args):
+        """
+        Queue fn(*args) for inference on behalf of key (camera name)
+
+        Returns:
+            Future: resolves to fn's return value
+
+        Raises:
+            SchedulerBusyError: key already has max_pending jobs queued
+        """
+        self.start()
+        future = Future()
+        fn = profiling.bind(fn)
+        with self._cond:
+            queue = self._queues.setdefault(key, deque())
+            if len(queue) >= self.max_pending:
+                raise SchedulerBusyError(f"Too many pending recognitions for '{key}'")
+            queue.append((future, fn, args, time.monotonic()))
+            if len(queue) == 1:
+                self._ready.setdefault(priority.scheduler_priority(key), deque()).append(key)
+            self._cond.notify()
+        return future
+
+    def cancel(self, key, future):
+        """
+        Drop a queued job whose caller gave up waiting, freeing its slot
+        (a job that already started runs to completion)
+
+        Returns:
+            bool: True if the job was dropped
+        """
+        with self._cond:
+            if not future.cancel():
+                return False
+            queue = self._queues.get(key)
+            if queue:
+                for item in queue:
+                    if item[0] is future:
+                        queue.remove(item)
+                        break
+                if not queue:
+                    level = priority.scheduler_priority(key)
+                    line = self._ready.get(level)
+                    if line is not None and key in line:
+                        line.remove(key)
+                        if not line:
+                            del self._ready[level]
+            return True
+
+    def pending(self):
+        """Number of queued jobs per key"""
+        with self._cond:
+            return {key: len(queue) for key, queue in self._queues.items() if queue}
+
+    def _next_job(self):
+        with self._cond:
+            while self._running and not self._ready:
+                self._cond.wait()
+            if not self._running:
+                return None
+            level = min(self._ready)
+            line = self._ready[level]
+            key = line.popleft()
+            queue = self._queues[key]
+            job = queue.popleft()
+            # Key goes to the back of its line if it still has work
+            if queue:
+                line.append(key)
+            elif not line:
+                del self._ready[level]
+            return key, job
+
+    def _run(self):
+        gate = priority.get_priority_gate()
+        while True:
+            item = self._next_job()
+            if item is None:
+                return
+            key, (future, fn, args, submitted) = item
+            if not future.set_running_or_notify_cancel():
+                continue
+            started = time.monotonic()
+            future.queue_wait = started - submitted
+            try:
+                with gate.track(priority.job_class(key), started=submitted):
+                    result = fn(*args)
+            except Exception as e:
+                future.set_exception(e)
+            else:
+                future.run_time = time.monotonic() - started
+                future.set_result(result)
+
+
+# ==========================================
+# Camera registry
+# ==========================================
+class CameraRegistry:
+    """
+    Registry of named cameras sharing one inference scheduler
+    """
+
+    def __init__(self, scheduler=None):
+        self.scheduler = scheduler or InferenceScheduler()
+        self._cameras = {}
+        self._lock = threading.Lock()
+
+    def load_from_config(self, spec):
+        """Register cameras from "name=source,..." config string"""
+        for name, source in parse_camera_config(spec):
+            self.register(name, source, start=False)
+
+    def register(self, name, source, start=True):
+        """
+        Add camera to registry
+
+        Returns:
+            CameraWorker: Registered worker
+        """
+        with self._lock:
+            if name in self._cameras:
+                raise ValueError(f"Camera '{name}' already registered")
+            worker = CameraWorker(name, source)
+            self._cameras[name] = worker
+        if start:
+            worker.start()
+        return worker
+
+    def unregister(self, name):
+        with self._lock:
+            worker = self._cameras.pop(name, None)
+        if worker is not None:
+            worker.stop()
+        return worker is not None
+
+    def get(self, name):
+        """
+        Get camera worker by name, starting its capture thread on first use
+        (not after a fatal capture error, which needs a config change)
+        """
+        with self._lock:
+            worker = self._cameras.get(str(name))
+        if worker is not None and not worker.is_running and worker.status != 'error':
+            worker.start()
+        return worker
+
+    def get_device(self, index):
+        """
+        Camera worker for a device index allowed by LP_CAMERA_DEVICES
+        A camera registered with that source is reused, otherwise one named
+        "device-N" is registered on first use and kept for later requests
+
+        Args:
+            index (int|str): Device index (e.g. cameraId 0 from a client)
+
+        Returns:
+            CameraWorker: Worker, or None if the index is not allowed
+        """
+        if isinstance(index, bool) or not str(index).isdigit():
+            return None
+        index = int(index)
+        if index not in parse_device_indices(config.CAMERA_DEVICES):
+            return None
+        with self._lock:
+            worker = next((w for w in self._cameras.values() if str(w.source) == str(index)), None)
+            if worker is None:
+                worker = CameraWorker(f'device-{index}', str(index))
+                self._cameras[worker.name] = worker
+        if not worker.is_running:
+            worker.start()
+        return worker
+
+    def names(self):
+        with self._lock:
+            return list(self._cameras.keys())
+
+    def recognize(self, name, process_fn, timeout=None):
+        """
+        Recognize license plate from the newest frame of a camera
+
+        Args:
+            name (str): Camera name
+            process_fn (callable): Frame -> recognition result dict
+            timeout (float): Max seconds for frame + inference together
+
+        Returns:
+            dict: Recognition result plus 'frame' and 'frameTimestamp'
+            ('timeout': True when the deadline passed)
+        """
+        timeout = timeout or config.INFERENCE_TIMEOUT
+        deadline = time.monotonic() + timeout
+        worker = self.get(name)
+        if worker is None:
+            return {'success': False, 'error': f"Camera '{name}' not registered"}
+
+        seq, frame, frame_time = worker.get_latest(timeout=timeout)
+        if frame is None:
+            return {
+                'success': False,
+                'error': worker.last_error or f"No frame from camera '{name}'"
+            }
+
+        try:
+            future = self.scheduler.submit(name, process_fn, frame)
+        except SchedulerBusyError as e:
+            worker.recognitions_shed += 1
+            return {'success': False, 'error': str(e), 'busy': True}
+
+        try:
+            result = future.result(timeout=max(0.0, deadline - time.monotonic()))
+        except FutureTimeoutError:
+            # Still queued: give the slot back instead of running it for nobody
+            self.scheduler.cancel(name, future)
+            return {
+                'success': False,
+                'error': f"Recognition on camera '{name}' timed out after {timeout:g}s",
+                'timeout': True
+            }
+        worker.queue_wait.add(future.queue_wait)
+        worker.inference_latency.add(future.run_time)
+
+        result = dict(result)
+        result['camera'] = name
+        result['frame'] = frame
+        result['frameTimestamp'] = frame_time.isoformat() if frame_time else None
+        return result
+
+    def get_stats(self):
+        with self._lock:
+            workers = list(self._cameras.values())
+        return {
+            'cameras': [worker.get_stats() for worker in workers],
+            'pending': self.scheduler.pending()
+        }
+
+    def close_all(self):
+        with self._lock:
+            workers = list(self._cameras.values())
+        for worker in workers:
+            worker.stop()
+        self.scheduler.stop()
+
+
+# Singleton instance
+_registry_instance = None
+
+
+def get_camera_registry():
+    """
+    Get singleton camera registry (cameras loaded from LP_CAMERAS)
+
+    Returns:
+        CameraRegistry: Singleton instance
+    """
+    global _registry_instance
+    if _registry_instance is None:
+        _registry_instance = CameraRegistry()
+        _registry_instance.load_from_config(config.CAMERAS)
+    return _registry_instance
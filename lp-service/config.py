@@ -0,0 +1,395 @@
+"""
+Configuration for the License Plate Recognition service
+Values are read from environment variables so each site can be tuned
+without touching the code (same idea as utils/config.js on the Node side)
+"""
+import os
+
+
+def _env_int(name, default):
+    """Read integer environment variable, falling back to default"""
+    try:
+        return int(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def _env_float(name, default):
+    """Read float environment variable, falling back to default"""
+    try:
+        return float(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def _env_bool(name, default=False):
+    """Read boolean environment variable ('1', 'true', 'yes', 'on')"""
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+def _parse_speed(value):
+    """'realtime' -> 1.0, 'max' -> 0.0 (unpaced), '4' or '4x' -> 4.0"""
+    value = (value or 'realtime').strip().lower()
+    if value == 'realtime':
+        return 1.0
+    if value == 'max':
+        return 0.0
+    try:
+        return max(0.0, float(value.rstrip('x')))
+    except ValueError:
+        return 1.0
+
+
+# ==========================================
+# Camera registry
+# ==========================================
+# Comma separated list of "name=source" pairs, e.g.
+#   LP_CAMERAS="entry-1=picamera,exit-1=0,exit-2=rtsp://192.168.1.50/stream"
+# source is a camera spec: "picamera", a V4L2 device index, an RTSP/HTTP URL
+# or a replay such as "video:/data/lane1.mp4" (see camera_backends)
+CAMERAS = os.environ.get('LP_CAMERAS', '')
+
+# V4L2 device indices /api/recognize/camera may open by "cameraId" when no
+# camera of that name is registered ("" = registered cameras only). Each
+# gets a registered camera "device-N" that is kept open for later requests
+CAMERA_DEVICES = os.environ.get('LP_CAMERA_DEVICES', '0')
+
+# Seconds to wait before reopening a camera that stopped delivering frames
+CAMERA_RECONNECT_DELAY = _env_float('LP_CAMERA_RECONNECT_DELAY', 2.0)
+
+# Maximum recognition jobs queued per camera before new ones are shed
+INFERENCE_MAX_PENDING = _env_int('LP_INFERENCE_MAX_PENDING', 2)
+
+# Seconds a caller waits for its turn on the shared inference engine
+INFERENCE_TIMEOUT = _env_float('LP_INFERENCE_TIMEOUT', 15.0)
+
+# ==========================================
+# Capture process
+# ==========================================
+# Capture registered cameras in child processes that hand frames over
+# through a shared-memory ring, so inference in this process cannot delay
+# or drop frames by holding the GIL
+CAPTURE_PROCESS = _env_bool('LP_CAPTURE_PROCESS', False)
+
+# Ring slots per camera (at least 3) and bytes per slot (a 1920x1080 BGR
+# frame needs 6 MB)
+SHM_SLOTS = _env_int('LP_SHM_SLOTS', 4)
+SHM_SLOT_MB = _env_float('LP_SHM_SLOT_MB', 8.0)
+
+# ==========================================
+# Frame pipeline
+# ==========================================
+# Channel order of frames delivered by Picamera2 for the "RGB888" format
+PICAMERA_FORMAT = os.environ.get('LP_PICAMERA_FORMAT', 'RGB')
+
+# Channel order the detector/OCR models are fed with. Uploaded images and
+# OpenCV cameras are BGR, so the default keeps them conversion-free
+MODEL_INPUT_FORMAT = os.environ.get('LP_MODEL_INPUT_FORMAT', 'BGR')
+
+# ==========================================
+# Inference
+# ==========================================
+# Run detector/OCR through the lean path (preallocated input tensor, raw
+# model, vectorized NMS) instead of YOLOv5 AutoShape
+LEAN_INFERENCE = _env_bool('LP_LEAN_INFERENCE', False)
+
+# Detector input size
+DETECT_SIZE = _env_int('LP_DETECT_SIZE', 640)
+
+# Tiled detection for small, distant plates: overlapping tiles at native
+# resolution (plus the whole frame) detected in one batched forward pass
+TILED_DETECTION = _env_bool('LP_TILED_DETECTION', False)
+TILE_SIZE = _env_int('LP_TILE_SIZE', 640)
+TILE_OVERLAP = _env_int('LP_TILE_OVERLAP', 128)
+TILE_INCLUDE_FULL = _env_bool('LP_TILE_INCLUDE_FULL', True)
+
+# OCR (character detector) input size and confidence threshold
+OCR_SIZE = _env_int('LP_OCR_SIZE', 640)
+OCR_CONF = _env_float('LP_OCR_CONF', 0.60)
+
+# Rectify plate crops before OCR: perspective warp of the plate outline
+# found inside the detector box, or the Hough deskew when there is none
+# (utils_rotate.rectify_plate); outline search runs at most this wide
+RECTIFY = _env_bool('LP_RECTIFY', False)
+RECTIFY_MAX_WIDTH = _env_int('LP_RECTIFY_MAX_WIDTH', 320)
+
+# torch intra-op threads (0 = torch default, one per core)
+TORCH_THREADS = _env_int('LP_TORCH_THREADS', 0)
+
+# ==========================================
+# Model variants
+# ==========================================
+# 'fp32' or 'int8' (quantized variants built by quantization.py, saved as
+# LP_detector.int8.pt / LP_ocr.int8.pt next to the FP32 weights)
+MODEL_VARIANT = os.environ.get('LP_MODEL_VARIANT', 'fp32').lower()
+
+# An INT8 variant is refused (FP32 is loaded instead) if its plate reads
+# matched FP32 on fewer than this share of the evaluation images
+QUANT_MIN_AGREEMENT = _env_float('LP_QUANT_MIN_AGREEMENT', 0.95)
+
+# Quantized kernel backend ('' = qnnpack on ARM, x86 elsewhere)
+QUANT_ENGINE = os.environ.get('LP_QUANT_ENGINE', '')
+
+# ==========================================
+# Model backend
+# ==========================================
+# 'yolov5' (torch.hub + .pt weights) or 'fake' (fake_models.py: scripted or
+# generated detections, no weights or torch needed)
+MODEL_BACKEND = os.environ.get('LP_MODEL_BACKEND', 'yolov5').lower()
+
+# Simulated inference time per call of the fake detector / OCR model (ms at
+# input size 640, scaled with size squared), +/- random fraction, and
+# spinning the CPU instead of sleeping
+FAKE_DETECT_MS = _env_float('LP_FAKE_DETECT_MS', 60.0)
+FAKE_OCR_MS = _env_float('LP_FAKE_OCR_MS', 25.0)
+FAKE_JITTER = _env_float('LP_FAKE_JITTER', 0.0)
+FAKE_BUSY = _env_bool('LP_FAKE_BUSY', False)
+
+# Fraction of images the fake models find no readable plate in
+FAKE_MISS_RATE = _env_float('LP_FAKE_MISS_RATE', 0.0)
+
+# JSON list of {"plates": [[x1, y1, x2, y2, conf]], "text": "59A1-23456"}
+# replayed in order instead of generated outputs (box coordinates are
+# fractions of the image size)
+FAKE_SCRIPT = os.environ.get('LP_FAKE_SCRIPT', '')
+
+# ==========================================
+# Camera backend
+# ==========================================
+# 'auto' (Pi Camera on a Raspberry Pi, OpenCV elsewhere), 'picamera2',
+# 'opencv', 'video' (file replay) or 'images' (directory replay)
+CAMERA_BACKEND = os.environ.get('LP_CAMERA_BACKEND', 'auto')
+
+# Device index/URL for 'opencv', file for 'video', directory for 'images'
+CAMERA_SOURCE = os.environ.get('LP_CAMERA_SOURCE', '0')
+
+# Replay pacing: 'realtime' (original frame rate), 'max' (as fast as
+# possible) or a speed-up factor such as '4' for 4x
+REPLAY_SPEED = _parse_speed(os.environ.get('LP_REPLAY_SPEED'))
+
+# Frame rate for image directory replay (and videos without FPS metadata)
+REPLAY_FPS = _env_float('LP_REPLAY_FPS', 10.0)
+
+# Start over at the end of a recording instead of reporting end of stream
+REPLAY_LOOP = _env_bool('LP_REPLAY_LOOP', True)
+
+# ==========================================
+# Preview broadcast
+# ==========================================
+# Preview frames captured and encoded per second (shared by all viewers)
+PREVIEW_FPS = _env_float('LP_PREVIEW_FPS', 10.0)
+
+# Seconds without a viewer before capture/encoding pauses
+PREVIEW_IDLE_TIMEOUT = _env_float('LP_PREVIEW_IDLE_TIMEOUT', 5.0)
+
+# Maximum seconds a preview request waits for a newer frame
+PREVIEW_WAIT = _env_float('LP_PREVIEW_WAIT', 1.0)
+
+# ==========================================
+# Priority classes
+# ==========================================
+# Recognition requests run first, then continuous recognition of these lanes
+# (LP_CAMERAS names), then all other lanes, then preview and diagnostics
+EXIT_CAMERAS = os.environ.get('LP_EXIT_CAMERAS', '')
+
+# Recognition latency target (p95 over LP_PRIORITY_WINDOW seconds, 0 = never
+# degrade); above it the preview is degraded and diagnostics are refused
+RECOGNITION_TARGET_MS = _env_float('LP_RECOGNITION_TARGET_MS', 1500.0)
+PRIORITY_WINDOW = _env_float('LP_PRIORITY_WINDOW', 30.0)
+
+# Longest preview/diagnostics work waits for running recognitions
+PRIORITY_MAX_DEFER = _env_float('LP_PRIORITY_MAX_DEFER', 1.0)
+
+# Preview rate and JPEG quality while recognition is over its target
+PREVIEW_DEGRADED_FPS = _env_float('LP_PREVIEW_DEGRADED_FPS', 2.0)
+PREVIEW_DEGRADED_QUALITY = _env_int('LP_PREVIEW_DEGRADED_QUALITY', 50)
+
+# ==========================================
+# Thermal governor
+# ==========================================
+# Step preview fps, continuous recognition rate and detector size down when
+# the SoC runs hot, the CPU is overloaded or recognition is over
+# LP_RECOGNITION_TARGET_MS (recommended for Pis in enclosures)
+GOVERNOR = _env_bool('LP_GOVERNOR', False)
+
+# Sensor files (point them at test files to simulate a hot device)
+THERMAL_PATH = os.environ.get('LP_THERMAL_PATH', '/sys/class/thermal/thermal_zone0/temp')
+LOADAVG_PATH = os.environ.get('LP_LOADAVG_PATH', '/proc/loadavg')
+
+# Step down at or above the high marks; step back up only when everything is
+# at or below the low marks (load is the 1 minute load average per CPU;
+# the Pi firmware throttles at 80-85C)
+THERMAL_HIGH = _env_float('LP_THERMAL_HIGH', 75.0)
+THERMAL_LOW = _env_float('LP_THERMAL_LOW', 68.0)
+LOAD_HIGH = _env_float('LP_LOAD_HIGH', 1.5)
+LOAD_LOW = _env_float('LP_LOAD_LOW', 1.0)
+
+# Seconds between checks, and seconds of calm before stepping back up
+GOVERNOR_INTERVAL = _env_float('LP_GOVERNOR_INTERVAL', 5.0)
+GOVERNOR_HOLD = _env_float('LP_GOVERNOR_HOLD', 60.0)
+
+# Deepest level, and detector sizes used from level 1 on (only sizes below
+# LP_DETECT_SIZE are used)
+GOVERNOR_MAX_LEVEL = _env_int('LP_GOVERNOR_MAX_LEVEL', 3)
+GOVERNOR_DETECT_SIZES = os.environ.get('LP_GOVERNOR_DETECT_SIZES', '512,416,320')
+
+# ==========================================
+# Frame recorder
+# ==========================================
+# Ring file for captured frames (empty = recording disabled)
+RECORD_PATH = os.environ.get('LP_RECORD_PATH', '')
+
+# Total size of the ring file - oldest frames are overwritten
+RECORD_SIZE_MB = _env_int('LP_RECORD_SIZE_MB', 256)
+
+# Capacity of one slot; frames that do not fit are skipped
+RECORD_SLOT_KB = _env_int('LP_RECORD_SLOT_KB', 512)
+
+# 'jpeg' (compact) or 'raw' (exact pixels, needs larger slots)
+RECORD_FORMAT = os.environ.get('LP_RECORD_FORMAT', 'jpeg')
+RECORD_JPEG_QUALITY = _env_int('LP_RECORD_JPEG_QUALITY', 85)
+
+# Maximum frames per second written per camera (0 = every frame)
+RECORD_MAX_FPS = _env_float('LP_RECORD_MAX_FPS', 5.0)
+
+# ==========================================
+# Continuous recognition
+# ==========================================
+# Registered cameras (LP_CAMERAS names, or 'all') recognized in the background
+# while a vehicle is present, so /api/recognize/latest answers from cache
+CONTINUOUS_CAMERAS = os.environ.get('LP_CONTINUOUS', '')
+
+# Minimum seconds between background recognitions of one lane
+CONTINUOUS_INTERVAL = _env_float('LP_CONTINUOUS_INTERVAL', 0.5)
+
+# Presence checks per second while the lane is empty
+CONTINUOUS_IDLE_FPS = _env_float('LP_CONTINUOUS_IDLE_FPS', 2.0)
+
+# Fraction of thumbnail pixels that must differ from the empty-lane
+# background for a vehicle to count as present
+CONTINUOUS_MOTION_THRESHOLD = _env_float('LP_CONTINUOUS_MOTION_THRESHOLD', 0.02)
+
+# Seconds a lane stays occupied after the last change or plate read
+CONTINUOUS_HOLD = _env_float('LP_CONTINUOUS_HOLD', 3.0)
+
+# Default maxAge (seconds) for /api/recognize/latest
+LATEST_MAX_AGE = _env_float('LP_LATEST_MAX_AGE', 2.0)
+
+# Frames in flight in the staged detect -> OCR -> publish pipeline used by
+# continuous lanes (0 = each frame runs start to finish on the inference
+# scheduler), and OCR worker threads
+PIPELINE_FRAMES = _env_int('LP_PIPELINE_FRAMES', 0)
+PIPELINE_OCR_WORKERS = _env_int('LP_PIPELINE_OCR_WORKERS', 1)
+
+# ==========================================
+# Events (Server-Sent Events on /api/events)
+# ==========================================
+# Events buffered per client; the oldest are dropped when a client lags
+EVENTS_QUEUE_SIZE = _env_int('LP_EVENTS_QUEUE_SIZE', 50)
+
+# Maximum simultaneously connected event clients
+EVENTS_MAX_CLIENTS = _env_int('LP_EVENTS_MAX_CLIENTS', 20)
+
+# Recent events kept for clients reconnecting with Last-Event-ID
+EVENTS_HISTORY = _env_int('LP_EVENTS_HISTORY', 100)
+
+# Seconds between keep-alive comments on idle streams
+EVENTS_HEARTBEAT = _env_float('LP_EVENTS_HEARTBEAT', 15.0)
+
+# ==========================================
+# Request profiling
+# ==========================================
+# Admin token: recognition requests carrying it in the X-LP-Profile header
+# or ?profile= query are profiled; also required for /api/profiles
+# (empty = on-demand profiling and the profiles endpoints disabled)
+PROFILE_TOKEN = os.environ.get('LP_PROFILE_TOKEN', '')
+
+# Fraction of recognition requests profiled without the token (0 = none)
+PROFILE_SAMPLE_RATE = _env_float('LP_PROFILE_SAMPLE_RATE', 0.0)
+
+# Where profiles are stored, and how many / how much to keep
+PROFILE_DIR = os.environ.get('LP_PROFILE_DIR', 'profiles')
+PROFILE_MAX_COUNT = _env_int('LP_PROFILE_MAX_COUNT', 50)
+PROFILE_MAX_MB = _env_int('LP_PROFILE_MAX_MB', 100)
+
+# Collectors: torch.profiler CPU trace, tracemalloc diff (stack depth)
+PROFILE_TORCH = _env_bool('LP_PROFILE_TORCH', True)
+PROFILE_TRACEMALLOC = _env_bool('LP_PROFILE_TRACEMALLOC', True)
+PROFILE_TRACEMALLOC_FRAMES = _env_int('LP_PROFILE_TRACEMALLOC_FRAMES', 1)
+
+# Rows in the text reports
+PROFILE_TOP = _env_int('LP_PROFILE_TOP', 40)
+
+# ==========================================
+# Upload ingestion
+# ==========================================
+# Maximum uploaded image size (enforced while the request body streams in)
+MAX_UPLOAD_MB = _env_int('LP_MAX_UPLOAD_MB', 10)
+
+# Uploads are decoded at reduced resolution (1/2, 1/4, 1/8) as long as the
+# longer side stays at or above this size; the detector letterboxes to
+# LP_DETECT_SIZE anyway, so more resolution only matters for plate crops
+INGEST_TARGET_SIZE = _env_int('LP_INGEST_TARGET_SIZE', DETECT_SIZE)
+
+# Plate crops narrower than this are re-cut from a higher resolution decode
+INGEST_MIN_PLATE_WIDTH = _env_int('LP_INGEST_MIN_PLATE_WIDTH', 120)
+
+# ==========================================
+# Result cache
+# ==========================================
+# Results of /api/recognize are cached by a hash of the image bytes, so
+# retried or re-submitted uploads skip inference (0 entries = disabled)
+RESULT_CACHE_SIZE = _env_int('LP_RESULT_CACHE_SIZE', 512)
+RESULT_CACHE_MB = _env_float('LP_RESULT_CACHE_MB', 4.0)
+
+# Seconds a cached result stays valid
+RESULT_CACHE_TTL = _env_float('LP_RESULT_CACHE_TTL', 60.0)
+
+# ==========================================
+# Burst capture
+# ==========================================
+# Frames grabbed per /api/recognize/picamera request (?burst=N overrides)
+PICAMERA_BURST = _env_int('LP_PICAMERA_BURST', 1)
+BURST_MAX = _env_int('LP_BURST_MAX', 10)
+
+# Best-scored burst frames tried by the detector before giving up
+BURST_TOP = _env_int('LP_BURST_TOP', 2)
+
+# Seconds between burst grabs (lets motion blur / glare change)
+BURST_INTERVAL = _env_float('LP_BURST_INTERVAL', 0.03)
+
+# Quality scoring: thumbnail width and histogram clipping levels
+QUALITY_WIDTH = _env_int('LP_QUALITY_WIDTH', 320)
+QUALITY_CLIP_LOW = _env_int('LP_QUALITY_CLIP_LOW', 5)
+QUALITY_CLIP_HIGH = _env_int('LP_QUALITY_CLIP_HIGH', 250)
+
+# ==========================================
+# Auto-tuning
+# ==========================================
+# Calibrate torch threads and detector/OCR input sizes on first start and
+# reuse the saved profile afterwards (settings given explicitly through
+# LP_TORCH_THREADS / LP_DETECT_SIZE / LP_OCR_SIZE are never overridden)
+AUTOTUNE = _env_bool('LP_AUTOTUNE', False)
+AUTOTUNE_PROFILE = os.environ.get(
+    'LP_AUTOTUNE_PROFILE', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'autotune_profile.json'))
+
+# Calibration images (default: the License-Plate-Recognition test images,
+# then frames from LP_RECORD_PATH, then synthetic plates)
+AUTOTUNE_IMAGES = os.environ.get('LP_AUTOTUNE_IMAGES', '')
+AUTOTUNE_MAX_IMAGES = _env_int('LP_AUTOTUNE_MAX_IMAGES', 8)
+
+# Candidates ('auto' threads = 1, 2, 4, ... up to the CPU count)
+AUTOTUNE_THREADS = os.environ.get('LP_AUTOTUNE_THREADS', 'auto')
+AUTOTUNE_DETECT_SIZES = os.environ.get('LP_AUTOTUNE_DETECT_SIZES', '640,512,416,320')
+AUTOTUNE_OCR_SIZES = os.environ.get('LP_AUTOTUNE_OCR_SIZES', '640,480,320')
+
+# Maximum fraction of calibration images whose plate read may differ from
+# the full-size reference run
+AUTOTUNE_TOLERANCE = _env_float('LP_AUTOTUNE_TOLERANCE', 0.1)
+
+# Timed runs per image and overall time budget (best result so far is kept)
+AUTOTUNE_REPEAT = _env_int('LP_AUTOTUNE_REPEAT', 2)
+AUTOTUNE_MAX_SECONDS = _env_float('LP_AUTOTUNE_MAX_SECONDS', 300.0)
@@ -0,0 +1,370 @@
+"""
+Continuous (speculative) recognition
+While a vehicle is present in a lane, the lane is recognized in the
+background and the newest plate read is cached, so a card tap can be
+answered from cache instead of waiting for capture + inference
+"""
+import threading
+import time
+from datetime import datetime
+
+import cv2
+import numpy as np
+
+import config
+import priority
+from camera_manager import SchedulerBusyError, get_camera_registry
+from event_hub import TRACK, publish
+from thermal_governor import get_governor
+
+
+class PresenceDetector:
+    """
+    Cheap vehicle presence check: compares a small grayscale thumbnail with
+    a slowly updated empty-lane background
+    """
+
+    def __init__(self, threshold=None, hold=None, size=(64, 48), learn_rate=0.05):
+        self.threshold = config.CONTINUOUS_MOTION_THRESHOLD if threshold is None else threshold
+        self.hold = config.CONTINUOUS_HOLD if hold is None else hold
+        self.size = size
+        self.learn_rate = learn_rate
+        self.background = None
+        self.changed = 0.0
+        self._present_until = 0.0
+
+    def update(self, frame, now=None):
+        """
+        Feed one frame
+
+        Args:
+            frame: Frame from a camera worker
+
+        Returns:
+            bool: True if a vehicle is (still) present
+        """
+        now = time.monotonic() if now is None else now
+        small = cv2.resize(frame.as_format('GRAY'), self.size, interpolation=cv2.INTER_AREA)
+        small = cv2.GaussianBlur(small, (5, 5), 0).astype(np.float32)
+
+        if self.background is None:
+            self.background = small
+            return False
+
+        diff = cv2.absdiff(small, self.background)
+        self.changed = float(np.count_nonzero(diff > 25)) / diff.size
+        if self.changed >= self.threshold:
+            self._present_until = now + self.hold
+        present = now < self._present_until
+
+        # Learn the empty lane quickly, a stopped vehicle only very slowly
+        rate = self.learn_rate if not present else self.learn_rate / 20
+        cv2.accumulateWeighted(small, self.background, rate)
+        return present
+
+    def extend(self, now=None):
+        """Keep the lane occupied (e.g. after a successful plate read)"""
+        now = time.monotonic() if now is None else now
+        self._present_until = max(self._present_until, now + self.hold)
+
+
+class LaneRecognizer:
+    """
+    Background recognition loop for one registered camera
+    """
+
+    def __init__(self, name, registry, process_fn, pipeline=None):
+        self.name = name
+        self.registry = registry
+        self.process_fn = process_fn
+        self.pipeline = pipeline
+        self.presence = PresenceDetector()
+        self.present = False
+        self.track_id = 0
+        self._track_plate = None
+
+        self._lock = threading.Lock()
+        self._latest = None
+        self._stop_event = threading.Event()
+        self._thread = None
+
+        # Stats
+        self.frames_checked = 0
+        self.recognitions = 0
+        self.reads = 0
+        self.skipped_busy = 0
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._run, name=f'continuous-{self.name}', daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(5.0)
+            self._thread = None
+
+    def _run(self):
+        last_seq = 0
+        last_run = 0.0
+        idle_interval = 1.0 / config.CONTINUOUS_IDLE_FPS if config.CONTINUOUS_IDLE_FPS > 0 else 0.5
+
+        while not self._stop_event.is_set():
+            worker = self.registry.get(self.name)
+            if worker is None:
+                return
+            seq, frame, frame_time = worker.get_latest(newer_than=last_seq, timeout=1.0)
+            if frame is None:
+                continue
+            last_seq = seq
+            self.frames_checked += 1
+
+            now = time.monotonic()
+            present = self.presence.update(frame, now)
+            if present != self.present:
+                self._track_changed(present)
+            if not self.present:
+                self._stop_event.wait(idle_interval)
+                continue
+
+            wait = last_run + get_governor().continuous_interval(config.CONTINUOUS_INTERVAL) - now
+            if wait > 0:
+                self._stop_event.wait(wait)
+                continue
+            last_run = now
+            self._recognize(worker, frame, frame_time)
+
+    def _track_changed(self, present):
+        """Vehicle arrived in / left the lane"""
+        self.present = present
+        if present:
+            self.track_id += 1
+            self._track_plate = None
+        self._publish_track('arrived' if present else 'left')
+
+    def _publish_track(self, state, result=None):
+        data = {
+            'camera': self.name,
+            'trackId': self.track_id,
+            'state': state,
+            'licensePlate': self._track_plate,
+            'timestamp': datetime.now().isoformat()
+        }
+        if result is not None:
+            data['confidence'] = result.get('confidence', 0)
+        publish(TRACK, data)
+
+    def _recognize(self, worker, frame, frame_time):
+        scheduler = self.registry.scheduler
+        # Speculative work yields to requests that are already waiting, and
+        # to uploads / Pi Camera recognitions that run outside the scheduler
+        # (and to exit lanes, for entry lanes). The frame is stale after
+        # waiting, so it is skipped and the next one is taken
+        name = priority.lane_class(self.name)
+        gate = priority.get_priority_gate()
+        if scheduler.pending():
+            self.skipped_busy += 1
+            return
+        if gate.busy_above(name):
+            gate.wait_turn(name)
+            self.skipped_busy += 1
+            return
+        if self.pipeline is not None:
+            payload = {'lane': self, 'worker': worker, 'frame': frame,
+                       'frameTime': frame_time, 'started': time.monotonic()}
+            if not self.pipeline.submit(payload):
+                self.skipped_busy += 1
+            return
+        try:
+            future = scheduler.submit(f'{self.name}:continuous', self.process_fn, frame)
+            result = future.result(timeout=config.INFERENCE_TIMEOUT)
+        except SchedulerBusyError:
+            self.skipped_busy += 1
+            return
+        except Exception as e:
+            print(f"⚠️ Continuous recognition failed for '{self.name}': {e}")
+            return
+
+        worker.inference_latency.add(future.run_time)
+        self.handle_result(result, frame, frame_time)
+
+    def handle_result(self, result, frame, frame_time):
+        """Count, cache and publish a background recognition result"""
+        self.recognitions += 1
+        if result.get('success'):
+            self.reads += 1
+            self.presence.extend()
+            self.store(result, frame, frame_time)
+            if result['licensePlate'] != self._track_plate:
+                self._track_plate = result['licensePlate']
+                self._publish_track('updated', result)
+
+    def store(self, result, frame, frame_time):
+        """Cache a successful read (also used for synchronous fallbacks)"""
+        entry = dict(result)
+        entry['camera'] = self.name
+        entry['frame'] = frame
+        entry['frameTime'] = frame_time or datetime.now()
+        entry['recognizedAt'] = datetime.now()
+        with self._lock:
+            self._latest = entry
+
+    def latest(self, max_age):
+        """
+        Newest cached read no older than max_age seconds (by frame time)
+
+        Returns:
+            dict: Cached result with 'age', or None
+        """
+        with self._lock:
+            entry = self._latest
+        if entry is None:
+            return None
+        age = (datetime.now() - entry['frameTime']).total_seconds()
+        if age > max_age:
+            return None
+        entry = dict(entry)
+        entry['age'] = age
+        return entry
+
+    def get_stats(self):
+        with self._lock:
+            latest = self._latest
+        return {
+            'camera': self.name,
+            'vehiclePresent': self.present,
+            'trackId': self.track_id,
+            'changedFraction': round(self.presence.changed, 4),
+            'framesChecked': self.frames_checked,
+            'recognitions': self.recognitions,
+            'reads': self.reads,
+            'skippedBusy': self.skipped_busy,
+            'latestPlate': latest['licensePlate'] if latest else None,
+            'latestFrameTime': latest['frameTime'].isoformat() if latest else None
+        }
+
+
+class ContinuousRecognizer:
+    """
+    Runs a LaneRecognizer for each configured camera
+    """
+
+    def __init__(self, registry=None, cameras=None):
+        self.registry = registry or get_camera_registry()
+        self.cameras = config.CONTINUOUS_CAMERAS if cameras is None else cameras
+        self.lanes = {}
+        self.pipeline = None
+        self._lock = threading.Lock()
+
+    def _camera_names(self):
+        names = [name.strip() for name in self.cameras.split(',') if name.strip()]
+        if names == ['all']:
+            return self.registry.names()
+        return [name for name in names if name in self.registry.names()]
+
+    def start(self, process_fn, stages=None):
+        """
+        Start background recognition
+
+        Args:
+            process_fn (callable): Frame -> recognition result dict
+            stages (tuple): Optional (detect_fn, read_fn) split of
+                process_fn, run as a staged pipeline when LP_PIPELINE_FRAMES > 0
+        """
+        with self._lock:
+            if stages is not None and config.PIPELINE_FRAMES > 0 and self.pipeline is None:
+                self.pipeline = self._build_pipeline(*stages)
+            for name in self._camera_names():
+                if name in self.lanes:
+                    continue
+                lane = LaneRecognizer(name, self.registry, process_fn, self.pipeline)
+                self.lanes[name] = lane
+                lane.start()
+                print(f"🔁 Continuous recognition enabled for '{name}'")
+
+    @staticmethod
+    def _build_pipeline(detect_fn, read_fn):
+        """detect -> OCR -> publish, shared by all lanes"""
+        from stage_pipeline import Stage, StagePipeline
+
+        gate = priority.get_priority_gate()
+
+        def detect(payload):
+            # Frames already in flight wait for higher class work that
+            # started after they were submitted. Latency is recorded once
+            # per frame, when OCR finishes
+            gate.wait_turn(priority.lane_class(payload['lane'].name))
+            with gate.track(priority.lane_class(payload['lane'].name), record=False):
+                payload['image'], payload['plates'] = detect_fn(payload['frame'])
+            return payload
+
+        def read(payload):
+            with gate.track(priority.lane_class(payload['lane'].name), started=payload['started']):
+                payload['result'] = read_fn(payload['image'], payload['plates'])
+            return payload
+
+        def publish(payload):
+            payload['worker'].inference_latency.add(time.monotonic() - payload['started'])
+            payload['lane'].handle_result(payload['result'], payload['frame'], payload['frameTime'])
+            return payload
+
+        pipeline = StagePipeline([
+            Stage('detect', detect),
+            Stage('ocr', read, workers=config.PIPELINE_OCR_WORKERS),
+            Stage('publish', publish)
+        ], max_in_flight=config.PIPELINE_FRAMES, name='continuous')
+        pipeline.start()
+        print(f"🧵 Continuous recognition pipelined ({config.PIPELINE_FRAMES} frames in flight)")
+        return pipeline
+
+    def stop(self):
+        with self._lock:
+            lanes = list(self.lanes.values())
+            self.lanes = {}
+            pipeline, self.pipeline = self.pipeline, None
+        for lane in lanes:
+            lane.stop()
+        if pipeline is not None:
+            pipeline.stop()
+
+    def get_lane(self, name):
+        with self._lock:
+            return self.lanes.get(name)
+
+    def default_camera(self):
+        """First continuously recognized camera (None if none)"""
+        with self._lock:
+            return next(iter(self.lanes), None)
+
+    def get_stats(self):
+        with self._lock:
+            lanes = list(self.lanes.values())
+        return [lane.get_stats() for lane in lanes]
+
+    def get_pipeline_stats(self):
+        """Stage statistics (None when not pipelined)"""
+        with self._lock:
+            pipeline = self.pipeline
+        return pipeline.get_stats() if pipeline is not None else None
+
+
+# Singleton instance
+_continuous_instance = None
+
+
+def get_continuous_recognizer():
+    """
+    Get singleton continuous recognizer
+
+    Returns:
+        ContinuousRecognizer: Singleton instance
+    """
+    global _continuous_instance
+    if _continuous_instance is None:
+        _continuous_instance = ContinuousRecognizer()
+    return _continuous_instance
@@ -0,0 +1,175 @@
+"""
+Event hub for Server-Sent Events
+Recognition results, lane track updates and camera status changes are
+published here and fanned out to /api/events subscribers
+
+Each subscriber has its own bounded queue: when a client reads too slowly
+its oldest events are dropped, so publishing never blocks the pipeline
+"""
+import itertools
+import json
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+import config
+
+RECOGNITION = 'recognition'
+TRACK = 'track'
+CAMERA = 'camera'
+
+
+class Subscriber:
+    """
+    One connected client: bounded queue with drop-oldest semantics
+    """
+
+    def __init__(self, types=None, max_queue=None):
+        self.types = set(types) if types else None
+        self.queue = deque(maxlen=max_queue or config.EVENTS_QUEUE_SIZE)
+        self.dropped = 0
+        self.delivered = 0
+        self.connected_at = datetime.now()
+        self._cond = threading.Condition()
+
+    def wants(self, event_type):
+        return self.types is None or event_type in self.types
+
+    def push(self, event):
+        with self._cond:
+            if len(self.queue) == self.queue.maxlen:
+                self.dropped += 1
+            self.queue.append(event)
+            self._cond.notify()
+
+    def get(self, timeout=None):
+        """
+        Wait for events
+
+        Returns:
+            list: Queued events (empty on timeout)
+        """
+        with self._cond:
+            if not self.queue:
+                self._cond.wait(timeout)
+            events = list(self.queue)
+            self.queue.clear()
+        self.delivered += len(events)
+        return events
+
+
+class EventHub:
+    """
+    Publish/subscribe fan-out with a short replay history for reconnects
+    """
+
+    def __init__(self, max_clients=None, history=None):
+        self.max_clients = max_clients or config.EVENTS_MAX_CLIENTS
+        self._history = deque(maxlen=history or config.EVENTS_HISTORY)
+        self._subscribers = []
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self.published = 0
+
+    def publish(self, event_type, data):
+        """
+        Publish event to all interested subscribers (never blocks on clients)
+
+        Args:
+            event_type (str): 'recognition', 'track' or 'camera'
+            data (dict): JSON serializable payload
+
+        Returns:
+            int: Event id
+        """
+        with self._lock:
+            event = {
+                'id': next(self._ids),
+                'type': event_type,
+                'time': time.time(),
+                'data': data
+            }
+            self._history.append(event)
+            self.published += 1
+            # Delivered under the lock (push never blocks), so every
+            # subscriber sees events in id order
+            for subscriber in self._subscribers:
+                if subscriber.wants(event_type):
+                    subscriber.push(event)
+        return event['id']
+
+    def subscribe(self, types=None, last_event_id=None, max_queue=None):
+        """
+        Register a client
+
+        Args:
+            types (list): Event types to receive (None = all)
+            last_event_id (int): Replay newer events still in history
+            max_queue (int): Per-client queue size
+
+        Returns:
+            Subscriber: New subscriber, or None when max clients reached
+        """
+        subscriber = Subscriber(types, max_queue)
+        with self._lock:
+            if len(self._subscribers) >= self.max_clients:
+                return None
+            # Replay is queued before the subscriber is registered, under the
+            # same lock as publish, so no live event can overtake it
+            if last_event_id is not None:
+                for event in self._history:
+                    if event['id'] > last_event_id and subscriber.wants(event['type']):
+                        subscriber.push(event)
+            self._subscribers.append(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            if subscriber in self._subscribers:
+                self._subscribers.remove(subscriber)
+
+    def get_stats(self):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        return {
+            'published': self.published,
+            'clients': [{
+                'types': sorted(s.types) if s.types else None,
+                'queued': len(s.queue),
+                'delivered': s.delivered,
+                'dropped': s.dropped,
+                'connectedAt': s.connected_at.isoformat()
+            } for s in subscribers]
+        }
+
+
+def format_sse(event):
+    """Serialize event in text/event-stream format"""
+    return (f"id: {event['id']}\n"
+            f"event: {event['type']}\n"
+            f"data: {json.dumps(event['data'], default=str)}\n\n")
+
+
+# Singleton instance
+_hub_instance = None
+_hub_lock = threading.Lock()
+
+
+def get_event_hub():
+    """
+    Get singleton event hub
+
+    Returns:
+        EventHub: Singleton instance
+    """
+    global _hub_instance
+    with _hub_lock:
+        if _hub_instance is None:
+            _hub_instance = EventHub()
+    return _hub_instance
+
+
+def publish(event_type, data):
+    """Publish on the singleton hub"""
+    return get_event_hub().publish(event_type, data)
@@ -0,0 +1,271 @@
+"""
+Deterministic stand-ins for the YOLOv5 detector and OCR models
+Selected with LP_MODEL_BACKEND=fake: no .pt weights, torch.hub download or
+torch needed, so everything around the models (decode, crop, read_plate,
+encoding, HTTP) can be tested and timed on any machine
+
+Both models take the same calls as the AutoShape models (model(img, size=...))
+and return rows of [xmin, ymin, xmax, ymax, confidence, class, name] through
+tolist(), like the lean path. Outputs are generated from the image content
+(same image, same answer) or replayed from a LP_FAKE_SCRIPT file. Simulated
+inference time is LP_FAKE_DETECT_MS / LP_FAKE_OCR_MS, scaled with the
+square of the input size like a real convolutional network
+"""
+import json
+import random
+import threading
+import time
+import zlib
+
+import numpy as np
+
+import config
+
+# Input size the simulated latencies are given for
+REFERENCE_SIZE = 640
+
+# Plate text generated for a seed: province digits, series letter(s),
+# number (Vietnamese format, 8 or 9 characters)
+DIGITS = '0123456789'
+LETTERS = 'ABCDEFGHKLMNPSTUVXYZ'
+
+# Plate box as a fraction of the image width, and width/height ratios of
+# one-line and two-line plates
+PLATE_WIDTH = (0.18, 0.32)
+ONE_LINE_ASPECT = 4.3
+TWO_LINE_ASPECT = 1.35
+
+
+def image_seed(img):
+    """
+    Seed from the image content (a sparse pixel sample, so hashing stays
+    cheap next to the simulated inference)
+    """
+    img = np.asarray(img)
+    if img.size == 0:
+        return 0
+    sample = np.ascontiguousarray(img[::16, ::16])
+    return zlib.crc32(sample.tobytes()) ^ (img.shape[0] << 16) ^ img.shape[1]
+
+
+def is_miss(seed, miss_rate):
+    """True if the image with this seed has no readable plate"""
+    return random.Random(seed).random() < miss_rate
+
+
+def plate_text(seed):
+    """
+    Plate number for a seed; two-line plates use '-' between the lines
+    (the way helper.read_plate joins them)
+    """
+    rng = random.Random(seed)
+    province = ''.join(rng.choice(DIGITS) for _ in range(2))
+    series = rng.choice(LETTERS) + rng.choice(DIGITS + LETTERS[:3])
+    number = ''.join(rng.choice(DIGITS) for _ in range(rng.choice((4, 5))))
+    if rng.random() < 0.5:
+        return f'{province}{series}-{number}'
+    return f'{province}{series[0]}{number}'
+
+
+class FakeDetections:
+    """Result of a fake model call (rows via tolist(), like the lean path)"""
+    __slots__ = ('rows',)
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    def tolist(self):
+        return [list(row) for row in self.rows]
+
+    def __len__(self):
+        return len(self.rows)
+
+
+class FakeModel:
+    """
+    Shared behaviour: simulated latency, call counters, script replay
+
+    Attributes:
+        conf (float): Confidence threshold (rows below it are dropped)
+        calls (int): Number of calls
+        simulated_ms (float): Total simulated inference time
+    """
+
+    def __init__(self, latency_ms, miss_rate=None, jitter=None, busy=None, script=None):
+        """
+        Args:
+            latency_ms (float): Simulated time per call at REFERENCE_SIZE
+            miss_rate (float): Fraction of images without a readable plate
+                (LP_FAKE_MISS_RATE); the detector and OCR miss the same images
+            jitter (float): +/- fraction of random variation (LP_FAKE_JITTER)
+            busy (bool): Spin the CPU instead of sleeping, so the fake model
+                competes for CPU like a real one (LP_FAKE_BUSY)
+            script (list): Outputs replayed in order instead of generated ones
+        """
+        self.latency_ms = latency_ms
+        self.miss_rate = config.FAKE_MISS_RATE if miss_rate is None else miss_rate
+        self.jitter = config.FAKE_JITTER if jitter is None else jitter
+        self.busy = config.FAKE_BUSY if busy is None else busy
+        self.script = script or []
+        self.conf = 0.25
+        self.calls = 0
+        self.simulated_ms = 0.0
+        self._lock = threading.Lock()
+        self._rng = random.Random(0)
+
+    def _next_script_entry(self):
+        with self._lock:
+            entry = self.script[self.calls % len(self.script)]
+            self.calls += 1
+        return entry
+
+    def _count(self):
+        with self._lock:
+            self.calls += 1
+
+    def _simulate(self, size):
+        """Sleep (or spin) for the simulated inference time"""
+        ms = self.latency_ms
+        if size:
+            ms *= (size / REFERENCE_SIZE) ** 2
+        if self.jitter:
+            with self._lock:
+                ms *= 1.0 + self._rng.uniform(-self.jitter, self.jitter)
+        if ms <= 0:
+            return
+        with self._lock:
+            self.simulated_ms += ms
+        if self.busy:
+            end = time.perf_counter() + ms / 1000.0
+            while time.perf_counter() < end:
+                pass
+        else:
+            time.sleep(ms / 1000.0)
+
+    def get_stats(self):
+        return {'calls': self.calls, 'simulatedMs': round(self.simulated_ms, 1)}
+
+
+class FakePlateDetector(FakeModel):
+    """
+    Finds one plate per image: a box placed from the image content, or the
+    boxes of the next script entry ({"plates": [[x1, y1, x2, y2, conf], ...]}
+    in fractions of the image size)
+    """
+
+    def __init__(self, latency_ms=None, **kwargs):
+        """
+        Args:
+            latency_ms (float): LP_FAKE_DETECT_MS
+        """
+        super().__init__(config.FAKE_DETECT_MS if latency_ms is None else latency_ms, **kwargs)
+
+    def __call__(self, img, size=None):
+        img = np.asarray(img)
+        height, width = img.shape[:2]
+        if self.script:
+            entry = self._next_script_entry()
+            rows = [[box[0] * width, box[1] * height, box[2] * width, box[3] * height,
+                     box[4] if len(box) > 4 else 0.9, 0, 'license_plate']
+                    for box in entry.get('plates', [])]
+        else:
+            self._count()
+            rows = self._generate(img, width, height)
+        self._simulate(size)
+        return FakeDetections([row for row in rows if row[4] >= self.conf])
+
+    def _generate(self, img, width, height):
+        seed = image_seed(img)
+        if is_miss(seed, self.miss_rate):
+            return []
+        rng = random.Random(seed + 1)
+        two_line = '-' in plate_text(seed)
+        w = width * rng.uniform(*PLATE_WIDTH)
+        h = w / (TWO_LINE_ASPECT if two_line else ONE_LINE_ASPECT)
+        w, h = min(w, width), min(h, height)
+        x1 = rng.uniform(0, width - w)
+        y1 = rng.uniform(height * 0.3, max(height * 0.3, height - h))
+        return [[x1, y1, x1 + w, y1 + h, round(rng.uniform(0.7, 0.95), 4), 0, 'license_plate']]
+
+
+class FakeCharacterReader(FakeModel):
+    """
+    Returns one box per character of a plate number, laid out on one or two
+    lines the way helper.read_plate expects. The number comes from the crop
+    content, or from the next script entry ({"text": "59A1-23456"})
+    """
+
+    def __init__(self, latency_ms=None, **kwargs):
+        """
+        Args:
+            latency_ms (float): LP_FAKE_OCR_MS
+        """
+        super().__init__(config.FAKE_OCR_MS if latency_ms is None else latency_ms, **kwargs)
+
+    def __call__(self, img, size=None):
+        img = np.asarray(img)
+        height, width = img.shape[:2]
+        if self.script:
+            text = self._next_script_entry().get('text') or ''
+        else:
+            self._count()
+            seed = image_seed(img)
+            text = '' if width == 0 or height == 0 or is_miss(seed, self.miss_rate) else plate_text(seed)
+        self._simulate(size)
+        rows = [row for row in self.layout(text, width, height) if row[4] >= self.conf]
+        return FakeDetections(rows)
+
+    @staticmethod
+    def layout(text, width, height):
+        """
+        Character boxes for text ('-' splits a two-line plate)
+
+        Returns:
+            list: Rows of [xmin, ymin, xmax, ymax, confidence, class, name]
+        """
+        lines = [line for line in text.split('-') if line]
+        rows = []
+        for index, line in enumerate(lines):
+            # Character centres of a line share one y (read_plate checks
+            # that centres lie on a straight line within 3 px)
+            y_center = height * (index + 0.5) / len(lines)
+            box_h = height * 0.8 / len(lines)
+            step = width / (len(line) + 1)
+            for position, char in enumerate(line):
+                x_center = step * (position + 1)
+                rows.append([x_center - step * 0.4, y_center - box_h / 2,
+                             x_center + step * 0.4, y_center + box_h / 2,
+                             0.9, 0, char])
+        return rows
+
+
+def load_script(path=None):
+    """
+    Read a LP_FAKE_SCRIPT file: a JSON list of
+    {"plates": [[x1, y1, x2, y2, conf], ...], "text": "59A1-23456"} entries,
+    replayed in order (the detector uses "plates", OCR uses "text")
+
+    Returns:
+        list: Entries, or [] when no script is configured
+    """
+    path = config.FAKE_SCRIPT if path is None else path
+    if not path:
+        return []
+    with open(path) as f:
+        script = json.load(f)
+    if not isinstance(script, list):
+        raise ValueError(f'{path}: expected a JSON list of entries')
+    return script
+
+
+def load_models():
+    """
+    Fake detector and OCR model configured from LP_FAKE_*
+
+    Returns:
+        tuple: (FakePlateDetector, FakeCharacterReader)
+    """
+    script = load_script()
+    detector = FakePlateDetector(script=[entry for entry in script if 'plates' in entry])
+    reader = FakeCharacterReader(script=[entry for entry in script if 'text' in entry])
+    return detector, reader
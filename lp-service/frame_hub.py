@@ -0,0 +1,231 @@
+"""
+Encode-once frame broadcast
+A single producer thread captures and JPEG-encodes each preview frame once
+and publishes it as an immutable, versioned buffer. Any number of viewers
+read the latest buffer without taking the capture lock, optionally waiting
+for a version newer than the one they already have. Capture and encoding
+pause while nobody is reading, yield to running plate recognitions and slow
+down (lower fps and JPEG quality) while recognition is over its latency
+target (priority.py) or the device runs hot (thermal_governor.py)
+"""
+import base64
+import threading
+import time
+from datetime import datetime
+
+import config
+from frame_pipeline import as_frame
+from priority import PREVIEW, get_priority_gate
+from thermal_governor import get_governor
+
+
+class EncodedFrame:
+    """
+    One published frame (never modified after publishing)
+
+    Attributes:
+        version (int): Increases by one per published frame
+        jpeg (bytes): Encoded frame
+        data_url (str): 'data:image/jpeg;base64,...' built once for all viewers
+        timestamp (datetime): Capture time
+        frame: Raw Frame (for recording / recognition, do not modify)
+    """
+    __slots__ = ('version', 'jpeg', 'data_url', 'timestamp', 'frame')
+
+    def __init__(self, version, jpeg, timestamp, frame=None):
+        self.version = version
+        self.jpeg = jpeg
+        self.data_url = 'data:image/jpeg;base64,' + base64.b64encode(jpeg).decode('ascii')
+        self.timestamp = timestamp
+        self.frame = frame
+
+
+class FrameHub:
+    """
+    Single producer, many consumers
+
+    Usage:
+        hub = FrameHub(camera.capture_raw)
+        hub.start()
+        frame = hub.get(newer_than=last_version, timeout=1.0)
+    """
+
+    def __init__(self, capture_fn, fps=None, idle_timeout=None, on_frame=None, name='preview'):
+        """
+        Args:
+            capture_fn (callable): Returns a Frame (or None on failure)
+            fps (float): Maximum frames published per second (LP_PREVIEW_FPS)
+            idle_timeout (float): Seconds without a reader before capture
+                pauses (LP_PREVIEW_IDLE_TIMEOUT)
+            on_frame (callable): Called with each captured Frame (e.g. recording)
+        """
+        self.capture_fn = capture_fn
+        self.fps = config.PREVIEW_FPS if fps is None else fps
+        self.idle_timeout = config.PREVIEW_IDLE_TIMEOUT if idle_timeout is None else idle_timeout
+        self.on_frame = on_frame
+        self.name = name
+
+        self._cond = threading.Condition()
+        self._latest = None
+        self._version = 0
+        self._resume_version = 0
+        self._last_read = 0.0
+        self._paused = True
+        self._running = False
+        self._thread = None
+
+        # Stats
+        self.frames_encoded = 0
+        self.frames_served = 0
+        self.capture_errors = 0
+        self.encode_ms = 0.0
+        self.degraded_frames = 0
+        self.current_fps = self.fps
+        self.jpeg_quality = None
+
+    def start(self):
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+        self._thread = threading.Thread(target=self._run, name=f'frame-hub-{self.name}', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(5.0)
+            self._thread = None
+
+    @property
+    def paused(self):
+        return self._paused
+
+    def _wait_for_viewers(self):
+        """Block while nobody has read recently; False when stopping"""
+        with self._cond:
+            while self._running and time.monotonic() - self._last_read > self.idle_timeout:
+                if not self._paused:
+                    self._paused = True
+                    print(f"⏸️ Frame hub '{self.name}' paused (no viewers)")
+                self._cond.wait()
+            if self._running and self._paused:
+                self._paused = False
+                self._resume_version = self._version
+                print(f"▶️ Frame hub '{self.name}' resumed")
+            return self._running
+
+    def _run(self):
+        gate = get_priority_gate()
+        governor = get_governor()
+        while self._wait_for_viewers():
+            # Plate recognition goes first: wait for running recognitions
+            # and follow the degraded rate/quality while it is over target
+            gate.wait_turn(PREVIEW)
+            fps, quality = gate.preview_settings(governor.preview_fps(self.fps))
+            self.current_fps, self.jpeg_quality = fps, quality
+            interval = 1.0 / fps if fps > 0 else 0.0
+            started = time.monotonic()
+            with gate.track(PREVIEW):
+                published = self._capture_and_publish(quality)
+            if published is None:
+                time.sleep(0.1)
+                continue
+            if quality is not None:
+                self.degraded_frames += 1
+
+            remaining = interval - (time.monotonic() - started)
+            if remaining > 0:
+                time.sleep(remaining)
+
+    def _capture_and_publish(self, quality):
+        """
+        Capture, encode and publish one frame
+
+        Returns:
+            bool: True if published, False if encoding failed, None if
+            capture failed
+        """
+        try:
+            frame = self.capture_fn()
+        except Exception as e:
+            print(f"⚠️ Frame hub '{self.name}' capture failed: {e}")
+            frame = None
+        if frame is None:
+            self.capture_errors += 1
+            return None
+        frame = as_frame(frame)
+        if self.on_frame is not None:
+            self.on_frame(frame)
+
+        t0 = time.perf_counter()
+        jpeg = frame.encode_jpeg(quality)
+        if jpeg is None:
+            self.capture_errors += 1
+            return False
+        with self._cond:
+            self._version += 1
+            self._latest = EncodedFrame(self._version, jpeg.tobytes(), datetime.now(), frame)
+            self.frames_encoded += 1
+            self.encode_ms = (time.perf_counter() - t0) * 1000.0
+            self._cond.notify_all()
+        return True
+
+    def get(self, newer_than=None, timeout=None):
+        """
+        Latest frame, marking the hub as watched
+
+        Args:
+            newer_than (int): Wait until a frame with a higher version is
+                published (None = any frame captured since the hub last
+                resumed)
+            timeout (float): Maximum wait (LP_PREVIEW_WAIT)
+
+        Returns:
+            EncodedFrame: Newest frame (possibly not newer than newer_than
+            when the wait timed out), or None if none was published yet
+        """
+        timeout = config.PREVIEW_WAIT if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            self._last_read = time.monotonic()
+            if self._paused:
+                self._cond.notify_all()
+            if newer_than is None:
+                # Frames from before a pause are stale
+                newer_than = self._version if self._paused else self._resume_version
+            while self._running and (self._latest is None or self._latest.version <= newer_than):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            latest = self._latest
+            if latest is not None:
+                self.frames_served += 1
+            return latest
+
+    def latest(self):
+        """Newest frame without waiting or counting as a viewer"""
+        return self._latest
+
+    def get_stats(self):
+        latest = self._latest
+        served = self.frames_served
+        return {
+            'running': self._running,
+            'paused': self._paused,
+            'version': latest.version if latest else 0,
+            'framesEncoded': self.frames_encoded,
+            'framesServed': served,
+            # > 1 means viewers share encoded frames
+            'servedPerEncode': round(served / self.frames_encoded, 2) if self.frames_encoded else 0.0,
+            'captureErrors': self.capture_errors,
+            'lastEncodeMs': round(self.encode_ms, 1),
+            'jpegBytes': len(latest.jpeg) if latest else 0,
+            # Lowered while recognition is over its latency target
+            'fps': self.current_fps,
+            'jpegQuality': self.jpeg_quality,
+            'degradedFrames': self.degraded_frames
+        }
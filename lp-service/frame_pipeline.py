@@ -0,0 +1,243 @@
+"""
+Frame pipeline
+Tracks the pixel format of a frame through capture -> inference -> encoding
+and converts only when a consumer needs a different format. A Frame owns its
+conversion buffers; release() hands them back to a pool so the next frame
+converts into them instead of allocating a new image
+"""
+import threading
+import time
+
+import cv2
+import numpy as np
+
+# Supported pixel formats (memory order of the channels)
+BGR = 'BGR'
+RGB = 'RGB'
+GRAY = 'GRAY'
+
+_CONVERSIONS = {
+    (RGB, BGR): cv2.COLOR_RGB2BGR,
+    (BGR, RGB): cv2.COLOR_BGR2RGB,
+    (BGR, GRAY): cv2.COLOR_BGR2GRAY,
+    (RGB, GRAY): cv2.COLOR_RGB2GRAY,
+    (GRAY, BGR): cv2.COLOR_GRAY2BGR,
+    (GRAY, RGB): cv2.COLOR_GRAY2RGB,
+}
+
+
+def normalize_format(fmt):
+    """Validate and upper-case a pixel format name"""
+    fmt = (fmt or BGR).upper()
+    if fmt not in (BGR, RGB, GRAY):
+        raise ValueError(f'Unsupported pixel format: {fmt}')
+    return fmt
+
+
+class FrameStats:
+    """
+    Counts allocations and bytes copied by the frame pipeline
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.frames = 0
+            self.allocations = 0
+            self.bytes_allocated = 0
+            self.copies = 0
+            self.bytes_copied = 0
+            self.conversions_skipped = 0
+            self.buffers_reused = 0
+
+    def add_frame(self):
+        with self._lock:
+            self.frames += 1
+
+    def add_allocation(self, nbytes):
+        with self._lock:
+            self.allocations += 1
+            self.bytes_allocated += nbytes
+
+    def add_copy(self, nbytes):
+        with self._lock:
+            self.copies += 1
+            self.bytes_copied += nbytes
+
+    def add_skipped(self):
+        with self._lock:
+            self.conversions_skipped += 1
+
+    def add_reuse(self):
+        with self._lock:
+            self.buffers_reused += 1
+
+    def to_dict(self):
+        with self._lock:
+            frames = max(self.frames, 1)
+            return {
+                'frames': self.frames,
+                'allocations': self.allocations,
+                'bytesAllocated': self.bytes_allocated,
+                'copies': self.copies,
+                'bytesCopied': self.bytes_copied,
+                'conversionsSkipped': self.conversions_skipped,
+                'buffersReused': self.buffers_reused,
+                'allocationsPerFrame': round(self.allocations / frames, 2),
+                'bytesCopiedPerFrame': int(self.bytes_copied / frames)
+            }
+
+
+class BufferPool:
+    """
+    Pool of reusable image buffers keyed by (shape, dtype)
+
+    Only buffers explicitly handed back with release() are reused; a buffer
+    that is never released is left to the garbage collector, so pixels that
+    a consumer (or a view of them) still holds are never overwritten
+    """
+
+    def __init__(self, stats=None, max_per_shape=4):
+        self.stats = stats
+        self.max_per_shape = max_per_shape
+        self._free = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, shape, dtype=np.uint8):
+        """Get a buffer of the given shape (contents undefined)"""
+        key = (tuple(shape), np.dtype(dtype).str)
+        with self._lock:
+            free = self._free.get(key)
+            if free:
+                buf = free.pop()
+                if self.stats:
+                    self.stats.add_reuse()
+                return buf
+        buf = np.empty(shape, dtype=dtype)
+        if self.stats:
+            self.stats.add_allocation(buf.nbytes)
+        return buf
+
+    def release(self, buf):
+        """
+        Hand a buffer from acquire() back for reuse; neither the caller nor
+        anyone it shared the buffer (or views of it) with may use it afterwards
+        """
+        key = (buf.shape, buf.dtype.str)
+        with self._lock:
+            free = self._free.setdefault(key, [])
+            if len(free) < self.max_per_shape and not any(b is buf for b in free):
+                free.append(buf)
+
+    def clear(self):
+        with self._lock:
+            self._free.clear()
+
+
+# Shared stats and pool for the whole process
+frame_stats = FrameStats()
+buffer_pool = BufferPool(frame_stats)
+
+
+class Frame:
+    """
+    Image plus the pixel format of its memory
+
+    Conversions are cached, so asking for the same format twice (e.g. for
+    inference and then for JPEG encoding) converts only once. The frame owns
+    the conversion buffers: release() (or leaving a with block) returns them
+    to the pool once no consumer needs the frame any more. Frames shared
+    between consumers are simply not released
+    """
+
+    def __init__(self, data, fmt=BGR, timestamp=None, pool=None, stats=None):
+        self.data = data
+        self.format = normalize_format(fmt)
+        self.timestamp = timestamp if timestamp is not None else time.time()
+        self.pool = pool if pool is not None else buffer_pool
+        self.stats = stats if stats is not None else frame_stats
+        self._views = {self.format: data}
+        self._owned = []
+        self.stats.add_frame()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+    @property
+    def shape(self):
+        return self.data.shape
+
+    def as_format(self, fmt):
+        """
+        Get frame in the requested pixel format
+
+        Args:
+            fmt (str): 'BGR', 'RGB' or 'GRAY'
+
+        Returns:
+            numpy.ndarray: Image in that format (shared, do not modify)
+        """
+        fmt = normalize_format(fmt)
+        cached = self._views.get(fmt)
+        if cached is not None:
+            if fmt == self.format:
+                self.stats.add_skipped()
+            return cached
+
+        code = _CONVERSIONS[(self.format, fmt)]
+        height, width = self.data.shape[:2]
+        shape = (height, width) if fmt == GRAY else (height, width, 3)
+        dst = self.pool.acquire(shape, self.data.dtype)
+        cv2.cvtColor(self.data, code, dst=dst)
+        self.stats.add_copy(dst.nbytes)
+        self._views[fmt] = dst
+        self._owned.append(dst)
+        return dst
+
+    def release(self):
+        """
+        Return the conversion buffers to the pool; arrays obtained from
+        as_format() for other formats must not be used afterwards
+        """
+        owned, self._owned = self._owned, []
+        self._views = {self.format: self.data}
+        for buf in owned:
+            self.pool.release(buf)
+
+    def as_bgr(self):
+        return self.as_format(BGR)
+
+    def as_rgb(self):
+        return self.as_format(RGB)
+
+    def encode_jpeg(self, quality=None):
+        """
+        Encode frame as JPEG (OpenCV encoder expects BGR)
+
+        Returns:
+            numpy.ndarray: Encoded bytes, or None if encoding failed
+        """
+        params = [cv2.IMWRITE_JPEG_QUALITY, int(quality)] if quality else []
+        success, buffer = cv2.imencode('.jpg', self.as_bgr(), params)
+        if not success:
+            return None
+        self.stats.add_allocation(buffer.nbytes)
+        return buffer
+
+
+def as_frame(image, fmt=BGR):
+    """Wrap ndarray in a Frame (Frame instances are returned unchanged)"""
+    if isinstance(image, Frame):
+        return image
+    return Frame(image, fmt)
+
+
+def get_frame_stats():
+    """Frame pipeline allocation/copy statistics"""
+    return frame_stats.to_dict()
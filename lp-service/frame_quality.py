@@ -0,0 +1,106 @@
+"""
+Frame quality scoring for burst capture
+Cheap sharpness (Laplacian variance) and exposure (histogram clipping)
+scores, computed in NumPy on a downscaled grayscale copy, used to send
+only the best frames of a burst to the detector
+"""
+import time
+
+import cv2
+import numpy as np
+
+import config
+
+
+def _gray_thumbnail(frame, width):
+    gray = frame.as_format('GRAY') if hasattr(frame, 'as_format') else (
+        cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame)
+    h, w = gray.shape[:2]
+    if w > width:
+        gray = cv2.resize(gray, (width, max(1, h * width // w)), interpolation=cv2.INTER_AREA)
+    return gray
+
+
+def laplacian_variance(gray):
+    """Variance of the 4-neighbour Laplacian (higher = sharper)"""
+    g = gray.astype(np.float32)
+    lap = (g[1:-1, :-2] + g[1:-1, 2:] + g[:-2, 1:-1] + g[2:, 1:-1]) - 4.0 * g[1:-1, 1:-1]
+    return float(lap.var())
+
+
+def clipping(gray, low=None, high=None):
+    """
+    Fraction of under- and over-exposed pixels
+
+    Args:
+        low, high (int): Clipping levels (default: LP_QUALITY_CLIP_LOW/HIGH)
+
+    Returns:
+        tuple: (dark fraction, bright fraction)
+    """
+    low = config.QUALITY_CLIP_LOW if low is None else low
+    high = config.QUALITY_CLIP_HIGH if high is None else high
+    hist = np.bincount(gray.ravel(), minlength=256)
+    total = float(gray.size)
+    return float(hist[:low + 1].sum()) / total, float(hist[high:].sum()) / total
+
+
+def score_frame(frame, width=None):
+    """
+    Score frame quality
+
+    Args:
+        frame: Frame or BGR/grayscale numpy array
+        width (int): Width of the scored thumbnail (default: LP_QUALITY_WIDTH)
+
+    Returns:
+        dict: sharpness, dark, bright, brightness and combined score
+            (sharpness damped by clipped pixels)
+    """
+    gray = _gray_thumbnail(frame, width or config.QUALITY_WIDTH)
+    sharpness = laplacian_variance(gray)
+    dark, bright = clipping(gray)
+    # Headlight glare (bright clipping) hurts OCR more than shadows
+    exposure = max(0.0, 1.0 - 2.0 * bright - dark)
+    return {
+        'sharpness': round(sharpness, 1),
+        'dark': round(dark, 4),
+        'bright': round(bright, 4),
+        'brightness': round(float(gray.mean()), 1),
+        'score': round(sharpness * exposure, 1)
+    }
+
+
+def capture_burst(camera, count, interval=None):
+    """
+    Capture count frames from an open camera
+
+    Args:
+        camera: Camera backend (capture_raw())
+        count (int): Frames to grab
+        interval (float): Seconds between grabs (default: LP_BURST_INTERVAL)
+
+    Returns:
+        list: Captured Frames (failed grabs are skipped)
+    """
+    interval = config.BURST_INTERVAL if interval is None else interval
+    frames = []
+    for i in range(count):
+        if i and interval > 0:
+            time.sleep(interval)
+        frame = camera.capture_raw()
+        if frame is not None:
+            frames.append(frame)
+    return frames
+
+
+def rank_frames(frames):
+    """
+    Score frames, best first
+
+    Returns:
+        list: [(index, Frame, quality dict), ...]
+    """
+    scored = [(i, frame, score_frame(frame)) for i, frame in enumerate(frames)]
+    scored.sort(key=lambda item: item[2]['score'], reverse=True)
+    return scored
@@ -0,0 +1,457 @@
+"""
+Frame recorder
+Writes captured frames (JPEG or raw pixels) with timestamps into a fixed-size
+memory-mapped ring file, so disk usage stays bounded and the last minutes of
+every lane can be replayed through the recognition pipeline when a plate
+read is disputed
+
+File layout:
+    header   64 bytes: magic, version, slot count, slot size, next sequence
+    slots    slot_count x (48 byte slot header + slot_size payload)
+
+Usage:
+    python frame_recorder.py info recording.ring
+    python frame_recorder.py export recording.ring out_dir/
+    python frame_recorder.py replay recording.ring [--speed 4] [--camera entry-1]
+"""
+import argparse
+import mmap
+import os
+import queue
+import struct
+import threading
+import time
+
+import cv2
+import numpy as np
+
+import config
+from camera_backends import CameraBackend
+from frame_pipeline import Frame, BGR, RGB, GRAY
+
+MAGIC = b'LPRING01'
+VERSION = 1
+
+FILE_HEADER = struct.Struct('<8sIIIQ')      # magic, version, slot_count, slot_size, write_seq
+FILE_HEADER_SIZE = 64
+SLOT_HEADER = struct.Struct('<QdIIII16s')   # seq, timestamp, length, kind, width, height, camera
+SLOT_HEADER_SIZE = SLOT_HEADER.size
+
+KIND_JPEG = 0
+KIND_RAW = {BGR: 1, RGB: 2, GRAY: 3}
+RAW_FORMATS = {kind: fmt for fmt, kind in KIND_RAW.items()}
+
+
+def _slot_offset(index, slot_size):
+    return FILE_HEADER_SIZE + index * (SLOT_HEADER_SIZE + slot_size)
+
+
+class FrameRecorder:
+    """
+    Records frames into a memory-mapped ring file
+
+    submit() never blocks the capture path: frames are queued and encoded and
+    written by a background thread; when the queue is full the frame is
+    dropped and counted
+    """
+
+    def __init__(self, path, size_mb=None, slot_kb=None, fmt=None, jpeg_quality=None,
+                 max_fps=None, queue_size=8):
+        self.path = path
+        self.slot_size = (slot_kb or config.RECORD_SLOT_KB) * 1024
+        size = (size_mb or config.RECORD_SIZE_MB) * 1024 * 1024
+        self.slot_count = max(1, (size - FILE_HEADER_SIZE) // (SLOT_HEADER_SIZE + self.slot_size))
+        self.format = (fmt or config.RECORD_FORMAT).lower()
+        self.jpeg_quality = jpeg_quality or config.RECORD_JPEG_QUALITY
+        self.max_fps = config.RECORD_MAX_FPS if max_fps is None else max_fps
+
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._last_submit = {}
+        self._lock = threading.Lock()
+
+        # Stats
+        self.frames_recorded = 0
+        self.frames_dropped = 0
+        self.frames_throttled = 0
+        self.frames_too_large = 0
+        self.bytes_written = 0
+
+        self._open_file()
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name='frame-recorder', daemon=True)
+        self._thread.start()
+        print(f"🎞️ Recording frames to {path} ({self.slot_count} slots x {self.slot_size // 1024} KB)")
+
+    def _open_file(self):
+        total = _slot_offset(self.slot_count, self.slot_size)
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+
+        reuse = False
+        if os.path.exists(self.path) and os.path.getsize(self.path) == total:
+            with open(self.path, 'rb') as f:
+                magic, version, slot_count, slot_size, write_seq = FILE_HEADER.unpack(
+                    f.read(FILE_HEADER.size))
+            reuse = (magic == MAGIC and version == VERSION
+                     and slot_count == self.slot_count and slot_size == self.slot_size)
+
+        self._file = open(self.path, 'r+b' if reuse else 'w+b')
+        if not reuse:
+            self._file.truncate(total)
+            write_seq = 1
+        self._mm = mmap.mmap(self._file.fileno(), total)
+        self.write_seq = write_seq
+        self._write_file_header()
+
+    def _write_file_header(self):
+        FILE_HEADER.pack_into(self._mm, 0, MAGIC, VERSION, self.slot_count,
+                              self.slot_size, self.write_seq)
+
+    def submit(self, frame, camera=''):
+        """
+        Queue frame for recording (never blocks)
+
+        Args:
+            frame: Frame or BGR numpy array
+            camera (str): Camera name stored with the frame
+
+        Returns:
+            bool: True if queued
+        """
+        if not self._running:
+            return False
+        now = time.monotonic()
+        if self.max_fps:
+            with self._lock:
+                last = self._last_submit.get(camera)
+                if last is not None and now - last < 1.0 / self.max_fps:
+                    self.frames_throttled += 1
+                    return False
+                self._last_submit[camera] = now
+        if not isinstance(frame, Frame):
+            frame = Frame(frame, BGR)
+        try:
+            self._queue.put_nowait((frame, camera))
+            return True
+        except queue.Full:
+            self.frames_dropped += 1
+            return False
+
+    def _encode(self, frame):
+        if self.format == 'raw':
+            return KIND_RAW[frame.format], frame.data.tobytes()
+        buffer = frame.encode_jpeg(self.jpeg_quality)
+        return KIND_JPEG, buffer.tobytes() if buffer is not None else None
+
+    def _run(self):
+        while self._running or not self._queue.empty():
+            try:
+                frame, camera = self._queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            try:
+                kind, payload = self._encode(frame)
+                if payload is None:
+                    continue
+                if len(payload) > self.slot_size:
+                    self.frames_too_large += 1
+                    continue
+                self._write_slot(frame, camera, frame.timestamp, kind, payload)
+            except Exception as e:
+                print(f"⚠️ Frame recorder error: {e}")
+
+    def _write_slot(self, frame, camera, timestamp, kind, payload):
+        seq = self.write_seq
+        offset = _slot_offset(seq % self.slot_count, self.slot_size)
+        height, width = frame.shape[:2]
+        name = camera.encode('utf-8')[:16]
+
+        # Invalidate slot first so a concurrent reader never sees a half
+        # written frame with a valid sequence number
+        struct.pack_into('<Q', self._mm, offset, 0)
+        start = offset + SLOT_HEADER_SIZE
+        self._mm[start:start + len(payload)] = payload
+        SLOT_HEADER.pack_into(self._mm, offset, 0, timestamp, len(payload), kind, width, height, name)
+        struct.pack_into('<Q', self._mm, offset, seq)
+
+        self.write_seq = seq + 1
+        self._write_file_header()
+        self.frames_recorded += 1
+        self.bytes_written += len(payload)
+
+    def get_stats(self):
+        return {
+            'path': self.path,
+            'format': self.format,
+            'slots': self.slot_count,
+            'slotSize': self.slot_size,
+            'fileSize': _slot_offset(self.slot_count, self.slot_size),
+            'nextSequence': self.write_seq,
+            'framesRecorded': self.frames_recorded,
+            'framesDropped': self.frames_dropped,
+            'framesThrottled': self.frames_throttled,
+            'framesTooLarge': self.frames_too_large,
+            'bytesWritten': self.bytes_written,
+            'queued': self._queue.qsize()
+        }
+
+    def close(self):
+        """Flush pending frames and close the ring file"""
+        if not self._running:
+            return
+        self._running = False
+        self._thread.join(10)
+        self._mm.flush()
+        self._mm.close()
+        self._file.close()
+
+
+class RecordingReader:
+    """
+    Reads frames back from a ring file, oldest first
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'rb')
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.slot_count, self.slot_size, self.write_seq = FILE_HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f'{path} is not a frame recording')
+
+    def entries(self, camera=None):
+        """
+        Valid slot headers sorted by sequence
+
+        Returns:
+            list: [(seq, timestamp, camera, slot index), ...]
+        """
+        entries = []
+        for index in range(self.slot_count):
+            seq, timestamp, length, kind, width, height, name = SLOT_HEADER.unpack_from(
+                self._mm, _slot_offset(index, self.slot_size))
+            if seq == 0 or length == 0:
+                continue
+            name = name.rstrip(b'\0').decode('utf-8', 'replace')
+            if camera is not None and name != camera:
+                continue
+            entries.append((seq, timestamp, name, index))
+        entries.sort()
+        return entries
+
+    def read(self, index):
+        """
+        Decode frame in slot index
+
+        Returns:
+            tuple: (seq, timestamp, camera, Frame) or None if the slot was
+            overwritten while reading
+        """
+        offset = _slot_offset(index, self.slot_size)
+        seq, timestamp, length, kind, width, height, name = SLOT_HEADER.unpack_from(self._mm, offset)
+        if seq == 0:
+            return None
+        payload = np.frombuffer(self._mm, dtype=np.uint8, count=length,
+                                offset=offset + SLOT_HEADER_SIZE)
+        if kind == KIND_JPEG:
+            frame = Frame(cv2.imdecode(payload, cv2.IMREAD_COLOR), BGR)
+        else:
+            fmt = RAW_FORMATS[kind]
+            shape = (height, width) if fmt == GRAY else (height, width, 3)
+            frame = Frame(payload.reshape(shape).copy(), fmt)
+        del payload
+
+        # Writer may have reused the slot meanwhile
+        if struct.unpack_from('<Q', self._mm, offset)[0] != seq:
+            return None
+        return seq, timestamp, name.rstrip(b'\0').decode('utf-8', 'replace'), frame
+
+    def frames(self, camera=None):
+        """Yield (seq, timestamp, camera, Frame) oldest first"""
+        for seq, _, _, index in self.entries(camera):
+            item = self.read(index)
+            if item is not None and item[0] == seq:
+                yield item
+
+    def close(self):
+        self._mm.close()
+        self._file.close()
+
+
+class RecordingCamera(CameraBackend):
+    """
+    Camera backend replaying a ring file, paced by the recorded timestamps
+    (speed 1 = original timing, 4 = four times faster, 0 = unpaced)
+    """
+
+    name = 'recording'
+    # Replayed frames are never recorded again
+    recordable = False
+
+    def __init__(self, path, speed=None, loop=None, camera=None):
+        super().__init__()
+        self.reader = RecordingReader(path)
+        self.speed = config.REPLAY_SPEED if speed is None else speed
+        self.loop = config.REPLAY_LOOP if loop is None else loop
+        self._entries = self.reader.entries(camera)
+        if not self._entries:
+            self.reader.close()
+            raise RuntimeError(f'No frames in recording {path}')
+        self._position = 0
+        self._start = None
+        self._first_ts = None
+        self.is_initialized = True
+
+    def _wait(self, timestamp):
+        if not self.speed:
+            return
+        now = time.monotonic()
+        if self._start is None:
+            self._start, self._first_ts = now, timestamp
+        due = self._start + (timestamp - self._first_ts) / self.speed
+        if due > now:
+            time.sleep(due - now)
+
+    def capture_raw(self):
+        while self.is_initialized:
+            if self._position >= len(self._entries):
+                if not self.loop:
+                    return None
+                self._position = 0
+                self._start = None
+            seq, timestamp, _, index = self._entries[self._position]
+            self._position += 1
+            self._wait(timestamp)
+            item = self.reader.read(index)
+            if item is not None and item[0] == seq:
+                return item[3]
+        return None
+
+    def close(self):
+        if self.is_initialized:
+            self.reader.close()
+        super().close()
+
+
+# Singleton instance
+_recorder_instance = None
+_recorder_lock = threading.Lock()
+
+
+def get_frame_recorder():
+    """
+    Get singleton recorder (None when LP_RECORD_PATH is not set)
+
+    Returns:
+        FrameRecorder: Recorder or None
+    """
+    global _recorder_instance
+    if not config.RECORD_PATH:
+        return None
+    with _recorder_lock:
+        if _recorder_instance is None:
+            _recorder_instance = FrameRecorder(config.RECORD_PATH)
+    return _recorder_instance
+
+
+def record_frame(frame, camera='', source=None):
+    """
+    Submit frame to the recorder if recording is enabled
+
+    Args:
+        frame: Frame or BGR numpy array
+        camera (str): Camera name stored with the frame
+        source: Camera backend the frame came from (replays are skipped)
+    """
+    if frame is None or not getattr(source, 'recordable', True):
+        return
+    recorder = get_frame_recorder()
+    if recorder is not None:
+        recorder.submit(frame, camera)
+
+
+# ==========================================
+# Command line
+# ==========================================
+def _cmd_info(args):
+    reader = RecordingReader(args.file)
+    entries = reader.entries()
+    print(f"📼 {args.file}: {reader.slot_count} slots x {reader.slot_size // 1024} KB, "
+          f"{len(entries)} frames")
+    cameras = {}
+    for seq, timestamp, camera, _ in entries:
+        first, last, count = cameras.get(camera, (timestamp, timestamp, 0))
+        cameras[camera] = (min(first, timestamp), max(last, timestamp), count + 1)
+    for camera, (first, last, count) in cameras.items():
+        print(f"   {camera or '(unnamed)'}: {count} frames, "
+              f"{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(first))} -> "
+              f"{time.strftime('%H:%M:%S', time.localtime(last))}")
+    reader.close()
+
+
+def _cmd_export(args):
+    reader = RecordingReader(args.file)
+    os.makedirs(args.out_dir, exist_ok=True)
+    count = 0
+    for seq, timestamp, camera, frame in reader.frames(args.camera):
+        stamp = time.strftime('%Y%m%d-%H%M%S', time.localtime(timestamp))
+        name = f"{seq:08d}_{camera or 'frame'}_{stamp}_{int(timestamp * 1000) % 1000:03d}.jpg"
+        cv2.imwrite(os.path.join(args.out_dir, name), frame.as_bgr())
+        count += 1
+    reader.close()
+    print(f"✅ Exported {count} frames to {args.out_dir}")
+
+
+def _cmd_replay(args):
+    from lp_recognition_service import get_recognition_service
+    service = get_recognition_service()
+    camera = RecordingCamera(args.file, speed=args.speed, loop=False, camera=args.camera)
+    latencies = []
+    recognized = 0
+    try:
+        while True:
+            frame = camera.capture_raw()
+            if frame is None:
+                break
+            start = time.perf_counter()
+            result = service._process_image(frame)
+            latencies.append((time.perf_counter() - start) * 1000)
+            recognized += result['success']
+            print(f"   {len(latencies):5d}  {latencies[-1]:7.1f} ms  "
+                  f"{result.get('licensePlate') or result.get('error')}")
+    finally:
+        camera.close()
+    if latencies:
+        latencies.sort()
+        print(f"\n📊 {len(latencies)} frames, {recognized} recognized, "
+              f"p50 {latencies[len(latencies) // 2]:.1f} ms, max {latencies[-1]:.1f} ms")
+
+
+def main():
+    ap = argparse.ArgumentParser(description='Frame ring recording tools')
+    sub = ap.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('info', help='Show recording contents')
+    p.add_argument('file')
+    p.set_defaults(func=_cmd_info)
+
+    p = sub.add_parser('export', help='Export frames as JPEG files')
+    p.add_argument('file')
+    p.add_argument('out_dir')
+    p.add_argument('--camera', default=None)
+    p.set_defaults(func=_cmd_export)
+
+    p = sub.add_parser('replay', help='Run recorded frames through recognition')
+    p.add_argument('file')
+    p.add_argument('--camera', default=None)
+    p.add_argument('--speed', type=float, default=0.0,
+                   help='1 = original timing, 4 = 4x faster, 0 = as fast as possible (default)')
+    p.set_defaults(func=_cmd_replay)
+
+    args = ap.parse_args()
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
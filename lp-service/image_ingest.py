@@ -0,0 +1,171 @@
+"""
+Image ingestion for uploaded images
+Large uploads (e.g. 12MP phone photos) are decoded at reduced resolution
+(libjpeg DCT scaling via cv2.IMREAD_REDUCED_*) for detection; plate crops
+are taken from a higher resolution decode only when the reduced one is too
+coarse for OCR
+"""
+import struct
+
+import cv2
+import numpy as np
+
+import config
+
+_REDUCED_FLAGS = {
+    1: cv2.IMREAD_COLOR,
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8,
+}
+
+# JPEG start-of-frame markers that carry the image size
+_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+
+def sniff_mime_type(data):
+    """
+    MIME type from the file signature
+
+    Args:
+        data (bytes): Encoded image
+
+    Returns:
+        str: 'image/jpeg', 'image/png', 'image/bmp' or None if unknown
+    """
+    if data[:2] == b'\xff\xd8':
+        return 'image/jpeg'
+    if data[:8] == b'\x89PNG\r\n\x1a\n':
+        return 'image/png'
+    if data[:2] == b'BM':
+        return 'image/bmp'
+    return None
+
+
+def read_image_size(data):
+    """
+    Read image dimensions from the file header without decoding
+
+    Args:
+        data (bytes): Encoded JPEG, PNG or BMP
+
+    Returns:
+        tuple: (width, height) or None if unknown
+    """
+    if data[:8] == b'\x89PNG\r\n\x1a\n' and len(data) >= 24:
+        return struct.unpack('>II', data[16:24])
+    if data[:2] == b'BM' and len(data) >= 26:
+        width, height = struct.unpack('<ii', data[18:26])
+        return width, abs(height)
+    if data[:2] == b'\xff\xd8':
+        pos = 2
+        while pos + 4 <= len(data):
+            if data[pos] != 0xFF:
+                pos += 1
+                continue
+            marker = data[pos + 1]
+            if marker in (0xD8, 0x01) or 0xD0 <= marker <= 0xD7 or marker == 0xFF:
+                pos += 1 if marker == 0xFF else 2
+                continue
+            length = struct.unpack('>H', data[pos + 2:pos + 4])[0]
+            if marker in _SOF_MARKERS and pos + 9 <= len(data):
+                height, width = struct.unpack('>HH', data[pos + 5:pos + 9])
+                return width, height
+            pos += 2 + length
+    return None
+
+
+def choose_reduction(width, height, target=None):
+    """
+    Largest decode reduction (1, 2, 4 or 8) that keeps the longer image side
+    at or above target pixels
+
+    Returns:
+        int: Reduction factor
+    """
+    target = target or config.INGEST_TARGET_SIZE
+    longest = max(width, height)
+    for factor in (8, 4, 2):
+        if longest / factor >= target:
+            return factor
+    return 1
+
+
+class IngestedImage:
+    """
+    Decoded upload: a working image for detection plus the encoded bytes to
+    go back to for plate crops
+    """
+
+    def __init__(self, data, target=None):
+        self.data = data
+        self.full_size = read_image_size(data)
+        self.reduction = choose_reduction(*self.full_size, target) if self.full_size else 1
+        self.image = self._decode(self.reduction)
+        if self.image is None and self.reduction != 1:
+            # Header parse was wrong or format does not support reduced decode
+            self.reduction = 1
+            self.image = self._decode(1)
+        self.refined_crops = 0
+        self._refined = {}
+
+    def _decode(self, factor):
+        buffer = np.frombuffer(self.data, dtype=np.uint8)
+        return cv2.imdecode(buffer, _REDUCED_FLAGS[factor])
+
+    @property
+    def ok(self):
+        return self.image is not None
+
+    def crop(self, x, y, w, h):
+        """
+        Plate crop for a box in working image coordinates, decoded at the
+        lowest reduction that makes the plate at least INGEST_MIN_PLATE_WIDTH
+        pixels wide
+
+        Returns:
+            numpy.ndarray: BGR crop, or None to use the working image crop
+        """
+        if self.reduction == 1 or w <= 0 or h <= 0 or w >= config.INGEST_MIN_PLATE_WIDTH:
+            return None
+        factor = self.reduction
+        while factor > 1 and w * self.reduction / factor < config.INGEST_MIN_PLATE_WIDTH:
+            factor //= 2
+        if factor == self.reduction:
+            return None
+
+        image = self._refined.get(factor)
+        if image is None:
+            image = self._decode(factor)
+            if image is None:
+                return None
+            # Keep only one higher resolution decode alive per request
+            self._refined = {factor: image}
+
+        # Working image size is ceil(full / reduction); map through the
+        # actual size ratio rather than the nominal factor
+        sy = image.shape[0] / self.image.shape[0]
+        sx = image.shape[1] / self.image.shape[1]
+        x1, y1 = int(x * sx), int(y * sy)
+        x2, y2 = int(round((x + w) * sx)), int(round((y + h) * sy))
+        self.refined_crops += 1
+        return image[max(0, y1):y2, max(0, x1):x2].copy()
+
+    def release(self):
+        """Drop the higher resolution decode"""
+        self._refined = {}
+
+
+def decode_upload(data, target=None):
+    """
+    Decode uploaded image bytes for recognition
+
+    Args:
+        data (bytes): Encoded image
+        target (int): Minimum longer side of the working image
+            (default: LP_INGEST_TARGET_SIZE)
+
+    Returns:
+        IngestedImage: Check .ok before use
+    """
+    return IngestedImage(data, target)
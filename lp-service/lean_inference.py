@@ -0,0 +1,369 @@
+"""
+Lean YOLOv5 inference path
+Runs the raw detection model on a preallocated input tensor instead of going
+through AutoShape (per-call letterbox allocation, Detections object, pandas)
+
+Output matches AutoShape: boxes in original image coordinates, rows of
+[xmin, ymin, xmax, ymax, confidence, class, name]
+"""
+import math
+import threading
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+import torch
+import torchvision
+
+# Same constants as yolov5 utils.general.non_max_suppression
+MAX_WH = 7680
+MAX_NMS = 30000
+PAD_COLOR = 114
+
+
+def make_divisible(x, divisor):
+    """Round x up to a multiple of divisor"""
+    return math.ceil(x / divisor) * divisor
+
+
+class LetterboxGeometry:
+    """
+    Resize/pad parameters for one (source shape, inference size) pair,
+    computed exactly like AutoShape + letterbox(auto=False)
+    """
+
+    def __init__(self, src_shape, size, stride):
+        h, w = src_shape[:2]
+        g = size / max(h, w)
+        self.input_shape = (
+            make_divisible(int(h * g), stride),
+            make_divisible(int(w * g), stride)
+        )
+        in_h, in_w = self.input_shape
+        self.ratio = min(in_h / h, in_w / w)
+        self.new_w = int(round(w * self.ratio))
+        self.new_h = int(round(h * self.ratio))
+        dw = (in_w - self.new_w) / 2
+        dh = (in_h - self.new_h) / 2
+        self.top = int(round(dh - 0.1))
+        self.left = int(round(dw - 0.1))
+        self.src_shape = (h, w)
+
+    def scale_boxes(self, boxes):
+        """Map xyxy boxes from input tensor space back to the source image"""
+        gain = min(self.input_shape[0] / self.src_shape[0], self.input_shape[1] / self.src_shape[1])
+        pad_x = (self.input_shape[1] - self.src_shape[1] * gain) / 2
+        pad_y = (self.input_shape[0] - self.src_shape[0] * gain) / 2
+        boxes[:, [0, 2]] -= pad_x
+        boxes[:, [1, 3]] -= pad_y
+        boxes[:, :4] /= gain
+        boxes[:, [0, 2]] = boxes[:, [0, 2]].clamp(0, self.src_shape[1])
+        boxes[:, [1, 3]] = boxes[:, [1, 3]].clamp(0, self.src_shape[0])
+        return boxes
+
+
+def non_max_suppression(prediction, conf_thres=0.25, iou_thres=0.45, classes=None,
+                        agnostic=False, max_det=1000):
+    """
+    Vectorized NMS on raw YOLOv5 output (single label per box)
+
+    Args:
+        prediction (torch.Tensor): (batch, anchors, 5 + classes)
+
+    Returns:
+        list: One (n, 6) tensor [x1, y1, x2, y2, conf, cls] per image
+    """
+    output = []
+    for x in prediction:
+        x = x[x[:, 4] > conf_thres]
+        if not x.shape[0]:
+            output.append(torch.zeros((0, 6), device=prediction.device))
+            continue
+
+        # conf = obj_conf * cls_conf
+        scores = x[:, 5:] * x[:, 4:5]
+        conf, j = scores.max(1)
+
+        # (center x, center y, w, h) -> (x1, y1, x2, y2)
+        half_wh = x[:, 2:4] / 2
+        box = torch.cat((x[:, :2] - half_wh, x[:, :2] + half_wh), 1)
+
+        keep = conf > conf_thres
+        if classes is not None:
+            keep &= (j[:, None] == torch.tensor(classes, device=x.device)).any(1)
+        box, conf, j = box[keep], conf[keep], j[keep]
+        if not box.shape[0]:
+            output.append(torch.zeros((0, 6), device=prediction.device))
+            continue
+
+        if box.shape[0] > MAX_NMS:
+            top = conf.argsort(descending=True)[:MAX_NMS]
+            box, conf, j = box[top], conf[top], j[top]
+
+        # Offset boxes by class so one NMS call is class-aware
+        offsets = 0 if agnostic else j[:, None].float() * MAX_WH
+        i = torchvision.ops.nms(box + offsets, conf, iou_thres)[:max_det]
+        output.append(torch.cat((box[i], conf[i, None], j[i, None].float()), 1))
+    return output
+
+
+class LeanResult:
+    """
+    Detections for one image as plain arrays
+    """
+
+    def __init__(self, xyxy, names):
+        self.xyxy = xyxy  # (n, 6) float32: x1, y1, x2, y2, conf, cls
+        self.names = names
+
+    def __len__(self):
+        return len(self.xyxy)
+
+    def tolist(self):
+        """Rows in AutoShape .pandas().xyxy[0] order, including class name"""
+        rows = []
+        for x1, y1, x2, y2, conf, cls in self.xyxy.tolist():
+            rows.append([x1, y1, x2, y2, conf, int(cls), self.names[int(cls)]])
+        return rows
+
+
+class LeanDetector:
+    """
+    Drop-in replacement for an AutoShape model call: model(img, size=640)
+
+    Letterboxing writes into a cached canvas and input tensor per frame
+    geometry, so a fixed camera resolution allocates nothing per call
+    (a few recent geometries are kept for variable-size plate crops).
+    Thresholds (conf, iou, classes, max_det) are read from the wrapped
+    AutoShape model, so existing settings like `.conf = 0.60` still apply.
+    """
+
+    def __init__(self, autoshape_model, size=640, max_cached_shapes=8):
+        self.autoshape = autoshape_model
+        self.model = autoshape_model.model
+        self.names = autoshape_model.names
+        self.stride = int(autoshape_model.stride)
+        self.size = size
+        self.fp16 = bool(getattr(self.model, 'fp16', False))
+        self.device = next(self.model.parameters()).device
+        self.max_cached_shapes = max_cached_shapes
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _prepare(self, img, size):
+        key = (img.shape[0], img.shape[1], size)
+        entry = self._cache.get(key)
+        if entry is not None:
+            self._cache.move_to_end(key)
+        else:
+            geometry = LetterboxGeometry(img.shape, size, self.stride)
+            in_h, in_w = geometry.input_shape
+            canvas = np.full((in_h, in_w, 3), PAD_COLOR, dtype=np.uint8)
+            dtype = torch.float16 if self.fp16 else torch.float32
+            tensor = torch.empty((1, 3, in_h, in_w), dtype=dtype, device=self.device)
+            # CHW view sharing the canvas memory
+            canvas_chw = torch.from_numpy(canvas).permute(2, 0, 1)
+            entry = (geometry, canvas, canvas_chw, tensor)
+            self._cache[key] = entry
+            if len(self._cache) > self.max_cached_shapes:
+                self._cache.popitem(last=False)
+        geometry, canvas, canvas_chw, tensor = entry
+
+        # Resize straight into the padded canvas (padding is never overwritten)
+        region = canvas[geometry.top:geometry.top + geometry.new_h,
+                        geometry.left:geometry.left + geometry.new_w]
+        if (geometry.new_h, geometry.new_w) == img.shape[:2]:
+            region[...] = img[..., :3]
+        else:
+            cv2.resize(img[..., :3], (geometry.new_w, geometry.new_h), dst=region,
+                       interpolation=cv2.INTER_LINEAR)
+
+        # HWC uint8 -> CHW float in [0, 1], converted in place in the cached tensor
+        tensor[0].copy_(canvas_chw)
+        tensor.mul_(1 / 255.0)
+        return geometry, tensor
+
+    def __call__(self, img, size=None):
+        """
+        Detect objects in one image
+
+        Args:
+            img (numpy.ndarray): HWC uint8 image (fed as-is, like AutoShape)
+            size (int): Inference size (default: self.size)
+
+        Returns:
+            LeanResult: Detections in original image coordinates
+        """
+        if img.ndim == 2:
+            img = cv2.cvtColor(img, cv2.COLOR_GRAY2BGR)
+        # Cached buffers are shared, so one call at a time per detector
+        with self._lock, torch.inference_mode():
+            geometry, tensor = self._prepare(img, size or self.size)
+            pred = self.model(tensor)
+            if isinstance(pred, (list, tuple)):
+                pred = pred[0]
+            det = non_max_suppression(
+                pred,
+                conf_thres=self.autoshape.conf,
+                iou_thres=self.autoshape.iou,
+                classes=self.autoshape.classes,
+                agnostic=self.autoshape.agnostic,
+                max_det=self.autoshape.max_det
+            )[0]
+            geometry.scale_boxes(det)
+
+        return LeanResult(det.float().cpu().numpy(), self.names)
+
+
+def tile_origins(length, tile, overlap):
+    """
+    Start offsets of overlapping tiles covering [0, length) along one axis
+    (evenly spread, first at 0 and last flush with the end)
+    """
+    if length <= tile:
+        return [0]
+    count = math.ceil((length - overlap) / (tile - overlap))
+    step = (length - tile) / (count - 1)
+    return [int(round(i * step)) for i in range(count)]
+
+
+def merge_detections(det, iou_thres, containment=0.6, agnostic=False):
+    """
+    Merge boxes collected from overlapping tiles
+
+    Standard NMS, then drops boxes that lie mostly (containment) inside a
+    higher-confidence box of the same class - a plate cut by a tile border
+    overlaps the whole plate with low IoU but is contained in it
+
+    Args:
+        det (torch.Tensor): (n, 6) [x1, y1, x2, y2, conf, cls] in image coordinates
+
+    Returns:
+        torch.Tensor: Kept rows, highest confidence first
+    """
+    if det.shape[0] < 2:
+        return det
+    offsets = 0 if agnostic else det[:, 5:6] * MAX_WH
+    det = det[torchvision.ops.nms(det[:, :4] + offsets, det[:, 4], iou_thres)]
+    if det.shape[0] < 2:
+        return det
+
+    boxes = det[:, :4] if agnostic else det[:, :4] + det[:, 5:6] * MAX_WH
+    lt = torch.max(boxes[:, None, :2], boxes[None, :, :2])
+    rb = torch.min(boxes[:, None, 2:], boxes[None, :, 2:])
+    inter = (rb - lt).clamp(min=0).prod(2)
+    area = (boxes[:, 2:] - boxes[:, :2]).prod(1)
+    # Row i contained in an earlier (higher confidence) box j
+    contained = inter / area[:, None].clamp(min=1e-6) > containment
+    keep = ~torch.tril(contained, diagonal=-1).any(1)
+    return det[keep]
+
+
+class TiledDetector:
+    """
+    Detector for small, distant plates: the frame is cut into overlapping
+    tiles at native resolution, plus the whole frame letterboxed to the tile
+    size (for plates larger than the overlap), all run in one batched forward
+    pass. Boxes are mapped back to frame coordinates and merged across tiles
+
+    Call signature and result match LeanDetector, so it can replace the
+    plate detector in LicensePlateRecognitionService
+    """
+
+    def __init__(self, autoshape_model, tile_size=640, overlap=128, include_full=True,
+                 max_cached_shapes=4):
+        self.autoshape = autoshape_model
+        self.model = autoshape_model.model
+        self.names = autoshape_model.names
+        self.stride = int(autoshape_model.stride)
+        self.tile_size = make_divisible(tile_size, self.stride)
+        self.overlap = min(overlap, self.tile_size // 2)
+        self.include_full = include_full
+        self.fp16 = bool(getattr(self.model, 'fp16', False))
+        self.device = next(self.model.parameters()).device
+        self.max_cached_shapes = max_cached_shapes
+        self.last_tile_count = 0
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def tiles(self, shape):
+        """(x, y, w, h) of each tile for a frame shape"""
+        h, w = shape[:2]
+        return [(x, y, min(self.tile_size, w - x), min(self.tile_size, h - y))
+                for y in tile_origins(h, self.tile_size, self.overlap)
+                for x in tile_origins(w, self.tile_size, self.overlap)]
+
+    def _prepare(self, img):
+        key = img.shape[:2]
+        entry = self._cache.get(key)
+        if entry is not None:
+            self._cache.move_to_end(key)
+        else:
+            tiles = self.tiles(img.shape)
+            batch = len(tiles) + (1 if self.include_full else 0)
+            size = self.tile_size
+            canvas = np.full((batch, size, size, 3), PAD_COLOR, dtype=np.uint8)
+            dtype = torch.float16 if self.fp16 else torch.float32
+            tensor = torch.empty((batch, 3, size, size), dtype=dtype, device=self.device)
+            canvas_nchw = torch.from_numpy(canvas).permute(0, 3, 1, 2)
+            geometry = LetterboxGeometry(img.shape, size, self.stride) if self.include_full else None
+            entry = (tiles, geometry, canvas, canvas_nchw, tensor)
+            self._cache[key] = entry
+            if len(self._cache) > self.max_cached_shapes:
+                self._cache.popitem(last=False)
+        tiles, geometry, canvas, canvas_nchw, tensor = entry
+
+        # Tiles are copied at native resolution (edge tiles of frames smaller
+        # than a tile keep their padding)
+        for i, (x, y, w, h) in enumerate(tiles):
+            canvas[i, :h, :w] = img[y:y + h, x:x + w, :3]
+        if geometry is not None:
+            # Letterboxed into the top-left of a square canvas; the boxes
+            # are mapped back with the geometry's own (non-square) input shape
+            region = canvas[-1, geometry.top:geometry.top + geometry.new_h,
+                            geometry.left:geometry.left + geometry.new_w]
+            cv2.resize(img[..., :3], (geometry.new_w, geometry.new_h), dst=region,
+                       interpolation=cv2.INTER_LINEAR)
+
+        tensor.copy_(canvas_nchw)
+        tensor.mul_(1 / 255.0)
+        return tiles, geometry, tensor
+
+    def __call__(self, img, size=None):
+        """
+        Detect objects on all tiles of one image
+
+        Args:
+            img (numpy.ndarray): HWC uint8 image
+            size (int): Unused (tiles are always tile_size, so the thermal
+                governor does not step it down), accepted for compatibility
+                with AutoShape / LeanDetector calls
+
+        Returns:
+            LeanResult: Merged detections in original image coordinates
+        """
+        if img.ndim == 2:
+            img = cv2.cvtColor(img, cv2.COLOR_GRAY2BGR)
+        with self._lock, torch.inference_mode():
+            tiles, geometry, tensor = self._prepare(img)
+            pred = self.model(tensor)
+            if isinstance(pred, (list, tuple)):
+                pred = pred[0]
+            dets = non_max_suppression(
+                pred,
+                conf_thres=self.autoshape.conf,
+                iou_thres=self.autoshape.iou,
+                classes=self.autoshape.classes,
+                agnostic=self.autoshape.agnostic,
+                max_det=self.autoshape.max_det
+            )
+            for (x, y, w, h), det in zip(tiles, dets):
+                det[:, [0, 2]] = (det[:, [0, 2]] + x).clamp(0, img.shape[1])
+                det[:, [1, 3]] = (det[:, [1, 3]] + y).clamp(0, img.shape[0])
+            if geometry is not None:
+                geometry.scale_boxes(dets[-1])
+            det = merge_detections(torch.cat(dets), self.autoshape.iou,
+                                   agnostic=self.autoshape.agnostic)[:self.autoshape.max_det]
+            self.last_tile_count = len(tiles)
+
+        return LeanResult(det.float().cpu().numpy(), self.names)
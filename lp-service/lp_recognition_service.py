@@ -1,29 +1,33 @@
 import cv2
-import torch
 import sys
 import os
-import platform
+import threading
+import time
+
+import config
+from frame_pipeline import Frame, as_frame
+from image_ingest import decode_upload
+from thermal_governor import get_governor
 
 # Add License-Plate-Recognition to path
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'License-Plate-Recognition'))
 
 try:
-    from function import helper
+    from function import helper, utils_rotate
 except ImportError:
     print("Warning: Could not import helper module. Make sure License-Plate-Recognition is properly set up.")
 
-# Detect if running on Raspberry Pi
-IS_RASPBERRY_PI = platform.machine() in ['armv7l', 'aarch64']
+# Routes a plate crop takes with LP_RECTIFY: perspective warp of its
+# outline, deskew when no outline is found, unchanged when rectification fails
+RECTIFY_ROUTES = ('outline', 'deskew', 'failed')
+
+# Camera backend is chosen by config (LP_CAMERA_BACKEND), not by platform
+from camera_backends import IS_RASPBERRY_PI, describe_backend, get_camera
 
 if IS_RASPBERRY_PI:
-    try:
-        from picamera_handler import get_picamera
-        print("🍓 Running on Raspberry Pi - Using picamera2")
-    except ImportError:
-        print("⚠️ picamera2 not available - Pi Camera features disabled")
-        IS_RASPBERRY_PI = False
+    print(f"🍓 Running on Raspberry Pi - camera backend: {describe_backend()['backend']}")
 else:
-    print("💻 Running on PC - Using OpenCV VideoCapture")
+    print(f"💻 Running on PC - camera backend: {describe_backend()['backend']}")
 
 
 class LicensePlateRecognitionService:
@@ -33,19 +37,61 @@ class LicensePlateRecognitionService:
     """
     
     def __init__(self):
-        """Initialize YOLOv5 models for license plate detection and OCR"""
+        """Initialize YOLOv5 (or fake, LP_MODEL_BACKEND) models for license plate detection and OCR"""
         print("🔧 Initializing License Plate Recognition Service...")
         
         # Paths to models
         base_path = os.path.join(os.path.dirname(__file__), '..', 'License-Plate-Recognition')
         lp_detector_path = os.path.join(base_path, 'model', 'LP_detector.pt')
         lp_ocr_path = os.path.join(base_path, 'model', 'LP_ocr.pt')
+        self.model_paths = {'detector': lp_detector_path, 'ocr': lp_ocr_path}
+        
+        if config.MODEL_BACKEND == 'fake':
+            self._load_fake_models()
+        else:
+            self._load_yolov5_models()
+        
+        # Models actually called per request: AutoShape or the lean path
+        # (lean and tiled paths drive the torch networks; fake models are
+        # always called directly)
+        self.plate_detector = self.yolo_LP_detect
+        self.plate_reader = self.yolo_license_plate
+        torch_models = config.MODEL_BACKEND != 'fake'
+        if config.LEAN_INFERENCE and torch_models:
+            from lean_inference import LeanDetector
+            self.plate_detector = LeanDetector(self.yolo_LP_detect, size=config.DETECT_SIZE)
+            self.plate_reader = LeanDetector(self.yolo_license_plate)
+            print("⚡ Lean inference path enabled")
+        if config.TILED_DETECTION and torch_models:
+            from lean_inference import TiledDetector
+            self.plate_detector = TiledDetector(
+                self.yolo_LP_detect,
+                tile_size=config.TILE_SIZE,
+                overlap=config.TILE_OVERLAP,
+                include_full=config.TILE_INCLUDE_FULL
+            )
+            print(f"🧩 Tiled detection enabled ({config.TILE_SIZE}px tiles, {config.TILE_OVERLAP}px overlap)")
+        
+        # Plate crop rectification counters (LP_RECTIFY), per route:
+        # 'outline' (perspective warp), 'deskew' (no outline found) and
+        # 'failed' (rectification raised, crop read as it was)
+        self._rectify_lock = threading.Lock()
+        self.rectify_stats = {route: {'plates': 0, 'reads': 0} for route in RECTIFY_ROUTES}
+        self.rectify_ocr_calls = 0
+        self.rectify_ms = 0.0
+        
+        print("✅ Models loaded successfully!")
+
+    def _load_yolov5_models(self):
+        """YOLOv5 detector and OCR models from torch.hub and the .pt weights"""
+        # Imported here so importing this module stays cheap
+        import torch
         
         # Load YOLOv5 License Plate Detection model
         self.yolo_LP_detect = torch.hub.load(
             'ultralytics/yolov5', 
             'custom', 
-            path=lp_detector_path,
+            path=self.model_paths['detector'],
             force_reload=False
         )
         
@@ -53,15 +99,39 @@ class LicensePlateRecognitionService:
         self.yolo_license_plate = torch.hub.load(
             'ultralytics/yolov5',
             'custom',
-            path=lp_ocr_path,
+            path=self.model_paths['ocr'],
             force_reload=False
         )
         
         # Set confidence threshold
-        self.yolo_license_plate.conf = 0.60
+        self.yolo_license_plate.conf = config.OCR_CONF
         
-        print("✅ Models loaded successfully!")
-
+        if config.TORCH_THREADS > 0:
+            torch.set_num_threads(config.TORCH_THREADS)
+        
+        # INT8 variants (quantization.py) replace the FP32 networks in place,
+        # so the wrappers below pick them up unchanged
+        self.model_variants = {key: {'variant': 'fp32'} for key in self.model_paths}
+        if config.MODEL_VARIANT == 'int8':
+            import quantization
+            for key, model in (('detector', self.yolo_LP_detect), ('ocr', self.yolo_license_plate)):
+                partner = self.model_variants['detector']['variant'] if key == 'ocr' else 'fp32'
+                status = quantization.load_variant(model, self.model_paths[key], partner=partner)
+                self.model_variants[key] = status
+                if status['refused']:
+                    print(f"⚠️ INT8 {key} refused, using FP32: {status['refused']}")
+                else:
+                    print(f"⚡ INT8 {key} loaded (agreement {status['agreement']:.1%})")
+    
+    def _load_fake_models(self):
+        """Deterministic fake models (fake_models.py, LP_MODEL_BACKEND=fake)"""
+        import fake_models
+        
+        self.yolo_LP_detect, self.yolo_license_plate = fake_models.load_models()
+        self.yolo_license_plate.conf = config.OCR_CONF
+        self.model_variants = {key: {'variant': 'fake'} for key in self.model_paths}
+        print(f"🎭 Fake models (detector {config.FAKE_DETECT_MS:g} ms, OCR {config.FAKE_OCR_MS:g} ms simulated)")
+    
     def recognize_from_image(self, image_path):
         """
         Recognize license plate from image file
@@ -78,15 +148,43 @@ class LicensePlateRecognitionService:
             }
         """
         try:
-            # Read image
-            img = cv2.imread(image_path)
-            if img is None:
+            with open(image_path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            return {
+                'success': False,
+                'error': 'Could not read image file'
+            }
+        return self.recognize_from_bytes(data)
+    
+    def recognize_from_bytes(self, data):
+        """
+        Recognize license plate from encoded image bytes (JPEG/PNG/BMP)
+        Large images are decoded at reduced resolution; plate crops come
+        from a higher resolution decode when needed
+        
+        Args:
+            data (bytes): Encoded image
+            
+        Returns:
+            dict: Recognition result (plus 'decode' info)
+        """
+        try:
+            upload = decode_upload(data)
+            if not upload.ok:
                 return {
                     'success': False,
                     'error': 'Could not read image file'
                 }
             
-            return self._process_image(img)
+            result = self._process_image(upload.image, refine=upload.crop)
+            result['decode'] = {
+                'reduction': upload.reduction,
+                'size': list(upload.full_size) if upload.full_size else None,
+                'refinedCrops': upload.refined_crops
+            }
+            upload.release()
+            return result
             
         except Exception as e:
             return {
@@ -134,29 +232,24 @@ class LicensePlateRecognitionService:
     
     def recognize_from_pi_camera(self):
         """
-        Capture from Raspberry Pi Camera and recognize license plate
-        (Only works on Raspberry Pi)
+        Capture from the configured camera backend and recognize license plate
+        (Pi Camera on a Raspberry Pi; any LP_CAMERA_BACKEND elsewhere)
         
         Returns:
             dict: Recognition result
         """
-        if not IS_RASPBERRY_PI:
-            return {
-                'success': False,
-                'error': 'This method only works on Raspberry Pi'
-            }
-        
+        picam = None
         try:
-            # Get Pi Camera
-            picam = get_picamera()
+            # Get configured camera
+            picam = get_camera()
             
-            # Capture frame
-            frame = picam.capture_frame()
+            # Capture frame (no colour conversion until a consumer needs one)
+            frame = picam.capture_raw()
             
             if frame is None:
                 return {
                     'success': False,
-                    'error': 'Could not capture frame from Pi Camera'
+                    'error': 'Could not capture frame from camera'
                 }
             
             # Process with existing method
@@ -165,78 +258,177 @@ class LicensePlateRecognitionService:
         except Exception as e:
             return {
                 'success': False,
-                'error': f'Pi Camera error: {str(e)}'
+                'error': f'Camera error: {str(e)}'
             }
+        finally:
+            if picam:
+                picam.close()
     
-    def _process_image(self, img):
+    def _process_image(self, img, refine=None):
         """
         Process image and extract license plate text
         
         Args:
-            img: OpenCV image (numpy array)
+            img: OpenCV BGR image (numpy array) or Frame in any pixel format
+            refine (callable): Optional (x, y, w, h) -> higher resolution
+                plate crop (None to crop from img)
             
         Returns:
             dict: Recognition result
         """
         try:
-            # Detect license plates in image
-            plates = self.yolo_LP_detect(img, size=640)
-            list_plates = plates.pandas().xyxy[0].values.tolist()
-            
-            # If no plates detected, try direct OCR on whole image
-            if len(list_plates) == 0:
-                lp_text = helper.read_plate(self.yolo_license_plate, img)
-                if lp_text and lp_text != "unknown":
-                    return {
-                        'success': True,
-                        'licensePlate': lp_text,
-                        'confidence': 0.5
-                    }
-                else:
-                    return {
-                        'success': False,
-                        'error': 'No license plate detected in image'
-                    }
-            
-            # Process each detected plate
-            best_result = None
-            best_confidence = 0
-            
-            for plate in list_plates:
-                # Extract coordinates
-                x = int(plate[0])
-                y = int(plate[1])
-                w = int(plate[2] - plate[0])
-                h = int(plate[3] - plate[1])
-                confidence = float(plate[4])
-                
-                # Crop license plate region
-                crop_img = img[y:y+h, x:x+w]
-                
-                # Read text from cropped plate
-                lp_text = helper.read_plate(self.yolo_license_plate, crop_img)
-                
-                if lp_text and lp_text != "unknown":
-                    if confidence > best_confidence:
-                        best_result = lp_text
-                        best_confidence = confidence
-            
-            if best_result:
+            img, list_plates = self._detect_plates(img)
+            return self._read_plates(img, list_plates, refine)
+        except Exception as e:
+            return {
+                'success': False,
+                'error': f'Processing error: {str(e)}'
+            }
+    
+    def _rectify(self, crop_img):
+        """
+        Fronto-parallel plate crop for OCR (utils_rotate.rectify_plate)
+        
+        Returns:
+            tuple: (warped crop, deskewed crop without a plate outline, or the
+            crop unchanged if rectification failed; route in RECTIFY_ROUTES)
+        """
+        start = time.perf_counter()
+        try:
+            rectified, from_outline = utils_rotate.rectify_plate(
+                crop_img, max_width=config.RECTIFY_MAX_WIDTH)
+            route = 'outline' if from_outline else 'deskew'
+        except Exception as e:
+            print(f"⚠️ Plate rectification failed, reading the crop as is: {e}")
+            rectified, route = crop_img, 'failed'
+        with self._rectify_lock:
+            self.rectify_ms += (time.perf_counter() - start) * 1000.0
+        return rectified, route
+    
+    def _count_rectified(self, route, read):
+        with self._rectify_lock:
+            self.rectify_stats[route]['plates'] += 1
+            self.rectify_stats[route]['reads'] += int(read)
+            self.rectify_ocr_calls += 1
+    
+    def get_rectify_stats(self):
+        """
+        Rectification counters (LP_RECTIFY)
+        
+        The service reads each plate crop once with or without
+        rectification (it never ran the scripts' deskew retries), so
+        rectifying adds preprocessing time and saves no OCR calls here;
+        benchmarks/bench_rectify.py measures the scripts' savings and the
+        read rate of raw vs rectified crops
+        
+        Returns:
+            dict: plates, OCR calls and reads per route (outline, deskew,
+            failed), read rate, and average rectification time
+        """
+        with self._rectify_lock:
+            routes = {route: dict(counts) for route, counts in self.rectify_stats.items()}
+            ocr_calls, rectify_ms = self.rectify_ocr_calls, self.rectify_ms
+        plates = sum(counts['plates'] for counts in routes.values())
+        reads = sum(counts['reads'] for counts in routes.values())
+        for counts in routes.values():
+            counts['readRate'] = round(counts['reads'] / counts['plates'], 3) if counts['plates'] else None
+        return {
+            'enabled': config.RECTIFY,
+            'plates': plates,
+            'reads': reads,
+            'readRate': round(reads / plates, 3) if plates else None,
+            'ocrCalls': ocr_calls,
+            'ocrCallsPerPlate': round(ocr_calls / plates, 2) if plates else None,
+            'avgRectifyMs': round(rectify_ms / plates, 2) if plates else None,
+            'routes': routes
+        }
+    
+    def _detect_plates(self, img):
+        """
+        Detection half of _process_image (a separate stage when pipelined)
+        
+        Returns:
+            tuple: (image in MODEL_INPUT_FORMAT, detection rows)
+        """
+        # Convert only if the frame is not already in the model's format
+        img = as_frame(img).as_format(config.MODEL_INPUT_FORMAT)
+        
+        # Detect license plates in image (smaller input while the thermal
+        # governor has stepped down)
+        plates = self.plate_detector(img, size=get_governor().detect_size(config.DETECT_SIZE))
+        return img, helper.detection_rows(plates)
+    
+    def _read_plates(self, img, list_plates, refine=None):
+        """
+        OCR half of _process_image: read every detected plate and keep the
+        most confident read
+        
+        Returns:
+            dict: Recognition result
+        """
+        # If no plates detected, try direct OCR on whole image
+        if len(list_plates) == 0:
+            lp_text = helper.read_plate(self.plate_reader, img, size=config.OCR_SIZE)
+            if lp_text and lp_text != "unknown":
                 return {
                     'success': True,
-                    'licensePlate': best_result,
-                    'confidence': best_confidence
+                    'licensePlate': lp_text,
+                    'confidence': 0.5
                 }
             else:
                 return {
                     'success': False,
-                    'error': 'Could not read text from detected license plate'
+                    'error': 'No license plate detected in image'
                 }
-                
-        except Exception as e:
+        
+        # Process each detected plate
+        best_result = None
+        best_confidence = 0
+        
+        for plate in list_plates:
+            # Extract coordinates
+            x = int(plate[0])
+            y = int(plate[1])
+            w = int(plate[2] - plate[0])
+            h = int(plate[3] - plate[1])
+            confidence = float(plate[4])
+            
+            # Crop license plate region (a refined crop is ours alone, so its
+            # conversion buffer goes back to the pool after the read)
+            crop_img = refine(x, y, w, h) if refine is not None else None
+            crop_frame = None
+            if crop_img is None:
+                crop_img = img[y:y+h, x:x+w]
+            else:
+                crop_frame = Frame(crop_img)
+                crop_img = crop_frame.as_format(config.MODEL_INPUT_FORMAT)
+            
+            # Read text from cropped plate (rectified first with LP_RECTIFY,
+            # still a single OCR pass)
+            route = None
+            if config.RECTIFY:
+                crop_img, route = self._rectify(crop_img)
+            lp_text = helper.read_plate(self.plate_reader, crop_img, size=config.OCR_SIZE)
+            if route is not None:
+                self._count_rectified(route, bool(lp_text) and lp_text != "unknown")
+            if crop_frame is not None:
+                crop_frame.release()
+            
+            if lp_text and lp_text != "unknown":
+                if confidence > best_confidence:
+                    best_result = lp_text
+                    best_confidence = confidence
+        
+        if best_result:
+            return {
+                'success': True,
+                'licensePlate': best_result,
+                'confidence': best_confidence
+            }
+        else:
             return {
                 'success': False,
-                'error': f'Processing error: {str(e)}'
+                'error': 'Could not read text from detected license plate'
             }
 
 
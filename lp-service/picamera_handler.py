@@ -1,13 +1,17 @@
 """
 Raspberry Pi Camera Handler
 Sử dụng picamera2 thay vì OpenCV VideoCapture
+(picamera2 is imported when a camera is opened, so this module also loads on
+machines without it - see camera_backends for the other backends)
 """
-from picamera2 import Picamera2
 import cv2
 import numpy as np
 import time
 import os
 
+import config
+from frame_pipeline import Frame
+
 class PiCameraHandler:
     """
     Handler cho Raspberry Pi Camera Module
@@ -21,6 +25,8 @@ class PiCameraHandler:
         self.is_initialized = False
         
         try:
+            from picamera2 import Picamera2
+            
             # Create Picamera2 instance
             self.picam = Picamera2()
             
@@ -57,30 +63,37 @@ class PiCameraHandler:
                     pass
             raise
     
-    def capture_frame(self):
+    def capture_raw(self):
         """
-        Capture single frame from Pi Camera
+        Capture single frame without any colour conversion
         
         Returns:
-            numpy.ndarray: OpenCV BGR image
+            Frame: Captured frame tagged with its pixel format
         """
         if not self.is_initialized or self.picam is None:
             print("❌ Camera not initialized")
             return None
             
         try:
-            # Capture RGB array
-            rgb_array = self.picam.capture_array()
-            
-            # Convert RGB to BGR (OpenCV format)
-            bgr_image = cv2.cvtColor(rgb_array, cv2.COLOR_RGB2BGR)
-            
-            return bgr_image
-            
+            return Frame(self.picam.capture_array(), config.PICAMERA_FORMAT)
         except Exception as e:
             print(f"❌ Error capturing frame: {e}")
             return None
     
+    def capture_frame(self):
+        """
+        Capture single frame from Pi Camera
+        
+        Returns:
+            numpy.ndarray: OpenCV BGR image
+        """
+        frame = self.capture_raw()
+        if frame is None:
+            return None
+        
+        # Converted once; the caller keeps the buffer, so it is not released
+        return frame.as_bgr()
+    
     def capture_to_file(self, filepath):
         """
         Capture image and save to file
@@ -0,0 +1,291 @@
+"""
+Priority classes for CPU-bound work
+Plate recognition always goes first: on-demand recognition requests, then
+continuous exit lanes (LP_EXIT_CAMERAS), then the other (entry) lanes, then
+the preview broadcast and diagnostics. Lower classes wait while higher class
+work is running, and the preview is degraded (lower fps and JPEG quality)
+while recent recognition latency is over LP_RECOGNITION_TARGET_MS
+"""
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import config
+
+RECOGNITION = 'recognition'
+EXIT = 'exit'
+ENTRY = 'entry'
+PREVIEW = 'preview'
+DIAGNOSTICS = 'diagnostics'
+
+# Highest priority first
+CLASSES = (RECOGNITION, EXIT, ENTRY, PREVIEW, DIAGNOSTICS)
+LEVELS = {name: level for level, name in enumerate(CLASSES)}
+
+# Classes whose latency counts against LP_RECOGNITION_TARGET_MS
+RECOGNITION_CLASSES = (RECOGNITION, EXIT, ENTRY)
+
+# Degraded mode ends once the window p95 drops below this fraction of the
+# target (avoids flapping around the threshold)
+RECOVER_FRACTION = 0.8
+
+# Latency samples kept in the window at most
+MAX_SAMPLES = 2048
+
+
+def _p95(values):
+    """Nearest-rank p95 of sorted values"""
+    return values[max(0, math.ceil(len(values) * 0.95) - 1)]
+
+
+def lane_class(camera):
+    """EXIT for cameras listed in LP_EXIT_CAMERAS, ENTRY for all others"""
+    exits = {name.strip() for name in config.EXIT_CAMERAS.split(',') if name.strip()}
+    return EXIT if str(camera) in exits else ENTRY
+
+
+def job_class(key):
+    """
+    Priority class of an InferenceScheduler key
+
+    Args:
+        key (str): Camera name ('exit-1'), device key ('device-0') or
+            background lane key ('exit-1:continuous')
+
+    Returns:
+        str: RECOGNITION for requests, EXIT or ENTRY for background lanes
+    """
+    camera, _, kind = str(key).partition(':')
+    return lane_class(camera) if kind == 'continuous' else RECOGNITION
+
+
+def scheduler_priority(key):
+    """
+    Sort key of an InferenceScheduler key (lower runs first); requests for
+    exit cameras go before requests for entry cameras
+
+    Returns:
+        tuple: (class level, lane level)
+    """
+    camera = str(key).partition(':')[0]
+    return LEVELS[job_class(key)], LEVELS[lane_class(camera)]
+
+
+class PriorityGate:
+    """
+    Tracks running work per priority class and recent recognition latency
+
+    Usage:
+        with gate.track(RECOGNITION):
+            result = service.recognize_from_bytes(data)
+
+        gate.wait_turn(PREVIEW)          # yields to running recognitions
+        fps, quality = gate.preview_settings(config.PREVIEW_FPS)
+    """
+
+    def __init__(self, target_ms=None, window=None, max_defer=None):
+        """
+        Args:
+            target_ms (float): Recognition latency target (LP_RECOGNITION_TARGET_MS)
+            window (float): Seconds of latency samples considered (LP_PRIORITY_WINDOW)
+            max_defer (float): Longest a lower class waits for higher class
+                work before running anyway (LP_PRIORITY_MAX_DEFER)
+        """
+        self.target_ms = config.RECOGNITION_TARGET_MS if target_ms is None else target_ms
+        self.window = config.PRIORITY_WINDOW if window is None else window
+        self.max_defer = config.PRIORITY_MAX_DEFER if max_defer is None else max_defer
+
+        self._cond = threading.Condition()
+        self._active = {name: 0 for name in CLASSES}
+        self._latencies = deque()
+        self._degraded = False
+
+        # Stats
+        self.completed = {name: 0 for name in CLASSES}
+        self.deferred = {name: 0 for name in CLASSES}
+        self.defer_ms = {name: 0.0 for name in CLASSES}
+        self.rejected = {name: 0 for name in CLASSES}
+        self.degraded_periods = 0
+
+    @contextmanager
+    def track(self, name, started=None, record=True):
+        """
+        Mark work of class name as running
+
+        Args:
+            name (str): Priority class
+            started (float): time.monotonic() the work was requested (queue
+                wait counts towards the latency); default: now
+            record (bool): Add the latency to the window (False for the
+                first stages of staged work)
+        """
+        started = time.monotonic() if started is None else started
+        with self._cond:
+            self._active[name] += 1
+        try:
+            yield
+        finally:
+            now = time.monotonic()
+            with self._cond:
+                self._active[name] -= 1
+                self.completed[name] += 1
+                if record and name in RECOGNITION_CLASSES:
+                    self._latencies.append((now, (now - started) * 1000.0))
+                    if len(self._latencies) > MAX_SAMPLES:
+                        self._latencies.popleft()
+                self._cond.notify_all()
+
+    def _running_above(self, name):
+        """Running work of higher classes (caller holds the lock)"""
+        return sum(self._active[higher] for higher in CLASSES[:LEVELS[name]])
+
+    def busy_above(self, name):
+        """True while work of a higher class than name is running"""
+        with self._cond:
+            return self._running_above(name) > 0
+
+    def wait_turn(self, name, timeout=None):
+        """
+        Wait while higher class work is running
+
+        Args:
+            name (str): Class of the caller
+            timeout (float): Maximum wait (default: LP_PRIORITY_MAX_DEFER)
+
+        Returns:
+            bool: True if no higher class work is running, False if the
+            wait timed out
+        """
+        timeout = self.max_defer if timeout is None else timeout
+        with self._cond:
+            if not self._running_above(name):
+                return True
+            started = time.monotonic()
+            deadline = started + timeout
+            self.deferred[name] += 1
+            while self._running_above(name):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            self.defer_ms[name] += (time.monotonic() - started) * 1000.0
+            return not self._running_above(name)
+
+    def admit(self, name):
+        """
+        Admission for diagnostics: refused while recognition is over its
+        latency target, otherwise waits for running recognitions
+
+        Returns:
+            bool: False if the caller should answer 'busy'
+        """
+        if self.degraded:
+            with self._cond:
+                self.rejected[name] += 1
+            return False
+        self.wait_turn(name)
+        return True
+
+    def _window_p95(self, now):
+        """p95 of recent recognition latency in ms (caller holds the lock)"""
+        while self._latencies and now - self._latencies[0][0] > self.window:
+            self._latencies.popleft()
+        if not self._latencies:
+            return None
+        return _p95(sorted(ms for _, ms in self._latencies))
+
+    def recognition_p95(self, since=None):
+        """
+        p95 recognition latency in ms over the window
+
+        Args:
+            since (float): Only count work finished after this time.monotonic()
+
+        Returns:
+            float: Latency, or None without samples
+        """
+        with self._cond:
+            now = time.monotonic()
+            if since is None:
+                return self._window_p95(now)
+            self._window_p95(now)
+            values = sorted(ms for finished, ms in self._latencies if finished >= since)
+        if not values:
+            return None
+        return _p95(values)
+
+    @property
+    def degraded(self):
+        """True while recent recognition latency is over the target"""
+        if self.target_ms <= 0:
+            return False
+        with self._cond:
+            p95 = self._window_p95(time.monotonic())
+            if p95 is None:
+                self._degraded = False
+            elif not self._degraded and p95 > self.target_ms:
+                self._degraded = True
+                self.degraded_periods += 1
+                print(f"🐢 Recognition p95 {p95:.0f} ms over {self.target_ms:.0f} ms target, degrading preview")
+            elif self._degraded and p95 < self.target_ms * RECOVER_FRACTION:
+                self._degraded = False
+                print(f"🐇 Recognition p95 back to {p95:.0f} ms, preview restored")
+            return self._degraded
+
+    def preview_settings(self, fps):
+        """
+        Preview capture rate and JPEG quality for the current load
+
+        Args:
+            fps (float): Normal preview rate (LP_PREVIEW_FPS)
+
+        Returns:
+            tuple: (fps, jpeg quality or None for the encoder default)
+        """
+        if not self.degraded:
+            return fps, None
+        degraded_fps = min(fps, config.PREVIEW_DEGRADED_FPS) if fps > 0 else config.PREVIEW_DEGRADED_FPS
+        return degraded_fps, config.PREVIEW_DEGRADED_QUALITY
+
+    def get_stats(self):
+        degraded = self.degraded
+        with self._cond:
+            p95 = self._window_p95(time.monotonic())
+            return {
+                'targetMs': self.target_ms,
+                'recognitionP95Ms': round(p95, 1) if p95 is not None else None,
+                'samples': len(self._latencies),
+                'degraded': degraded,
+                'degradedPeriods': self.degraded_periods,
+                'exitCameras': [name.strip() for name in config.EXIT_CAMERAS.split(',') if name.strip()],
+                'classes': {
+                    name: {
+                        'running': self._active[name],
+                        'completed': self.completed[name],
+                        'deferred': self.deferred[name],
+                        'deferMs': round(self.defer_ms[name], 1),
+                        'rejected': self.rejected[name]
+                    } for name in CLASSES
+                }
+            }
+
+
+# ==========================================
+# Global instance
+# ==========================================
+_gate_instance = None
+
+
+def get_priority_gate():
+    """
+    Get singleton priority gate
+
+    Returns:
+        PriorityGate: Singleton instance
+    """
+    global _gate_instance
+    if _gate_instance is None:
+        _gate_instance = PriorityGate()
+    return _gate_instance
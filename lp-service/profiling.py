@@ -0,0 +1,275 @@
+"""
+Per-request profiling
+Opt-in profiles of single recognition requests: cProfile (including the
+inference job run on the scheduler thread), torch.profiler CPU operator
+traces and tracemalloc allocation diffs, stored in a bounded directory
+
+A request is profiled when it carries the admin token (X-LP-Profile header
+or ?profile= query flag, LP_PROFILE_TOKEN) or is picked by sampling
+(LP_PROFILE_SAMPLE_RATE)
+"""
+import cProfile
+import io
+import json
+import os
+import pstats
+import random
+import shutil
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from datetime import datetime
+
+import config
+
+HEADER = 'X-LP-Profile'
+
+_local = threading.local()
+
+# torch.profiler and tracemalloc are process wide: one torch trace at a
+# time, tracemalloc kept running while any profile needs it
+_torch_lock = threading.Lock()
+_tracemalloc_lock = threading.Lock()
+_tracemalloc_users = 0
+
+
+def is_enabled():
+    return bool(config.PROFILE_TOKEN) or config.PROFILE_SAMPLE_RATE > 0
+
+
+def is_authorized(headers, args):
+    """True if the request carries the admin profiling token"""
+    token = config.PROFILE_TOKEN
+    if not token:
+        return False
+    return headers.get(HEADER) == token or args.get('profile') == token
+
+
+def should_profile(headers, args):
+    """
+    Decide whether to profile a request
+
+    Returns:
+        str: 'requested', 'sampled' or None
+    """
+    if is_authorized(headers, args):
+        return 'requested'
+    if config.PROFILE_SAMPLE_RATE > 0 and random.random() < config.PROFILE_SAMPLE_RATE:
+        return 'sampled'
+    return None
+
+
+def _start_tracemalloc():
+    global _tracemalloc_users
+    with _tracemalloc_lock:
+        if _tracemalloc_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start(config.PROFILE_TRACEMALLOC_FRAMES)
+        _tracemalloc_users += 1
+    return tracemalloc.take_snapshot()
+
+
+def _stop_tracemalloc():
+    global _tracemalloc_users
+    snapshot = tracemalloc.take_snapshot()
+    with _tracemalloc_lock:
+        _tracemalloc_users -= 1
+        if _tracemalloc_users == 0:
+            tracemalloc.stop()
+    return snapshot
+
+
+class RequestProfile:
+    """
+    Profile of one request
+
+    Usage:
+        profile = RequestProfile('/api/recognize', 'requested')
+        profile.start()
+        ...
+        profile.stop(status=200)
+    """
+
+    def __init__(self, endpoint, reason):
+        self.id = f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+        self.endpoint = endpoint
+        self.reason = reason
+        self.profiler = cProfile.Profile()
+        self.job_stats = []
+        self._torch_profiler = None
+        self._snapshot = None
+        self._start = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        if config.PROFILE_TRACEMALLOC:
+            self._snapshot = _start_tracemalloc()
+        # Only profile torch if it is already loaded by the service
+        torch = sys.modules.get('torch')
+        if config.PROFILE_TORCH and torch is not None and _torch_lock.acquire(blocking=False):
+            try:
+                from torch.profiler import profile, ProfilerActivity
+                self._torch_profiler = profile(activities=[ProfilerActivity.CPU])
+                self._torch_profiler.__enter__()
+            except Exception as e:
+                print(f"⚠️ torch.profiler unavailable: {e}")
+                self._torch_profiler = None
+                _torch_lock.release()
+        self._start = time.perf_counter()
+        _local.profile = self
+        self.profiler.enable()
+
+    def add_job_stats(self, profiler):
+        """Merge cProfile data of work done on another thread"""
+        with self._lock:
+            self.job_stats.append(profiler)
+
+    def stop(self, status=None):
+        """
+        Stop profiling and write the report
+
+        Returns:
+            str: Profile directory
+        """
+        self.profiler.disable()
+        _local.profile = None
+        duration = time.perf_counter() - self._start
+        # Snapshot before writing the reports so they do not show up in the diff
+        after = _stop_tracemalloc() if self._snapshot is not None else None
+
+        directory = os.path.join(config.PROFILE_DIR, self.id)
+        os.makedirs(directory, exist_ok=True)
+        files = []
+
+        if self._torch_profiler is not None:
+            try:
+                self._torch_profiler.__exit__(None, None, None)
+                self._torch_profiler.export_chrome_trace(os.path.join(directory, 'torch_trace.json'))
+                with open(os.path.join(directory, 'torch_ops.txt'), 'w') as f:
+                    f.write(self._torch_profiler.key_averages().table(
+                        sort_by='self_cpu_time_total', row_limit=40))
+                files += ['torch_trace.json', 'torch_ops.txt']
+            except Exception as e:
+                print(f"⚠️ Could not write torch profile: {e}")
+            finally:
+                _torch_lock.release()
+
+        stats = pstats.Stats(self.profiler)
+        with self._lock:
+            for job in self.job_stats:
+                stats.add(job)
+        stats.dump_stats(os.path.join(directory, 'cprofile.prof'))
+        text = io.StringIO()
+        pstats.Stats(os.path.join(directory, 'cprofile.prof'), stream=text) \
+            .sort_stats('cumulative').print_stats(config.PROFILE_TOP)
+        with open(os.path.join(directory, 'cprofile.txt'), 'w') as f:
+            f.write(text.getvalue())
+        files += ['cprofile.prof', 'cprofile.txt']
+
+        if after is not None:
+            ignore = [tracemalloc.Filter(False, tracemalloc.__file__),
+                      tracemalloc.Filter(False, cProfile.__file__),
+                      tracemalloc.Filter(False, __file__)]
+            diff = after.filter_traces(ignore).compare_to(self._snapshot.filter_traces(ignore), 'lineno')
+            with open(os.path.join(directory, 'tracemalloc.txt'), 'w') as f:
+                # Process wide: includes allocations of concurrent requests
+                f.write(f"Top {config.PROFILE_TOP} allocation changes during request\n\n")
+                for entry in diff[:config.PROFILE_TOP]:
+                    f.write(f"{entry}\n")
+            files.append('tracemalloc.txt')
+
+        meta = {
+            'id': self.id,
+            'endpoint': self.endpoint,
+            'reason': self.reason,
+            'status': status,
+            'durationMs': round(duration * 1000, 1),
+            'timestamp': datetime.now().isoformat(),
+            'files': files
+        }
+        with open(os.path.join(directory, 'meta.json'), 'w') as f:
+            json.dump(meta, f, indent=2)
+
+        prune_profiles()
+        print(f"🔬 Profile {self.id} saved ({meta['durationMs']} ms, {self.endpoint})")
+        return directory
+
+
+def current_profile():
+    """Profile active on this thread (None if not profiling)"""
+    return getattr(_local, 'profile', None)
+
+
+def bind(fn):
+    """
+    Wrap fn so that, when called on another thread (e.g. the inference
+    scheduler), its cProfile data is added to the current request's profile
+
+    Returns:
+        callable: fn itself when the current request is not profiled
+    """
+    profile = current_profile()
+    if profile is None:
+        return fn
+
+    def profiled(*args, **kwargs):
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            profiler.disable()
+            profile.add_job_stats(profiler)
+    return profiled
+
+
+# ==========================================
+# Profile directory
+# ==========================================
+def _profile_dirs():
+    if not os.path.isdir(config.PROFILE_DIR):
+        return []
+    dirs = [os.path.join(config.PROFILE_DIR, name) for name in os.listdir(config.PROFILE_DIR)]
+    return sorted((d for d in dirs if os.path.isdir(d)), key=os.path.getmtime)
+
+
+def _dir_size(directory):
+    return sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory))
+
+
+def prune_profiles():
+    """Delete oldest profiles beyond LP_PROFILE_MAX_COUNT / LP_PROFILE_MAX_MB"""
+    dirs = _profile_dirs()
+    sizes = {d: _dir_size(d) for d in dirs}
+    total = sum(sizes.values())
+    limit = config.PROFILE_MAX_MB * 1024 * 1024
+    while dirs and (len(dirs) > config.PROFILE_MAX_COUNT or total > limit):
+        oldest = dirs.pop(0)
+        total -= sizes[oldest]
+        shutil.rmtree(oldest, ignore_errors=True)
+
+
+def list_profiles():
+    """Stored profiles, newest first"""
+    profiles = []
+    for directory in reversed(_profile_dirs()):
+        try:
+            with open(os.path.join(directory, 'meta.json')) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            continue
+        meta['sizeBytes'] = _dir_size(directory)
+        profiles.append(meta)
+    return profiles
+
+
+def profile_path(profile_id, filename):
+    """
+    Path of a stored profile file (None if it does not exist or the name
+    tries to leave the profile directory)
+    """
+    if os.sep in profile_id or os.sep in filename or profile_id.startswith('.') or filename.startswith('.'):
+        return None
+    path = os.path.join(config.PROFILE_DIR, profile_id, filename)
+    return path if os.path.isfile(path) else None
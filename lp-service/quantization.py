@@ -0,0 +1,433 @@
+"""
+INT8 model variants
+Post-training static quantization of the detector and OCR models: every
+YOLOv5 Conv block (conv + folded batch norm) runs as an INT8 convolution,
+activations and the Detect head stay FP32. Observers are calibrated by
+running the recognition pipeline on local sample images
+
+Variants are saved next to the FP32 weights (LP_detector.pt ->
+LP_detector.int8.pt) together with an evaluation report: latency, file size,
+RSS and plate-string agreement with the FP32 pipeline. The service loads a
+variant only with LP_MODEL_VARIANT=int8 and only if its agreement reaches
+LP_QUANT_MIN_AGREEMENT, otherwise it keeps the FP32 model
+
+Usage:
+    python quantization.py [--images DIR] [--no-rss]   # build, evaluate and save variants
+    python quantization.py --show                      # print the saved reports
+    LP_MODEL_VARIANT=int8 python api_server.py
+"""
+import copy
+import hashlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+import config
+
+FORMAT = 'lp-int8-v1'
+SUFFIX = '.int8.pt'
+
+# Model key -> service attribute holding its AutoShape model
+MODELS = {
+    'detector': 'yolo_LP_detect',
+    'ocr': 'yolo_license_plate'
+}
+
+
+def variant_path(model_path):
+    """LP_detector.pt -> LP_detector.int8.pt"""
+    return os.path.splitext(model_path)[0] + SUFFIX
+
+
+def file_digest(path):
+    """BLAKE2b of a file, ties a variant to the FP32 weights it was built from"""
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def default_engine():
+    """QNNPACK on ARM (Raspberry Pi), the x86 backend elsewhere"""
+    import torch
+    if config.QUANT_ENGINE:
+        return config.QUANT_ENGINE
+    supported = torch.backends.quantized.supported_engines
+    arm = platform.machine().lower() in ('aarch64', 'arm64', 'armv7l', 'armv6l')
+    for engine in (('qnnpack',) if arm else ('x86', 'fbgemm')):
+        if engine in supported:
+            return engine
+    return supported[-1]
+
+
+def _rss_mb():
+    """(current, peak) resident memory of this process in MB"""
+    rss = peak = None
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    rss = round(int(line.split()[1]) / 1024.0, 1)
+                elif line.startswith('VmHWM:'):
+                    peak = round(int(line.split()[1]) / 1024.0, 1)
+    except OSError:
+        pass
+    return rss, peak
+
+
+# ==========================================
+# Model surgery
+# ==========================================
+def _detection_model(autoshape):
+    """
+    (holder, attribute) of the raw nn.Module inside an AutoShape model
+    (AutoShape -> DetectMultiBackend -> DetectionModel)
+    """
+    holder = autoshape.model
+    if hasattr(holder, 'model') and hasattr(holder.model, 'modules'):
+        return holder, 'model'
+    return autoshape, 'model'
+
+
+def _quant_structure(model, engine):
+    """
+    Copy of model with every Conv block wrapped for quantization
+
+    Batch norm is folded into the convolution first; the SiLU activation
+    stays FP32 between a quantize/dequantize pair around each convolution
+
+    Returns:
+        tuple: (prepared copy, number of wrapped convolutions)
+    """
+    import torch.ao.quantization as tq
+    from torch import nn
+
+    model = copy.deepcopy(model).float().eval()
+    qconfig = tq.get_default_qconfig(engine)
+    wrapped = 0
+    for module in model.modules():
+        # YOLOv5 models.common.Conv (fused or not)
+        if type(module).__name__ != 'Conv' or not isinstance(getattr(module, 'conv', None), nn.Conv2d):
+            continue
+        if isinstance(getattr(module, 'bn', None), nn.BatchNorm2d):
+            tq.fuse_modules(module, [['conv', 'bn']], inplace=True)
+        module.conv = nn.Sequential(tq.QuantStub(), module.conv, tq.DeQuantStub())
+        module.conv.qconfig = qconfig
+        wrapped += 1
+    tq.prepare(model, inplace=True)
+    return model, wrapped
+
+
+def _convert(prepared):
+    import torch.ao.quantization as tq
+    return tq.convert(prepared, inplace=True)
+
+
+def quantize_models(service, images, engine=None):
+    """
+    Calibrate and quantize the service's detector and OCR models
+
+    Both models are swapped for observed copies while the recognition
+    pipeline runs over images, so calibration sees the real inputs (letterboxed
+    frames for the detector, plate crops for OCR)
+
+    Returns:
+        dict: model key -> quantized nn.Module
+    """
+    import torch
+    engine = engine or default_engine()
+    torch.backends.quantized.engine = engine
+
+    originals, prepared = {}, {}
+    for key, attr in MODELS.items():
+        holder, name = _detection_model(getattr(service, attr))
+        originals[key] = (holder, name, getattr(holder, name))
+        prepared[key], wrapped = _quant_structure(originals[key][2], engine)
+        setattr(holder, name, prepared[key])
+        print(f"   {key}: {wrapped} convolutions")
+    try:
+        for img in images:
+            service._process_image(img)
+    finally:
+        for holder, name, model in originals.values():
+            setattr(holder, name, model)
+    return {key: _convert(model) for key, model in prepared.items()}
+
+
+def save_variant(model, path, source_path, engine, report=None):
+    import torch
+    torch.save({
+        'format': FORMAT,
+        'engine': engine,
+        'source': os.path.basename(source_path),
+        'sourceDigest': file_digest(source_path),
+        'created': datetime.now().isoformat(),
+        'report': report or {},
+        'state_dict': model.state_dict()
+    }, path)
+
+
+def read_variant(path):
+    """Checkpoint dict of a saved variant (None if missing)"""
+    import torch
+    if not os.path.exists(path):
+        return None
+    return torch.load(path, map_location='cpu', weights_only=False)
+
+
+def load_variant(autoshape, model_path, min_agreement=None, partner='fp32'):
+    """
+    Swap the INT8 variant of model_path into a loaded AutoShape model
+
+    Refused (the FP32 model is kept) if the variant is missing, was built
+    from different FP32 weights, needs an engine this torch lacks, was never
+    evaluated on plate reads, or agrees with FP32 on fewer than min_agreement
+    of the evaluation images
+
+    Args:
+        partner (str): Variant already loaded for the other model; errors of
+            two quantized models add up, so 'int8' checks the agreement
+            measured with both quantized
+
+    Returns:
+        dict: {'variant': 'int8' | 'fp32', 'path', 'agreement', 'refused': reason}
+    """
+    import torch
+    min_agreement = config.QUANT_MIN_AGREEMENT if min_agreement is None else min_agreement
+    path = variant_path(model_path)
+    status = {'variant': 'fp32', 'path': path, 'agreement': None, 'refused': None}
+    try:
+        checkpoint = read_variant(path)
+    except Exception as e:
+        status['refused'] = f'unreadable: {e}'
+        return status
+    if checkpoint is None or checkpoint.get('format') != FORMAT:
+        status['refused'] = 'no INT8 variant (run quantization.py)'
+        return status
+
+    report = checkpoint.get('report') or {}
+    agreement = report.get('pairAgreement' if partner == 'int8' else 'agreement')
+    status['agreement'] = agreement
+    engine = checkpoint.get('engine')
+    if checkpoint.get('sourceDigest') != file_digest(model_path):
+        status['refused'] = f"built from different weights than {os.path.basename(model_path)}"
+    elif engine not in torch.backends.quantized.supported_engines:
+        status['refused'] = f'quantized engine {engine} not available'
+    elif agreement is None or not report.get('platesEvaluated'):
+        status['refused'] = 'not evaluated on any plate read'
+    elif agreement < min_agreement:
+        status['refused'] = f'agreement {agreement:.1%} below {min_agreement:.1%}'
+    if status['refused']:
+        return status
+
+    torch.backends.quantized.engine = engine
+    holder, name = _detection_model(autoshape)
+    model, _ = _quant_structure(getattr(holder, name), engine)
+    model = _convert(model)
+    model.load_state_dict(checkpoint['state_dict'])
+    setattr(holder, name, model)
+    status['variant'] = 'int8'
+    status['engine'] = engine
+    return status
+
+
+# ==========================================
+# Evaluation
+# ==========================================
+def run_pipeline(service, images, repeat=1):
+    """
+    Returns:
+        tuple: (mean milliseconds per image, list of plate reads or None)
+    """
+    service._process_image(images[0])  # warm-up
+    reads, durations = [], []
+    for img in images:
+        result = None
+        for _ in range(max(1, repeat)):
+            t0 = time.perf_counter()
+            result = service._process_image(img)
+            durations.append((time.perf_counter() - t0) * 1000.0)
+        reads.append(result['licensePlate'] if result.get('success') else None)
+    return sum(durations) / len(durations), reads
+
+
+def agreement(reads, reference):
+    """Share of images whose plate read matches the FP32 read"""
+    if not reference:
+        return 1.0
+    return sum(1 for a, b in zip(reads, reference) if a == b) / float(len(reference))
+
+
+def measure_rss(variant):
+    """
+    Resident memory of a fresh service process using variant
+
+    Returns:
+        dict: {'rssMb', 'peakRssMb'} or {} if the measurement failed
+    """
+    env = dict(os.environ, LP_MODEL_VARIANT=variant, LP_AUTOTUNE='0')
+    try:
+        out = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '--measure-rss'],
+            env=env, capture_output=True, text=True, timeout=600,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        )
+        if out.returncode != 0:
+            raise RuntimeError((out.stderr.strip().splitlines() or ['exit code %d' % out.returncode])[-1])
+        return json.loads(out.stdout.strip().splitlines()[-1])
+    except Exception as e:
+        print(f"⚠️ RSS measurement for {variant} failed: {e}")
+        return {}
+
+
+def build_variants(service, images, engine=None, repeat=2, rss=True):
+    """
+    Quantize both models, evaluate every FP32/INT8 combination against the
+    FP32 pipeline and save the variants with their reports
+
+    Returns:
+        dict: Evaluation report
+    """
+    engine = engine or default_engine()
+    paths = {key: service.model_paths[key] for key in MODELS}
+
+    print(f"🔍 FP32 reference on {len(images)} images...")
+    fp32_ms, reference = run_pipeline(service, images, repeat)
+    plates = sum(1 for r in reference if r)
+
+    print(f"⚙️ Calibrating INT8 models ({engine})...")
+    quantized = quantize_models(service, images, engine)
+
+    combos = [('detector',), ('ocr',), ('detector', 'ocr')]
+    rows = [{'models': 'fp32', 'meanMs': round(fp32_ms, 1), 'agreement': 1.0}]
+    per_model = {}
+    pair = None
+    for combo in combos:
+        swapped = []
+        for key in combo:
+            holder, name = _detection_model(getattr(service, MODELS[key]))
+            swapped.append((holder, name, getattr(holder, name)))
+            setattr(holder, name, quantized[key])
+        try:
+            mean_ms, reads = run_pipeline(service, images, repeat)
+        finally:
+            for holder, name, model in swapped:
+                setattr(holder, name, model)
+        row = {'models': '+'.join(combo) + ' int8', 'meanMs': round(mean_ms, 1),
+               'agreement': round(agreement(reads, reference), 3)}
+        rows.append(row)
+        if len(combo) == 1:
+            per_model[combo[0]] = row
+        else:
+            pair = row
+        print(f"   {row['models']}: {row['meanMs']} ms, agreement {row['agreement']:.0%}")
+
+    report = {
+        'created': datetime.now().isoformat(),
+        'engine': engine,
+        'images': len(images),
+        'platesEvaluated': plates,
+        'runs': rows,
+        'models': {}
+    }
+    for key, model in quantized.items():
+        path = variant_path(paths[key])
+        model_report = {
+            'agreement': per_model[key]['agreement'],
+            'pairAgreement': pair['agreement'],
+            'meanMs': per_model[key]['meanMs'],
+            'fp32MeanMs': round(fp32_ms, 1),
+            'platesEvaluated': plates,
+            'images': len(images)
+        }
+        save_variant(model, path, paths[key], engine, model_report)
+        model_report.update({
+            'path': path,
+            'fp32SizeMb': round(os.path.getsize(paths[key]) / 1e6, 2),
+            'int8SizeMb': round(os.path.getsize(path) / 1e6, 2)
+        })
+        report['models'][key] = model_report
+        print(f"💾 Saved {path}")
+
+    if rss:
+        report['rss'] = {variant: measure_rss(variant) for variant in ('fp32', 'int8')}
+    return report
+
+
+def print_report(report):
+    print(f"\n{report['images']} images, {report['platesEvaluated']} FP32 plate reads, engine {report['engine']}\n")
+    print(f"{'models':<22}{'ms/image':>10}{'agreement':>11}")
+    for row in report['runs']:
+        print(f"{row['models']:<22}{row['meanMs']:>10.1f}{row['agreement']:>10.0%}")
+    print()
+    for key, info in report['models'].items():
+        print(f"{key}: {info['fp32SizeMb']} MB -> {info['int8SizeMb']} MB ({info['path']})")
+    for variant, stats in (report.get('rss') or {}).items():
+        if stats:
+            print(f"RSS {variant}: {stats.get('rssMb')} MB (peak {stats.get('peakRssMb')} MB)")
+    if not report['platesEvaluated']:
+        print("⚠️ No plate was read on these images - variants will be refused until "
+              "evaluated on images with plates (--images)")
+
+
+def main():
+    import argparse
+    ap = argparse.ArgumentParser(description='Build and evaluate INT8 model variants')
+    ap.add_argument('--images', default=None, help='Calibration/evaluation images (default: LP_AUTOTUNE_IMAGES)')
+    ap.add_argument('--limit', type=int, default=None, help='Maximum images')
+    ap.add_argument('--engine', default=None, help='Quantized engine (default: qnnpack on ARM, x86 elsewhere)')
+    ap.add_argument('--repeat', type=int, default=2, help='Timed runs per image')
+    ap.add_argument('--no-rss', action='store_true', help='Skip measuring RSS in fresh processes')
+    ap.add_argument('--report', default=None, help='Also write the report to this JSON file')
+    ap.add_argument('--show', action='store_true', help='Print the reports of saved variants and exit')
+    ap.add_argument('--measure-rss', action='store_true', help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    from lp_recognition_service import get_recognition_service
+
+    if args.measure_rss:
+        service = get_recognition_service()
+        from autotune import calibration_images
+        images, _ = calibration_images(2)
+        for img in images:
+            service._process_image(img)
+        rss, peak = _rss_mb()
+        print(json.dumps({'rssMb': rss, 'peakRssMb': peak, 'variants': service.model_variants}))
+        return
+
+    if args.show:
+        from autotune import MODEL_DIR
+        for key, name in (('detector', 'LP_detector.pt'), ('ocr', 'LP_ocr.pt')):
+            path = variant_path(os.path.join(MODEL_DIR, name))
+            checkpoint = read_variant(path)
+            if checkpoint is None:
+                print(f"{key}: no variant at {path}")
+            else:
+                print(f"{key}: {path} ({checkpoint['engine']}, {checkpoint['created']})")
+                print(json.dumps(checkpoint['report'], indent=2))
+        return
+
+    if args.images:
+        config.AUTOTUNE_IMAGES = args.images
+    # Variants are always built from and compared with the FP32 models
+    config.MODEL_VARIANT = 'fp32'
+    from autotune import calibration_images
+    images, source = calibration_images(args.limit)
+    print(f"🖼️ {len(images)} images from {source}")
+
+    service = get_recognition_service()
+    report = build_variants(service, images, args.engine, args.repeat, rss=not args.no_rss)
+    print_report(report)
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"📝 Report written to {args.report}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,189 @@
+"""
+Result cache for exact duplicate recognition requests
+Recognition results are cached by a BLAKE2 hash of the image bytes, so a
+retried or re-submitted upload is answered without inference. Bounded by
+entry count, memory and age (LRU eviction); concurrent requests for the
+same bytes are coalesced into one inference (single-flight)
+"""
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+import config
+
+HIT = 'hit'
+MISS = 'miss'
+COALESCED = 'coalesced'
+
+# Rough per-entry overhead of the key, OrderedDict node and bookkeeping
+ENTRY_OVERHEAD = 200
+
+
+def content_key(data):
+    """Hash of image bytes (128-bit BLAKE2b, hex)"""
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+class _Flight:
+    """One in-progress computation other requests can wait for"""
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class ResultCache:
+    """
+    LRU cache of recognition results with TTL, memory cap and single-flight
+
+    Usage:
+        result, status = cache.get_or_compute(image_bytes, lambda: recognize(image_bytes))
+    """
+
+    def __init__(self, max_entries=None, max_mb=None, ttl=None):
+        self.max_entries = config.RESULT_CACHE_SIZE if max_entries is None else max_entries
+        self.max_bytes = int((config.RESULT_CACHE_MB if max_mb is None else max_mb) * 1024 * 1024)
+        self.ttl = config.RESULT_CACHE_TTL if ttl is None else ttl
+        self._entries = OrderedDict()  # key -> (result, size, expires)
+        self._flights = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        # Stats
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @property
+    def enabled(self):
+        return self.max_entries > 0 and self.max_bytes > 0 and self.ttl > 0
+
+    @staticmethod
+    def _size(result):
+        return len(json.dumps(result, default=str)) + ENTRY_OVERHEAD
+
+    def _lookup(self, key, now):
+        """Cached result or None (caller holds the lock)"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        result, size, expires = entry
+        if now >= expires:
+            del self._entries[key]
+            self._bytes -= size
+            self.expirations += 1
+            return None
+        self._entries.move_to_end(key)
+        return result
+
+    def _store(self, key, result, now):
+        size = self._size(result)
+        if size > self.max_bytes:
+            return
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._bytes -= old[1]
+        self._entries[key] = (result, size, now + self.ttl)
+        self._bytes += size
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            _, (_, evicted, _) = self._entries.popitem(last=False)
+            self._bytes -= evicted
+            self.evictions += 1
+
+    def get_or_compute(self, data, compute, cacheable=None):
+        """
+        Cached result for data, or compute it (once for concurrent callers)
+
+        Args:
+            data (bytes): Image bytes
+            compute (callable): () -> result dict
+            cacheable (callable): result -> bool, results it rejects are
+                returned but not stored (e.g. transient errors)
+
+        Returns:
+            tuple: (result dict, 'hit' | 'miss' | 'coalesced')
+        """
+        if not self.enabled:
+            return compute(), MISS
+
+        key = content_key(data)
+        with self._lock:
+            result = self._lookup(key, time.monotonic())
+            if result is not None:
+                self.hits += 1
+                return dict(result), HIT
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                self.misses += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return dict(flight.result), COALESCED
+
+        try:
+            result = compute()
+            flight.result = result
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+                if flight.error is None and (cacheable is None or cacheable(flight.result)):
+                    self._store(key, flight.result, time.monotonic())
+            flight.done.set()
+        return dict(result), MISS
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def get_stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses + self.coalesced
+            return {
+                'enabled': self.enabled,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'maxEntries': self.max_entries,
+                'maxBytes': self.max_bytes,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'coalesced': self.coalesced,
+                # Coalesced requests were also answered without their own inference
+                'hitRate': round((self.hits + self.coalesced) / lookups, 3) if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'inFlight': len(self._flights)
+            }
+
+
+# Singleton instance
+_cache_instance = None
+
+
+def get_result_cache():
+    """
+    Get singleton result cache
+
+    Returns:
+        ResultCache: Singleton instance
+    """
+    global _cache_instance
+    if _cache_instance is None:
+        _cache_instance = ResultCache()
+    return _cache_instance
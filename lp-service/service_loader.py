@@ -0,0 +1,145 @@
+"""
+Background loader for the recognition service
+Heavy imports (torch, cv2, numpy, YOLOv5) and model loading run in a
+background thread so the API answers /health right after process start
+"""
+import importlib
+import threading
+import time
+
+import config
+
+# Imported in this order so the load report shows what each one costs
+HEAVY_MODULES = ('numpy', 'cv2', 'torch', 'torchvision')
+
+# Only needed by the YOLOv5 backend (fake models run without them)
+TORCH_MODULES = ('torch', 'torchvision')
+
+
+def heavy_modules():
+    """HEAVY_MODULES the configured model backend needs"""
+    if config.MODEL_BACKEND == 'fake':
+        return tuple(name for name in HEAVY_MODULES if name not in TORCH_MODULES)
+    return HEAVY_MODULES
+
+LOADING = 'loading'
+READY = 'ready'
+ERROR = 'error'
+
+
+class ServiceLoader:
+    """
+    Loads the recognition service once, off the request path
+
+    States: 'loading' -> 'ready' | 'error'
+    """
+
+    def __init__(self, factory=None):
+        """
+        Args:
+            factory (callable): Returns the service instance
+                (default: lp_recognition_service.get_recognition_service)
+        """
+        self.factory = factory
+        self.state = LOADING
+        self.service = None
+        self.error = None
+        self.timings = {}
+        self.started_at = time.time()
+        self._ready = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._callbacks = []
+
+    def start(self):
+        """Start loading in background (no-op if already started)"""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(
+                target=self._load, name='service-loader', daemon=True
+            )
+            self._thread.start()
+
+    def on_ready(self, callback):
+        """
+        Call callback(service) once the service is ready (immediately if it
+        already is). Callbacks run on the loader thread
+        """
+        with self._lock:
+            if not self.is_ready:
+                self._callbacks.append(callback)
+                return
+        callback(self.service)
+
+    def _run_callbacks(self):
+        with self._lock:
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback(self.service)
+            except Exception as e:
+                print(f"⚠️ Service ready callback failed: {e}")
+
+    def _load(self):
+        start = time.perf_counter()
+        try:
+            for name in heavy_modules():
+                t0 = time.perf_counter()
+                try:
+                    importlib.import_module(name)
+                except ImportError as e:
+                    print(f"⚠️ Optional module {name} not available: {e}")
+                self.timings[f'import_{name}_ms'] = round((time.perf_counter() - t0) * 1000, 1)
+
+            t0 = time.perf_counter()
+            factory = self.factory
+            if factory is None:
+                from lp_recognition_service import get_recognition_service
+                factory = get_recognition_service
+            service = factory()
+            self.timings['models_ms'] = round((time.perf_counter() - t0) * 1000, 1)
+
+            if config.AUTOTUNE:
+                # Saved profile, or first-start calibration (before 'ready',
+                # so no request runs while settings are being timed)
+                t0 = time.perf_counter()
+                import autotune
+                autotune.tune(service)
+                self.timings['autotune_ms'] = round((time.perf_counter() - t0) * 1000, 1)
+
+            with self._lock:
+                self.service = service
+                self.state = READY
+            print(f"✅ Recognition service ready in {time.perf_counter() - start:.1f}s")
+            self._run_callbacks()
+        except Exception as e:
+            self.error = str(e)
+            self.state = ERROR
+            print(f"❌ Failed to initialize recognition service: {e}")
+        finally:
+            self.timings['total_ms'] = round((time.perf_counter() - start) * 1000, 1)
+            self._ready.set()
+
+    @property
+    def is_ready(self):
+        return self.state == READY
+
+    def wait(self, timeout=None):
+        """
+        Block until loading finished
+
+        Returns:
+            bool: True if the service is ready
+        """
+        self._ready.wait(timeout)
+        return self.is_ready
+
+    def status(self):
+        """Loader state for /health"""
+        return {
+            'state': self.state,
+            'error': self.error,
+            'uptime': round(time.time() - self.started_at, 1),
+            'timings': dict(self.timings)
+        }
@@ -0,0 +1,507 @@
+"""
+Shared-memory frame ring
+A capture process writes raw frames into a multiprocessing.shared_memory
+ring; other processes map them zero-copy (no pickling of multi-megabyte
+frames) and capture keeps its own GIL, so long inference calls no longer
+delay or drop frames
+
+Layout:
+    header   64 bytes: magic, slot count, slot size, last published sequence,
+             latest slot, claimed sequence, dropped / blocked counters
+    slots    slot_count x 64 byte slot headers (sequence, pins, reads,
+             shape, format, timestamp, length)
+    data     slot_count x slot_size bytes of pixels
+
+Coordination: one cross-process lock guards the headers only, pixel copies
+happen outside it. A reader pins the newest slot while it uses it; the
+writer never reuses a pinned slot or the newest one, so pinned frames stay
+intact. A frame overwritten before anyone read it counts as dropped
+
+Usage:
+    ring = FrameRing.create(slots=4, slot_size=8 << 20)
+    capture = CaptureProcess('picamera', ring)
+    capture.start()
+    with ring.acquire(newer_than=seq, timeout=1.0) as shared:
+        result = process(shared.frame)   # frame memory lives in the ring
+"""
+import multiprocessing
+import queue
+import struct
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+import config
+from frame_pipeline import Frame, BGR, RGB, GRAY
+
+MAGIC = b'LPSHM001'
+
+HEADER = struct.Struct('<8sIIQqQQQ')    # magic, slot_count, slot_size, published, latest, claimed, dropped, blocked
+HEADER_SIZE = 64
+SLOT = struct.Struct('<qiiIIIIdQ')      # seq, pins, reads, height, width, channels, format, timestamp, length
+SLOT_SIZE = 64
+
+FORMATS = (BGR, RGB, GRAY)
+
+# Spawned children do not inherit the parent's torch/camera state
+_mp = multiprocessing.get_context('spawn')
+
+
+def _align(n, to=64):
+    return (n + to - 1) // to * to
+
+
+class SharedFrame:
+    """
+    A frame pinned in the ring (use as a context manager or call release())
+
+    Attributes:
+        seq (int): Frame sequence number
+        frame (Frame): Frame whose pixels are a view into shared memory
+        timestamp (float): Capture time (time.time())
+    """
+
+    def __init__(self, ring, slot, seq, frame, timestamp):
+        self.ring = ring
+        self.slot = slot
+        self.seq = seq
+        self.frame = frame
+        self.timestamp = timestamp
+        self._released = False
+
+    def release(self):
+        if not self._released:
+            self._released = True
+            self.ring._unpin(self.slot)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+class FrameRing:
+    """
+    Fixed-size ring of raw frames in shared memory
+
+    Create it in the owning process, pass ring.handle to child processes
+    (multiprocessing Process args) and FrameRing.attach(handle) there
+    """
+
+    def __init__(self, shm, cond, owner=False):
+        self.shm = shm
+        self.cond = cond
+        self.owner = owner
+        magic, self.slot_count, self.slot_size = HEADER.unpack_from(shm.buf, 0)[:3]
+        if magic != MAGIC:
+            raise ValueError(f"Shared memory '{shm.name}' is not a frame ring")
+        self._data_offset = HEADER_SIZE + self.slot_count * SLOT_SIZE
+        self._last_read = 0
+        self._closed = False
+
+    @classmethod
+    def create(cls, slots=None, slot_size=None):
+        """
+        Allocate a new ring
+
+        Args:
+            slots (int): Frame slots (LP_SHM_SLOTS, at least 3: the newest
+                frame, one being written and one pinned by a reader)
+            slot_size (int): Bytes per slot (LP_SHM_SLOT_MB)
+        """
+        slots = max(3, config.SHM_SLOTS if slots is None else slots)
+        slot_size = _align(int(config.SHM_SLOT_MB * 1024 * 1024) if slot_size is None else slot_size)
+        size = HEADER_SIZE + slots * SLOT_SIZE + slots * slot_size
+        shm = shared_memory.SharedMemory(create=True, size=size)
+        shm.buf[:HEADER_SIZE + slots * SLOT_SIZE] = bytes(HEADER_SIZE + slots * SLOT_SIZE)
+        HEADER.pack_into(shm.buf, 0, MAGIC, slots, slot_size, 0, -1, 0, 0, 0)
+        return cls(shm, _mp.Condition(_mp.Lock()), owner=True)
+
+    @property
+    def handle(self):
+        """Picklable reference for child processes"""
+        return self.shm.name, self.cond
+
+    @classmethod
+    def attach(cls, handle):
+        name, cond = handle
+        try:
+            shm = shared_memory.SharedMemory(name=name, track=False)
+        except TypeError:
+            # Python < 3.13 always tracks; children spawned by the owner share
+            # its resource tracker, so the segment is still freed only once
+            shm = shared_memory.SharedMemory(name=name)
+        return cls(shm, cond)
+
+    # ------------------------------------------
+    # Header access (caller holds the lock)
+    # ------------------------------------------
+    def _header(self):
+        return list(HEADER.unpack_from(self.shm.buf, 0))
+
+    def _set_header(self, values):
+        HEADER.pack_into(self.shm.buf, 0, *values)
+
+    def _slot(self, index):
+        return list(SLOT.unpack_from(self.shm.buf, HEADER_SIZE + index * SLOT_SIZE))
+
+    def _set_slot(self, index, values):
+        SLOT.pack_into(self.shm.buf, HEADER_SIZE + index * SLOT_SIZE, *values)
+
+    def _view(self, index, height, width, channels):
+        offset = self._data_offset + index * self.slot_size
+        shape = (height, width) if channels == 1 else (height, width, channels)
+        return np.ndarray(shape, dtype=np.uint8, buffer=self.shm.buf, offset=offset)
+
+    # ------------------------------------------
+    # Writer
+    # ------------------------------------------
+    def write(self, image, fmt=BGR, timestamp=None):
+        """
+        Copy a frame into a free slot and publish it
+
+        Args:
+            image (numpy.ndarray): HxW or HxWxC uint8 image
+            fmt (str): Pixel format of image
+            timestamp (float): Capture time (default: now)
+
+        Returns:
+            int: Sequence number, or None if every slot was pinned (counted
+            as blocked)
+
+        Raises:
+            ValueError: Frame larger than a slot (raise LP_SHM_SLOT_MB)
+        """
+        image = np.ascontiguousarray(image)
+        if image.nbytes > self.slot_size or image.dtype != np.uint8:
+            raise ValueError(f'Frame of {image.nbytes} bytes does not fit ring slots of {self.slot_size} bytes')
+        timestamp = time.time() if timestamp is None else timestamp
+        height, width = image.shape[:2]
+        channels = 1 if image.ndim == 2 else image.shape[2]
+
+        with self.cond:
+            header = self._header()
+            latest = header[4]
+            index = None
+            for step in range(1, self.slot_count + 1):
+                candidate = (latest + step) % self.slot_count
+                slot = self._slot(candidate)
+                if candidate != latest and slot[1] == 0 and slot[0] >= 0:
+                    index = candidate
+                    break
+            if index is None:
+                header[7] += 1
+                self._set_header(header)
+                return None
+            slot = self._slot(index)
+            if slot[0] > 0 and slot[2] == 0:
+                header[6] += 1  # overwritten before anyone read it
+                self._set_header(header)
+            self._set_slot(index, [-1, 0, 0, 0, 0, 0, 0, 0.0, 0])
+
+        offset = self._data_offset + index * self.slot_size
+        target = np.ndarray(image.shape, dtype=np.uint8, buffer=self.shm.buf, offset=offset)
+        np.copyto(target, image)
+
+        with self.cond:
+            header = self._header()
+            seq = header[3] + 1
+            self._set_slot(index, [seq, 0, 0, height, width, channels, FORMATS.index(fmt),
+                                   timestamp, image.nbytes])
+            header[3] = seq
+            header[4] = index
+            self._set_header(header)
+            self.cond.notify_all()
+        return seq
+
+    # ------------------------------------------
+    # Readers
+    # ------------------------------------------
+    def acquire(self, newer_than=None, timeout=None, exclusive=False):
+        """
+        Pin the newest frame (zero-copy)
+
+        Args:
+            newer_than (int): Wait for a sequence number above this (default:
+                the last one this ring object returned)
+            timeout (float): Seconds to wait (None = forever)
+            exclusive (bool): Claim the frame so other exclusive readers
+                (e.g. a pool of inference workers) skip it
+
+        Returns:
+            SharedFrame: Pinned frame, or None on timeout
+        """
+        newer_than = self._last_read if newer_than is None else newer_than
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self.cond:
+            while True:
+                header = self._header()
+                floor = max(newer_than, header[5]) if exclusive else newer_than
+                if header[3] > floor and header[4] >= 0:
+                    break
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return None
+                self.cond.wait(remaining)
+            index = header[4]
+            slot = self._slot(index)
+            slot[1] += 1
+            slot[2] += 1
+            self._set_slot(index, slot)
+            if exclusive:
+                header[5] = slot[0]
+                self._set_header(header)
+        seq, _, _, height, width, channels, fmt, timestamp, _ = slot
+        self._last_read = seq
+        frame = Frame(self._view(index, height, width, channels), FORMATS[fmt], timestamp)
+        return SharedFrame(self, index, seq, frame, timestamp)
+
+    def _unpin(self, index):
+        with self.cond:
+            slot = self._slot(index)
+            slot[1] = max(0, slot[1] - 1)
+            self._set_slot(index, slot)
+
+    def read_copy(self, newer_than=None, timeout=None):
+        """
+        Newest frame copied out of the ring (for consumers that keep it)
+
+        Returns:
+            tuple: (seq, Frame) or None on timeout
+        """
+        shared = self.acquire(newer_than, timeout)
+        if shared is None:
+            return None
+        with shared:
+            data = shared.frame.data.copy()
+        return shared.seq, Frame(data, shared.frame.format, shared.timestamp)
+
+    def get_stats(self):
+        if self._closed:
+            return {'name': self.shm.name, 'closed': True}
+        with self.cond:
+            _, slots, slot_size, published, _, _, dropped, blocked = self._header()
+            pinned = sum(1 for i in range(slots) if self._slot(i)[1] > 0)
+        return {
+            'name': self.shm.name,
+            'slots': slots,
+            'slotBytes': slot_size,
+            'framesWritten': published,
+            'framesDropped': dropped,
+            'framesBlocked': blocked,
+            'dropRate': round(dropped / published, 3) if published else 0.0,
+            'pinnedSlots': pinned
+        }
+
+    def close(self):
+        """Unmap (views handed out before must no longer be used)"""
+        if not self._closed:
+            self._closed = True
+            self.shm.close()
+
+    def unlink(self):
+        """Free the segment (owner only, after every process closed it)"""
+        if self.owner:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
+
+
+# ==========================================
+# Capture process
+# ==========================================
+def _capture_main(handle, source, stop_event, status, reconnect_delay):
+    """Child process: open the camera and write every frame into the ring"""
+    from camera_backends import open_camera
+    from frame_pipeline import as_frame
+
+    ring = FrameRing.attach(handle)
+    capture = None
+    try:
+        while not stop_event.is_set():
+            if capture is None:
+                try:
+                    capture = open_camera(source)
+                    status.put(('running', None, getattr(capture, 'recordable', True)))
+                except Exception as e:
+                    status.put(('reconnecting', str(e), True))
+                    stop_event.wait(reconnect_delay)
+                    continue
+            try:
+                frame = capture.capture_raw()
+            except Exception as e:
+                frame = None
+                status.put(('reconnecting', str(e), True))
+            if frame is None:
+                try:
+                    capture.close()
+                except Exception:
+                    pass
+                capture = None
+                stop_event.wait(reconnect_delay)
+                continue
+            frame = as_frame(frame)
+            try:
+                ring.write(frame.data, frame.format, frame.timestamp)
+            except ValueError as e:
+                # Every later frame is as large - restarting cannot help
+                status.put(('error', str(e), True))
+                return
+    finally:
+        if capture is not None:
+            try:
+                capture.close()
+            except Exception:
+                pass
+        ring.close()
+
+
+class CaptureProcess:
+    """
+    Runs one camera in a child process that writes into a FrameRing
+    """
+
+    def __init__(self, source, ring, name='camera', reconnect_delay=None):
+        self.source = source
+        self.ring = ring
+        self.name = name
+        self.reconnect_delay = config.CAMERA_RECONNECT_DELAY if reconnect_delay is None else reconnect_delay
+        self._stop_event = _mp.Event()
+        self._status = _mp.Queue()
+        self._process = None
+
+    def start(self):
+        self._stop_event.clear()
+        self._process = _mp.Process(
+            target=_capture_main,
+            args=(self.ring.handle, self.source, self._stop_event, self._status, self.reconnect_delay),
+            name=f'capture-{self.name}',
+            daemon=True
+        )
+        self._process.start()
+
+    def stop(self, timeout=5.0):
+        self._stop_event.set()
+        if self._process is not None:
+            self._process.join(timeout)
+            if self._process.is_alive():
+                self._process.terminate()
+                self._process.join(timeout)
+            self._process = None
+
+    def is_alive(self):
+        return self._process is not None and self._process.is_alive()
+
+    @property
+    def pid(self):
+        return self._process.pid if self._process is not None else None
+
+    def poll_status(self):
+        """
+        Status changes reported by the child since the last call. 'error'
+        is fatal: the child has exited and must not be restarted
+
+        Returns:
+            list: [(status, error, recordable), ...]
+        """
+        changes = []
+        while True:
+            try:
+                changes.append(self._status.get_nowait())
+            except queue.Empty:
+                return changes
+
+
+# ==========================================
+# Inference worker processes
+# ==========================================
+def service_process_fn():
+    """Default worker setup: the recognition service's per-frame pipeline"""
+    from lp_recognition_service import get_recognition_service
+    return get_recognition_service()._process_image
+
+
+def _inference_main(handle, setup, stop_event, results, index):
+    """Child process: recognize frames straight from the ring"""
+    process_fn = setup()
+    ring = FrameRing.attach(handle)
+    try:
+        while not stop_event.is_set():
+            shared = ring.acquire(timeout=0.5, exclusive=True)
+            if shared is None:
+                continue
+            picked = time.time()
+            try:
+                result = process_fn(shared.frame)
+            except Exception as e:
+                result = {'success': False, 'error': f'Processing error: {e}'}
+            finally:
+                shared.release()
+            done = time.time()
+            results.put({
+                'seq': shared.seq,
+                'worker': index,
+                'timestamp': shared.timestamp,
+                'handoffMs': (picked - shared.timestamp) * 1000.0,
+                'runMs': (done - picked) * 1000.0,
+                'result': result
+            })
+    finally:
+        ring.close()
+
+
+class InferenceWorkerPool:
+    """
+    Processes that each take the newest unclaimed frame from a ring, map it
+    zero-copy and run process_fn on it; results arrive on a queue. Not used
+    by the service (cameras recognize in-process), only by bench_shm_ring
+
+    Args:
+        ring (FrameRing): Ring to read from
+        workers (int): Worker processes (each loads its own models)
+        setup (callable): Picklable module-level function called once in
+            each worker, returning the Frame -> result function
+    """
+
+    def __init__(self, ring, workers=1, setup=service_process_fn, name='inference'):
+        self.ring = ring
+        self.workers = max(1, workers)
+        self.setup = setup
+        self.name = name
+        self.results = _mp.Queue()
+        self._stop_event = _mp.Event()
+        self._processes = []
+
+    def start(self):
+        self._stop_event.clear()
+        for index in range(self.workers):
+            process = _mp.Process(
+                target=_inference_main,
+                args=(self.ring.handle, self.setup, self._stop_event, self.results, index),
+                name=f'{self.name}-{index}',
+                daemon=True
+            )
+            process.start()
+            self._processes.append(process)
+
+    def stop(self, timeout=5.0):
+        self._stop_event.set()
+        for process in self._processes:
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+                process.join(timeout)
+        self._processes = []
+
+    def get_result(self, timeout=None):
+        """
+        Next result dict {'seq', 'worker', 'timestamp', 'handoffMs', 'runMs',
+        'result'}, or None on timeout
+        """
+        try:
+            return self.results.get(timeout=timeout)
+        except queue.Empty:
+            return None
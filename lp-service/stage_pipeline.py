@@ -0,0 +1,223 @@
+"""
+Staged processing pipeline
+Runs each stage (e.g. detect -> OCR -> publish) on its own worker thread(s)
+with bounded queues in between, so consecutive frames overlap: frame N+1 is
+detected while frame N is being read. The number of frames in flight is
+capped; when the pipeline is full new frames are refused instead of queued
+"""
+import queue
+import threading
+import time
+from collections import deque
+
+from camera_manager import LatencyStats
+
+
+class _Item:
+    __slots__ = ('payload', 'submitted', 'enqueued')
+
+    def __init__(self, payload, now):
+        self.payload = payload
+        self.submitted = now
+        self.enqueued = now
+
+
+class Stage:
+    """
+    One pipeline stage
+
+    fn(payload) returns the payload for the next stage, or None to end the
+    item early (e.g. no plate detected)
+    """
+
+    def __init__(self, name, fn, workers=1):
+        self.name = name
+        self.fn = fn
+        self.workers = max(1, workers)
+        self.queue = None
+
+        self._lock = threading.Lock()
+        self.processed = 0
+        self.errors = 0
+        self.busy_time = 0.0
+        self.queue_wait = LatencyStats()
+        self.run_time = LatencyStats()
+        self.max_depth = 0
+
+    def _record(self, wait, run, error=False):
+        with self._lock:
+            self.processed += 1
+            self.errors += 1 if error else 0
+            self.busy_time += run
+            self.queue_wait.add(wait)
+            self.run_time.add(run)
+
+    def get_stats(self, elapsed):
+        """
+        Args:
+            elapsed (float): Seconds the pipeline has been running
+
+        Returns:
+            dict: Items processed, utilisation (busy share of all workers),
+            queue wait and run time, queue depth
+        """
+        with self._lock:
+            busy = self.busy_time
+            stats = {
+                'name': self.name,
+                'workers': self.workers,
+                'processed': self.processed,
+                'errors': self.errors,
+                'utilisation': round(busy / (elapsed * self.workers), 3) if elapsed > 0 else 0.0,
+                'queueDepth': self.queue.qsize() if self.queue is not None else 0,
+                'maxQueueDepth': self.max_depth,
+                'queueWait': self.queue_wait.to_dict(),
+                'run': self.run_time.to_dict()
+            }
+        return stats
+
+
+class StagePipeline:
+    """
+    Chain of stages with bounded queues and a cap on items in flight
+
+    Usage:
+        pipeline = StagePipeline([Stage('detect', detect), Stage('ocr', read)], max_in_flight=3)
+        pipeline.start()
+        if not pipeline.submit(frame):
+            ...  # full, frame skipped
+    """
+
+    def __init__(self, stages, max_in_flight=2, name='pipeline'):
+        self.stages = list(stages)
+        self.max_in_flight = max(1, max_in_flight)
+        self.name = name
+        # A queue never holds more than the items in flight, so puts only
+        # block on shutdown and backpressure comes from the in-flight cap
+        for stage in self.stages:
+            stage.queue = queue.Queue(maxsize=self.max_in_flight)
+
+        self._slots = threading.BoundedSemaphore(self.max_in_flight)
+        self._lock = threading.Lock()
+        self._threads = []
+        self._running = False
+        self._started_at = None
+
+        self.submitted = 0
+        self.rejected = 0
+        self.completed = 0
+        self.in_flight = 0
+        self.latency = LatencyStats()
+        self._completions = deque(maxlen=100)
+
+    def start(self):
+        with self._lock:
+            if self._running:
+                return
+            self._running = True
+            self._started_at = time.monotonic()
+        for index, stage in enumerate(self.stages):
+            for n in range(stage.workers):
+                thread = threading.Thread(
+                    target=self._work, args=(index,), name=f'{self.name}-{stage.name}-{n}', daemon=True
+                )
+                thread.start()
+                self._threads.append(thread)
+
+    def stop(self):
+        """Stop workers; items still in flight are dropped"""
+        with self._lock:
+            self._running = False
+        for thread in self._threads:
+            thread.join(5.0)
+        self._threads = []
+
+    def submit(self, payload, block=False, timeout=None):
+        """
+        Feed an item into the first stage
+
+        Args:
+            block (bool): Wait for a free slot instead of refusing
+            timeout (float): Maximum wait when blocking
+
+        Returns:
+            bool: False if the pipeline is full (or stopped)
+        """
+        if not self._running or not self._slots.acquire(block, timeout if block else None):
+            with self._lock:
+                self.rejected += 1
+            return False
+        with self._lock:
+            self.submitted += 1
+            self.in_flight += 1
+        self._put(0, _Item(payload, time.monotonic()))
+        return True
+
+    def _put(self, index, item):
+        stage = self.stages[index]
+        while self._running:
+            try:
+                stage.queue.put(item, timeout=0.5)
+            except queue.Full:
+                continue
+            depth = stage.queue.qsize()
+            if depth > stage.max_depth:
+                stage.max_depth = depth
+            return
+        self._finish(item)
+
+    def _finish(self, item, completed=False):
+        now = time.monotonic()
+        with self._lock:
+            self.in_flight -= 1
+            if completed:
+                self.completed += 1
+                self.latency.add(now - item.submitted)
+                self._completions.append(now)
+        self._slots.release()
+
+    def _work(self, index):
+        stage = self.stages[index]
+        last = index == len(self.stages) - 1
+        while self._running:
+            try:
+                item = stage.queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            started = time.monotonic()
+            wait = started - item.enqueued
+            try:
+                result = stage.fn(item.payload)
+            except Exception as e:
+                stage._record(wait, time.monotonic() - started, error=True)
+                print(f"⚠️ Pipeline stage '{stage.name}' failed: {e}")
+                self._finish(item)
+                continue
+            finished = time.monotonic()
+            stage._record(wait, finished - started)
+
+            if result is None or last:
+                self._finish(item, completed=last and result is not None)
+                continue
+            item.payload = result
+            item.enqueued = finished
+            self._put(index + 1, item)
+
+    def get_stats(self):
+        """Pipeline and per-stage statistics"""
+        elapsed = time.monotonic() - self._started_at if self._started_at else 0.0
+        with self._lock:
+            completions = list(self._completions)
+            stats = {
+                'running': self._running,
+                'maxInFlight': self.max_in_flight,
+                'inFlight': self.in_flight,
+                'submitted': self.submitted,
+                'rejected': self.rejected,
+                'completed': self.completed,
+                'latency': self.latency.to_dict()
+            }
+        span = completions[-1] - completions[0] if len(completions) > 1 else 0.0
+        stats['fps'] = round((len(completions) - 1) / span, 2) if span > 0 else 0.0
+        stats['stages'] = [stage.get_stats(elapsed) for stage in self.stages]
+        return stats
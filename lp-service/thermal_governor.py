@@ -0,0 +1,247 @@
+"""
+Thermal and load governor
+Reads the SoC temperature and load average (LP_THERMAL_PATH,
+LP_LOADAVG_PATH) and recent recognition latency (priority.py), and steps
+the service down before the firmware throttles the CPU: each level halves
+the preview rate, doubles the continuous recognition interval and uses the
+next smaller detector input size (except with tiled detection). Levels step back up once the device is
+cool, idle and fast again for LP_GOVERNOR_HOLD seconds
+"""
+import os
+import threading
+import time
+from datetime import datetime
+
+import config
+from priority import RECOVER_FRACTION, get_priority_gate
+
+
+def read_temperature(path):
+    """
+    SoC temperature from a sysfs thermal zone (millidegrees Celsius)
+
+    Returns:
+        float: Degrees Celsius, or None if unavailable
+    """
+    try:
+        with open(path) as f:
+            value = float(f.read().strip())
+    except (OSError, ValueError):
+        return None
+    # Some drivers report whole degrees
+    return value / 1000.0 if value > 1000 else value
+
+
+def read_load(path, cpus=None):
+    """
+    1 minute load average per CPU from /proc/loadavg
+
+    Returns:
+        float: Load per CPU, or None if unavailable
+    """
+    try:
+        with open(path) as f:
+            load = float(f.read().split()[0])
+    except (OSError, ValueError, IndexError):
+        return None
+    return load / max(1, cpus or os.cpu_count() or 1)
+
+
+def tiled_detection():
+    """
+    True if the service detects on tiles (LP_TILED_DETECTION with torch
+    models): tiles are always LP_TILE_SIZE, so the detector size is not
+    stepped down
+    """
+    return config.TILED_DETECTION and config.MODEL_BACKEND != 'fake'
+
+
+def parse_sizes(spec):
+    """'512,416,320' -> [512, 416, 320] (descending)"""
+    sizes = []
+    for part in str(spec).split(','):
+        try:
+            sizes.append(int(part))
+        except ValueError:
+            continue
+    return sorted(set(size for size in sizes if size > 0), reverse=True)
+
+
+class ThermalGovernor:
+    """
+    Degradation level from temperature, load and recognition latency
+
+    Consumers ask for the effective value of their setting:
+        fps = governor.preview_fps(config.PREVIEW_FPS)
+        interval = governor.continuous_interval(config.CONTINUOUS_INTERVAL)
+        size = governor.detect_size(config.DETECT_SIZE)
+    """
+
+    def __init__(self, temperature_path=None, load_path=None, interval=None, hold=None,
+                 max_level=None, gate=None):
+        """
+        Args:
+            temperature_path (str): Thermal zone file (LP_THERMAL_PATH)
+            load_path (str): Load average file (LP_LOADAVG_PATH)
+            interval (float): Seconds between checks (LP_GOVERNOR_INTERVAL)
+            hold (float): Seconds of calm before stepping back up (LP_GOVERNOR_HOLD)
+            max_level (int): Deepest degradation level (LP_GOVERNOR_MAX_LEVEL)
+            gate (PriorityGate): Source of recognition latency
+        """
+        self.temperature_path = config.THERMAL_PATH if temperature_path is None else temperature_path
+        self.load_path = config.LOADAVG_PATH if load_path is None else load_path
+        self.interval = config.GOVERNOR_INTERVAL if interval is None else interval
+        self.hold = config.GOVERNOR_HOLD if hold is None else hold
+        self.max_level = config.GOVERNOR_MAX_LEVEL if max_level is None else max_level
+        self.gate = gate or get_priority_gate()
+        self.detect_sizes = parse_sizes(config.GOVERNOR_DETECT_SIZES)
+
+        self.level = 0
+        self.reasons = []
+        self.temperature = None
+        self.load = None
+        self.latency_ms = None
+        self.changes = 0
+        self._last_change = time.monotonic()
+        self._changed_at = None
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    # ==========================================
+    # Effective settings
+    # ==========================================
+    def preview_fps(self, fps):
+        """Preview rate halved per level (at least 1 fps)"""
+        if self.level == 0 or fps <= 0:
+            return fps
+        return max(1.0, fps / (2 ** self.level))
+
+    def continuous_interval(self, interval):
+        """Continuous recognition interval doubled per level"""
+        if self.level == 0:
+            return interval
+        return max(interval, 0.1) * (2 ** self.level)
+
+    def detect_size(self, size):
+        """
+        Next smaller LP_GOVERNOR_DETECT_SIZES entry per level (unchanged
+        with tiled detection)
+        """
+        if self.level == 0 or tiled_detection():
+            return size
+        smaller = [candidate for candidate in self.detect_sizes if candidate < size]
+        if not smaller:
+            return size
+        return smaller[min(self.level, len(smaller)) - 1]
+
+    # ==========================================
+    # Control loop
+    # ==========================================
+    def evaluate(self, now=None):
+        """
+        Read the sensors and move at most one level
+
+        Returns:
+            int: Level after this check
+        """
+        now = time.monotonic() if now is None else now
+        temperature = read_temperature(self.temperature_path)
+        load = read_load(self.load_path)
+        # Only latency measured at the current level counts
+        latency = self.gate.recognition_p95(since=self._last_change)
+        target = config.RECOGNITION_TARGET_MS
+
+        reasons = []
+        if temperature is not None and temperature >= config.THERMAL_HIGH:
+            reasons.append(f'temperature {temperature:.1f}C >= {config.THERMAL_HIGH:g}C')
+        if load is not None and load >= config.LOAD_HIGH:
+            reasons.append(f'load {load:.2f}/cpu >= {config.LOAD_HIGH:g}')
+        if latency is not None and target > 0 and latency > target:
+            reasons.append(f'recognition p95 {latency:.0f} ms > {target:g} ms')
+        calm = ((temperature is None or temperature <= config.THERMAL_LOW)
+                and (load is None or load <= config.LOAD_LOW)
+                and (latency is None or target <= 0 or latency <= target * RECOVER_FRACTION))
+
+        with self._lock:
+            self.temperature, self.load, self.latency_ms = temperature, load, latency
+            if reasons:
+                self.reasons = reasons
+                if self.level < self.max_level and now - self._last_change >= self.interval:
+                    self._set_level(self.level + 1, now)
+            elif calm and self.level > 0 and now - self._last_change >= self.hold:
+                self.reasons = []
+                self._set_level(self.level - 1, now)
+            return self.level
+
+    def _set_level(self, level, now):
+        direction = '🌡️ Throttling' if level > self.level else '❄️ Restoring'
+        self.level = level
+        self.changes += 1
+        self._last_change = now
+        self._changed_at = datetime.now()
+        detail = f" ({'; '.join(self.reasons)})" if self.reasons else ''
+        print(f"{direction} to level {level}: preview {self.preview_fps(config.PREVIEW_FPS):g} fps, "
+              f"continuous every {self.continuous_interval(config.CONTINUOUS_INTERVAL):g}s, "
+              f"detect {self.detect_size(config.DETECT_SIZE)}px{detail}")
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name='thermal-governor', daemon=True)
+        self._thread.start()
+        print(f"🌡️ Thermal governor started ({self.temperature_path}, {self.load_path})")
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(5.0)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            try:
+                self.evaluate()
+            except Exception as e:
+                print(f"⚠️ Thermal governor check failed: {e}")
+            self._stop_event.wait(self.interval)
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                'enabled': self._thread is not None,
+                'level': self.level,
+                'maxLevel': self.max_level,
+                'reasons': list(self.reasons),
+                'temperatureC': round(self.temperature, 1) if self.temperature is not None else None,
+                'loadPerCpu': round(self.load, 2) if self.load is not None else None,
+                'recognitionP95Ms': round(self.latency_ms, 1) if self.latency_ms is not None else None,
+                'targetMs': config.RECOGNITION_TARGET_MS,
+                'changes': self.changes,
+                'lastChange': self._changed_at.isoformat() if self._changed_at else None,
+                'settings': {
+                    'previewFps': self.preview_fps(config.PREVIEW_FPS),
+                    'continuousInterval': self.continuous_interval(config.CONTINUOUS_INTERVAL),
+                    'detectSize': self.detect_size(config.DETECT_SIZE)
+                }
+            }
+
+
+# ==========================================
+# Global instance
+# ==========================================
+_governor_instance = None
+
+
+def get_governor():
+    """
+    Get singleton governor (level 0 until started)
+
+    Returns:
+        ThermalGovernor: Singleton instance
+    """
+    global _governor_instance
+    if _governor_instance is None:
+        _governor_instance = ThermalGovernor()
+    return _governor_instance
@@ -1,6 +1,6 @@
 const axios = require('axios')
-const FormData = require('form-data')
 const fs = require('fs')
+const path = require('path')
 const logger = require('./logger')
 
 const LP_SERVICE_URL = process.env.LP_SERVICE_URL || 'http://localhost:5001'
@@ -18,41 +18,51 @@ class LicensePlateClient {
    *   { success: boolean, licensePlate: string, confidence: number, error?: string }
    */
   static async recognizeFromFile(imagePath) {
-    try {
-      // Check if file exists
-      if (!fs.existsSync(imagePath)) {
-        logger.error(`Image file not found: ${imagePath}`)
-        return {
-          success: false,
-          error: 'Image file not found'
-        }
+    // Check if file exists
+    if (!fs.existsSync(imagePath)) {
+      logger.error(`Image file not found: ${imagePath}`)
+      return {
+        success: false,
+        error: 'Image file not found'
       }
+    }
 
-      // Create form data
-      const formData = new FormData()
-      formData.append('file', fs.createReadStream(imagePath))
-
-      logger.info(`Calling LP recognition service for file: ${imagePath}`)
+    logger.info(`Calling LP recognition service for file: ${imagePath}`)
+    return LicensePlateClient.recognizeFromBuffer(fs.readFileSync(imagePath), path.basename(imagePath))
+  }
 
-      // Call Python API
+  /**
+   * Recognize license plate from image bytes
+   * Sends the raw image as application/octet-stream (no multipart framing,
+   * no base64) and asks for the compact response (no image echo)
+   * @param {Buffer} buffer - Encoded JPEG/PNG/BMP image
+   * @param {string} [filename] - Original file name (informational)
+   * @returns {Promise<Object>} Recognition result
+   *   { success: boolean, licensePlate: string, confidence: number, cache: string, error?: string }
+   */
+  static async recognizeFromBuffer(buffer, filename = 'upload.jpg') {
+    try {
       const response = await axios.post(
         `${LP_SERVICE_URL}/api/recognize`,
-        formData,
+        buffer,
         {
+          params: { compact: 1 },
           headers: {
-            ...formData.getHeaders()
+            'Content-Type': 'application/octet-stream',
+            'X-Filename': encodeURIComponent(filename)
           },
           timeout: REQUEST_TIMEOUT
         }
       )
 
       if (response.data.success) {
-        logger.info(`License plate recognized: ${response.data.data.licensePlate}`)
+        logger.info(`License plate recognized: ${response.data.licensePlate}`)
         return {
           success: true,
-          licensePlate: response.data.data.licensePlate,
-          confidence: response.data.data.confidence,
-          timestamp: response.data.data.timestamp
+          licensePlate: response.data.licensePlate,
+          confidence: response.data.confidence,
+          cache: response.data.cache,
+          timestamp: new Date().toISOString()
         }
       } else {
         logger.warn(`Recognition failed: ${response.data.error}`)
@@ -183,15 +193,17 @@ class LicensePlateClient {
 
   /**
    * Recognize license plate from Raspberry Pi Camera
+   * @param {number} [burst] - Frames to grab; the sharpest/best exposed are recognized
+   *   (default: service setting LP_PICAMERA_BURST)
    * @returns {Promise<Object>} Recognition result
    */
-  static async recognizeFromPiCamera() {
+  static async recognizeFromPiCamera(burst) {
     try {
       logger.info('Capturing from Raspberry Pi Camera for LP recognition')
 
       const response = await axios.post(
         `${LP_SERVICE_URL}/api/recognize/picamera`,
-        {},
+        burst ? { burst } : {},
         { timeout: REQUEST_TIMEOUT }
       )
 
@@ -202,7 +214,8 @@ class LicensePlateClient {
           licensePlate: response.data.data.licensePlate,
           confidence: response.data.data.confidence,
           timestamp: response.data.data.timestamp,
-          imageData: response.data.data.imageData
+          imageData: response.data.data.imageData,
+          quality: response.data.data.quality
         }
       } else {
         logger.warn(`Pi Camera recognition failed: ${response.data.error}`)
@@ -278,19 +291,24 @@ class LicensePlateClient {
 
   /**
    * 🆕 Get frame from active preview session (fast, no camera restart)
+   * @param {number} [after] - Frame version already shown; waits briefly for a newer one
    * @returns {Promise<Object>} Preview frame data
    */
-  static async getPiCameraPreviewFrame() {
+  static async getPiCameraPreviewFrame(after) {
     try {
       const response = await axios.get(
         `${LP_SERVICE_URL}/api/camera/preview/frame`,
-        { timeout: 3000 }
+        {
+          params: after !== undefined && after !== null ? { after } : {},
+          timeout: 3000
+        }
       )
 
       if (response.data.success) {
         return {
           success: true,
           imageData: response.data.data.imageData,
+          version: response.data.data.version,
           timestamp: response.data.data.timestamp
         }
       } else {
@@ -386,6 +404,21 @@ class LicensePlateClient {
     }
   }
 
+  /**
+   * Open Server-Sent Events stream of recognition, track and camera events
+   * @param {string} [types] - Comma separated event types (default: all)
+   * @param {string} [lastEventId] - Resume after this event id
+   * @returns {Promise<Object>} Axios response with a readable stream in `data`
+   */
+  static async openEventStream(types, lastEventId) {
+    return axios.get(`${LP_SERVICE_URL}/api/events`, {
+      params: types ? { types } : {},
+      headers: lastEventId ? { 'Last-Event-ID': lastEventId } : {},
+      responseType: 'stream',
+      timeout: 0
+    })
+  }
+
   /**
    * Get service URL configuration
    * @returns {string} Service URL